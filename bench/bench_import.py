@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Benchmark the startup cost of summarize.
+
+Imports the package in fresh interpreters and reports the best of N cumulative
+import times (python -X importtime), the wall time of `python -m summarize
+--help`, and which heavy modules an import pulls in - none should, they are
+imported when first used. With --max-ms it fails if importing takes longer.
+
+usage: bench_import.py [--repeat 5] [--max-ms 100]
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules that importing the package must not import
+HEAVY_MODULES = ['PyQt5', 'xlrd', 'xlsxwriter', 'numpy', 'emolog', 'pyarrow']
+
+IMPORT_TIME_RE = re.compile(r'import time:\s+\d+ \|\s+(\d+) \| (\S+)$')
+
+
+def python(args):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([REPO_DIR] + [x for x in [os.environ.get('PYTHONPATH')] if x]))
+    return subprocess.run([sys.executable] + args, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True)
+
+
+def import_ms(module):
+    """
+    :return: cumulative import time of <module> in a fresh interpreter, in milliseconds
+    """
+    for line in python(['-X', 'importtime', '-c', f'import {module}']).stderr.splitlines():
+        m = IMPORT_TIME_RE.match(line)
+        if m and m.group(2) == module:
+            return int(m.group(1)) / 1000
+    raise RuntimeError(f'no import time reported for {module}')
+
+
+def imported_heavy_modules(module):
+    code = f'import sys, {module}; print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    return [x for x in python(['-c', code]).stdout.strip().split(',') if x]
+
+
+def help_ms():
+    start = time.perf_counter()
+    python(['-m', 'summarize', '--help'])
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per measurement, the best is reported')
+    parser.add_argument('--max-ms', type=float, help='fail if importing summarize takes longer than this')
+    args = parser.parse_args()
+
+    failed = False
+    for module in ['summarize', 'summarize.core', 'summarize.cli']:
+        ms = min(import_ms(module) for i in range(args.repeat))
+        heavy = imported_heavy_modules(module)
+        print(f"import {module:<16} {ms:8.1f}ms  heavy modules: {', '.join(heavy) or 'none'}")
+        failed = failed or len(heavy) > 0
+    ms = min(import_ms('summarize.gui') for i in range(args.repeat))
+    print(f"import {'summarize.gui':<16} {ms:8.1f}ms")
+    print(f"summarize --help        {min(help_ms() for i in range(args.repeat)):8.1f}ms")
+    if args.max_ms is not None:
+        ms = min(import_ms('summarize') for i in range(args.repeat))
+        if ms > args.max_ms:
+            print(f"importing summarize takes {ms:.1f}ms, over the {args.max_ms}ms budget")
+            failed = True
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
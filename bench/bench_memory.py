@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Peak memory of summarize_files as a function of the number of files.
+
+Summarizes the first N workbooks of a directory for each N, each in a fresh
+process, and reports that process' peak RSS. With the streaming pipeline the
+peak stays roughly flat (one workbook plus the output) as N grows; the
+--all-books baseline keeps every xlrd workbook open like the old pipeline did.
+
+On windows the peak is read through psutil, which has to be installed.
+
+usage: bench_memory.py DIR [--counts 10,100,1000] [--reader xlrd] [--all-books]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser, SUPPRESS
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def peak_rss_mb():
+    """
+    :return: peak resident set size of this process in MB, or None if it cannot be told
+    """
+    try:
+        import resource
+    except ImportError:
+        # windows: the peak working set, through psutil
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    # linux reports kilobytes, macos bytes
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20
+
+
+def child(d, count, reader, all_books):
+    import summarize
+    filenames = summarize.read_xlsx(d)[:count]
+    config = summarize.Config(d)
+    config.reader = reader
+    config.cache = False
+    if all_books:
+        books = [reader for filename, reader in summarize.iter_readers(filenames)]
+        print(json.dumps(dict(files=len(books), peak_rss_mb=peak_rss_mb())))
+        return
+    with tempfile.TemporaryDirectory() as output_path:
+        summarize.summarize_files(filenames, output_path, config)
+    print(json.dumps(dict(files=len(filenames), peak_rss_mb=peak_rss_mb())))
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('dir')
+    parser.add_argument('--counts', default='10,100,1000')
+    parser.add_argument('--reader', default='stream')
+    parser.add_argument('--all-books', action='store_true', help='measure holding all xlrd workbooks at once instead')
+    parser.add_argument('--child', type=int, help=SUPPRESS)
+    args = parser.parse_args()
+    if args.child is not None:
+        child(args.dir, args.child, args.reader, args.all_books)
+        return
+    print(f"{'files':>8} {'peak RSS [MB]':>14}")
+    for count in [int(x) for x in args.counts.split(',')]:
+        cmd = [sys.executable, __file__, args.dir, '--child', str(count), '--reader', args.reader]
+        if args.all_books:
+            cmd.append('--all-books')
+        out = subprocess.run(cmd, stdout=subprocess.PIPE, universal_newlines=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        peak = 'n/a' if result['peak_rss_mb'] is None else f"{result['peak_rss_mb']:.1f}"
+        print(f"{result['files']:>8} {peak:>14}")
+
+
+if __name__ == '__main__':
+    main()
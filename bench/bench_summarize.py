@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+"""
+Benchmark the summarize phases on synthetic workbooks.
+
+Every case runs in a fresh process so its peak RSS is its own (on windows
+read through psutil, n/a if it is not installed). Cases:
+
+  iter_readers        open every workbook with xlrd
+  get_summary_data    xlrd get_summary_data, excluding opening the workbook
+  stream_summary_data extract_stream, the default reader
+  required_cells      required_cell_names_from_titles, cold then memoized
+  output_write        write N rows with the xlsx writer, no input files
+  summarize_dir       end to end, without the extraction cache
+
+usage: bench_summarize.py [--counts 10,100,1000,5000] [--cases ...] [--json out.json]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, SUPPRESS
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+CASES = ['iter_readers', 'get_summary_data', 'stream_summary_data', 'required_cells', 'output_write', 'summarize_dir']
+
+
+def peak_rss_mb():
+    """
+    :return: peak resident set size of this process in MB, or None if it cannot be told
+    """
+    try:
+        import resource
+    except ImportError:
+        # windows: the peak working set, through psutil
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    # linux reports kilobytes, macos bytes
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20
+
+
+def count_dir(workdir, count):
+    """
+    A directory holding exactly the first <count> workbooks of <workdir>, as links
+    """
+    d = os.path.join(workdir, f'first_{count}')
+    if not os.path.exists(d):
+        os.makedirs(d)
+        for name in sorted(x for x in os.listdir(workdir) if x.endswith('.xlsx'))[:count]:
+            os.link(os.path.join(workdir, name), os.path.join(d, name))
+    return d
+
+
+def run_case(case, d, count, jobs):
+    """
+    :return: seconds spent in the measured part
+    """
+    import summarize
+    filenames = summarize.read_xlsx(d)
+    if case == 'iter_readers':
+        start = time.perf_counter()
+        for filename, reader in summarize.iter_readers(filenames):
+            pass
+        return time.perf_counter() - start
+    if case == 'get_summary_data':
+        total = 0
+        for filename, reader in summarize.iter_readers(filenames):
+            start = time.perf_counter()
+            summarize.get_summary_data(reader)
+            total += time.perf_counter() - start
+        return total
+    if case == 'stream_summary_data':
+        from summarize.core import extract_stream
+        start = time.perf_counter()
+        for filename in filenames:
+            extract_stream(filename)
+        return time.perf_counter() - start
+    if case == 'required_cells':
+        from summarize import formulas
+        titles = summarize.Config(d).half_cycle_fields
+        start = time.perf_counter()
+        for i in range(count): # the first call builds the graph, the rest are memoized
+            formulas.required_cell_names_from_titles(titles)
+        return time.perf_counter() - start
+    if case == 'output_write':
+        from summarize.writers import XlsxWriter, Column, Formula
+        fields = summarize.Config(d).half_cycle_fields
+        columns = ([Column(None, None, 'file'), Column(None, 'Pump Head [m]', 'parameter')]
+                   + [Column(direction, title, 'field') for direction in ['down', 'up', 'all'] for title in fields])
+        with tempfile.TemporaryDirectory() as output_path:
+            start = time.perf_counter()
+            writer = XlsxWriter(os.path.join(output_path, 'summary.xlsx'))
+            writer.open(columns)
+            for i in range(count):
+                writer.write_row([f'run_{i:05}.xlsx', 10.0] + [Formula(f'=B{i + 3}*2', 20.0) if j % 2 else float(j)
+                                                                for j in range(len(columns) - 2)])
+            writer.close()
+            return time.perf_counter() - start
+    if case == 'summarize_dir':
+        config = summarize.Config(d)
+        config.cache = False
+        config.jobs = jobs
+        with tempfile.TemporaryDirectory() as output_path:
+            start = time.perf_counter()
+            summarize.summarize_files(filenames, output_path, config)
+            return time.perf_counter() - start
+    raise ValueError(f'unknown case {case}')
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--counts', default='10,100,1000,5000')
+    parser.add_argument('--cases', default=','.join(CASES), help=f'comma separated out of {",".join(CASES)}')
+    parser.add_argument('--rows', type=int, default=2000, help='half cycle rows per file')
+    parser.add_argument('--fields', type=int, default=10, help='half cycle fields per file')
+    parser.add_argument('--jobs', type=int, default=1, help='jobs for summarize_dir')
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'summarize-bench'),
+                        help='where the generated workbooks are kept between runs')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--child', nargs=3, help=SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        case, d, count = args.child
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull # summarize is chatty
+            try:
+                seconds = run_case(case, d, int(count), args.jobs)
+            finally:
+                sys.stdout = stdout
+        print(json.dumps(dict(seconds=seconds, peak_rss_mb=peak_rss_mb())))
+        return
+
+    from make_workbooks import make_workbooks
+    counts = [int(x) for x in args.counts.split(',')]
+    workdir = os.path.join(args.workdir, f'rows{args.rows}_fields{args.fields}')
+    print(f"generating {max(counts)} workbooks in {workdir}")
+    make_workbooks(workdir, files=max(counts), rows=args.rows, fields=args.fields)
+
+    results = []
+    print(f"{'case':<20} {'files':>6} {'seconds':>10} {'files/s':>10} {'peak RSS [MB]':>14}")
+    for case in args.cases.split(','):
+        for count in counts:
+            cmd = [sys.executable, __file__, '--child', case, count_dir(workdir, count), str(count), '--jobs', str(args.jobs)]
+            out = subprocess.run(cmd, stdout=subprocess.PIPE, universal_newlines=True, check=True).stdout
+            result = dict(json.loads(out.strip().splitlines()[-1]), case=case, files=count)
+            results.append(result)
+            peak = 'n/a' if result['peak_rss_mb'] is None else f"{result['peak_rss_mb']:.1f}"
+            print(f"{case:<20} {count:>6} {result['seconds']:>10.3f} {count / max(result['seconds'], 1e-9):>10.1f} {peak:>14}")
+    if args.json:
+        with open(args.json, 'w') as fd:
+            json.dump(dict(rows=args.rows, fields=args.fields, jobs=args.jobs, results=results), fd, indent=2)
+
+
+if __name__ == '__main__':
+    main()
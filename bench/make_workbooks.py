@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Generate synthetic post processor workbooks.
+
+Each workbook has a 'Parameters' sheet and a 'Half-Cycles' sheet laid out
+like the post processor's: the 'Half-Cycle Summary' block (titles, DOWN / UP
+/ ALL Averages) at the top, followed by one row per half cycle.
+
+usage: make_workbooks.py DIR [--files 100] [--rows 2000] [--fields 10]
+"""
+
+import os
+import random
+import sys
+from argparse import ArgumentParser
+
+import xlsxwriter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from summarize import (
+    PARAMETERS_SHEET_NAME,
+    HALF_CYCLES_SHEET_NAME,
+    HALF_CYCLE_SUMMARY_TEXT,
+    DIRECTION_TEXT,
+    DOWN_AVERAGES_TEXT,
+    UP_AVERAGES_TEXT,
+    ALL_AVERAGES_TEXT,
+)
+
+BASE_FIELDS = ['Average Velocity [m/s]', 'Flow Rate [LPM]', 'Cruising Velocity [m/s]', 'Cruising Flow Rate [LPM]',
+               'Cruising Power In [W]', 'Cruising Power Out [W]', 'Cruising Efficiency [%]']
+
+
+def field_titles(count):
+    return (BASE_FIELDS + [f'Field {i} [au]' for i in range(len(BASE_FIELDS), count)])[:count]
+
+
+def parameters(i, rng):
+    return [
+        ('Comm advance mode', rng.choice([0, 1, 2])),
+        ('Comm advance const delay up', round(rng.uniform(0, 1e-3), 6)),
+        ('Comm advance const delay down', round(rng.uniform(0, 1e-3), 6)),
+        ('Date', f'2017-{1 + i % 12:02}-{1 + i % 28:02}'),
+        ('Operator', rng.choice(['alon', 'guy', 'omer'])),
+        ('Pump Head [m]', rng.choice(['', 5, 10, 20])),
+    ]
+
+
+def make_workbook(filename, rows=2000, fields=10, seed=0):
+    """
+    :param filename: xlsx to write
+    :param rows: number of half cycle rows
+    :param fields: number of half cycle fields (columns)
+    :param seed: random seed, the same seed writes the same contents
+    """
+    rng = random.Random(seed)
+    titles = field_titles(fields)
+    workbook = xlsxwriter.Workbook(filename, {'constant_memory': True})
+    sheet = workbook.add_worksheet(PARAMETERS_SHEET_NAME)
+    for row, (key, value) in enumerate(parameters(seed, rng)):
+        sheet.write_row(row, 0, [key, value])
+    sheet = workbook.add_worksheet(HALF_CYCLES_SHEET_NAME)
+    half_cycles = [[rng.uniform(0, 100) for title in titles] for i in range(rows)]
+    down = half_cycles[0::2] or [[0.0] * fields]
+    up = half_cycles[1::2] or [[0.0] * fields]
+
+    def averages(values):
+        return [sum(column) / len(column) for column in zip(*values)]
+
+    sheet.write(0, 0, HALF_CYCLE_SUMMARY_TEXT)
+    sheet.write_row(1, 1, [DIRECTION_TEXT] + titles)
+    sheet.write_row(2, 1, [DOWN_AVERAGES_TEXT] + averages(down))
+    sheet.write_row(3, 1, [UP_AVERAGES_TEXT] + averages(up))
+    sheet.write_row(4, 1, [ALL_AVERAGES_TEXT] + averages(down + up))
+    sheet.write_row(6, 0, ['Half-Cycle', DIRECTION_TEXT] + titles)
+    for i, values in enumerate(half_cycles):
+        sheet.write_row(7 + i, 0, [i, 'DOWN' if i % 2 == 0 else 'UP'] + values)
+    workbook.close()
+
+
+def make_workbooks(d, files=100, rows=2000, fields=10):
+    """
+    Write <files> workbooks to directory <d>, skipping ones already there
+    :return: [filename]
+    """
+    os.makedirs(d, exist_ok=True)
+    filenames = []
+    for i in range(files):
+        filename = os.path.join(d, f'run_{i:05}.xlsx')
+        if not os.path.exists(filename):
+            make_workbook(filename, rows=rows, fields=fields, seed=i)
+        filenames.append(filename)
+    return filenames
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('dir')
+    parser.add_argument('--files', type=int, default=100)
+    parser.add_argument('--rows', type=int, default=2000, help='half cycle rows per file')
+    parser.add_argument('--fields', type=int, default=10, help='half cycle fields per file')
+    args = parser.parse_args()
+    make_workbooks(args.dir, files=args.files, rows=args.rows, fields=args.fields)
+
+
+if __name__ == '__main__':
+    main()
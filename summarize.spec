@@ -4,8 +4,8 @@ from os import path
 
 block_cipher = None
 
-a = Analysis([path.join('summarize', '__init__.py')],
-             #pathex=['.'],
+a = Analysis([path.join('summarize', '__main__.py')],
+             pathex=['.'],
              binaries=[],
              datas=[],
              hiddenimports=[],
@@ -0,0 +1,8 @@
+from multiprocessing import freeze_support
+
+from summarize import main
+
+
+if __name__ == '__main__':
+    freeze_support() # worker processes of frozen (pyinstaller) executables
+    main()
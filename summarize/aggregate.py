@@ -0,0 +1,116 @@
+"""
+Statistics of the half cycle fields across runs, per group of runs.
+
+Runs (summary rows) are grouped by the values of some of their parameter
+columns, i.e. 'Comm advance mode', and every half cycle field column (one per
+field and direction) gets its statistics computed per group. Rows are only
+collected while the summary is written, as the float matrix of their fields
+taken from the run store plus a group index per row; the statistics are then
+computed for all groups and columns at once by sorting the rows by group and
+reducing each run of a group with numpy, so 10k+ runs cost milliseconds.
+"""
+
+from array import array
+
+import numpy as np
+
+from .writers import Column, plain_value
+
+AGGREGATES_NAME = 'Aggregates'
+FILES_TITLE = 'Files'
+
+STATISTICS = ['count', 'mean', 'std', 'min', 'max']
+
+
+def sort_key(value):
+    # numbers before text, empty cells with the text
+    return (0, value, '') if isinstance(value, (int, float)) else (1, 0, '' if value is None else str(value))
+
+
+class Aggregator:
+    """
+    :param columns: the summary columns, [Column]
+    :param group_by: titles of the 'parameter' or 'user' columns to group by,
+     [] for a single group of all rows
+    :param statistics: subset of STATISTICS
+    :raises ValueError: for an unknown statistic or group_by title
+    """
+    def __init__(self, columns, group_by, statistics=STATISTICS):
+        unknown = [x for x in statistics if x not in STATISTICS]
+        if unknown:
+            raise ValueError(f"unknown statistics {', '.join(unknown)}, choose from {', '.join(STATISTICS)}")
+        titles = {column.title: i for i, column in reversed(list(enumerate(columns))) if column.kind in ('parameter', 'user')}
+        unknown = [x for x in group_by if x not in titles]
+        if unknown:
+            raise ValueError(f"cannot group by {', '.join(unknown)}, not a parameter column")
+        self.columns = columns
+        self.group_by = group_by
+        self.statistics = statistics
+        self.key_indices = [titles[x] for x in group_by]
+        self.field_indices = [i for i, column in enumerate(columns) if column.kind == 'field']
+        self.groups = {} # key -> group index, in order of appearance
+        self.group_of_row = array('l')
+        self.values = array('d') # row major, len(field_indices) per row
+
+    def add_rows(self, rows, values):
+        """
+        :param rows: summary rows, as given to the writers, for their group by values
+        :param values: float numpy array of shape (len(rows), field columns),
+         nan where a field has no number, i.e. RunStore.field_matrix
+        """
+        for data in rows:
+            key = tuple(plain_value(data[i]) for i in self.key_indices)
+            self.group_of_row.append(self.groups.setdefault(key, len(self.groups)))
+        self.values.frombytes(np.ascontiguousarray(values, dtype=float).tobytes())
+
+    def compute(self):
+        """
+        :return: dict(statistic -> numpy array of shape (groups, fields)), files
+         per group; std is the sample standard deviation (excel's STDEV), a
+         statistic with no values is nan
+        """
+        n_groups, n_fields = len(self.groups), len(self.field_indices)
+        if n_groups == 0:
+            return {name: np.zeros((0, n_fields)) for name in self.statistics}, np.zeros(0, dtype=int)
+        groups = np.frombuffer(self.group_of_row, dtype=self.group_of_row.typecode)
+        values = np.frombuffer(self.values, dtype=float).reshape(len(groups), n_fields)
+        # rows sorted by group, every group has rows so the n-th run is group n
+        order = np.argsort(groups, kind='stable')
+        values = values[order]
+        starts = np.flatnonzero(np.r_[True, np.diff(groups[order]) != 0])
+        files = np.diff(np.r_[starts, len(values)])
+        present = ~np.isnan(values)
+        count = np.add.reduceat(present.astype(float), starts, axis=0)
+        with np.errstate(all='ignore'):
+            mean = np.add.reduceat(np.where(present, values, 0.0), starts, axis=0) / count
+            # second pass over the deviations, summing squares directly loses precision
+            deviations = np.where(present, values - np.repeat(mean, files, axis=0), 0.0)
+            variance = np.add.reduceat(deviations * deviations, starts, axis=0) / (count - 1)
+        ret = dict(
+            count=count,
+            mean=mean,
+            std=np.where(count > 1, np.sqrt(variance), np.nan),
+            min=np.fmin.reduceat(values, starts, axis=0),
+            max=np.fmax.reduceat(values, starts, axis=0),
+        )
+        return {name: ret[name] for name in self.statistics}, files
+
+    def table(self):
+        """
+        :return: columns, rows of the aggregates table: the group by values,
+         the number of files, then per field column its statistics; groups
+         are sorted by their values
+        """
+        columns = ([Column(None, title, 'parameter') for title in self.group_by] + [Column(None, FILES_TITLE, 'parameter')]
+                   + [Column(self.columns[i].group, f'{name} {self.columns[i].title}', 'field')
+                      for i in self.field_indices for name in self.statistics])
+        stats, files = self.compute()
+        rows = []
+        for key, g in sorted(self.groups.items(), key=lambda item: [sort_key(x) for x in item[0]]):
+            row = list(key) + [int(files[g])]
+            for f in range(len(self.field_indices)):
+                for name in self.statistics:
+                    value = stats[name][g, f]
+                    row.append(float(value) if np.isfinite(value) else None)
+            rows.append(row)
+        return columns, rows
@@ -0,0 +1,72 @@
+"""
+Reading post processor workbooks straight out of zip and tar archives.
+
+Archived campaigns are summarized without extracting them to disk: each
+member workbook is read into memory and parsed from there (see
+extract_prefetched). A zip is read with random access through its central
+directory, its members in name order; a tar, possibly compressed, is read in
+a single sequential pass in archive order. A member is named by the archive
+path joined with its path inside the archive, so its row is named after it.
+"""
+
+import os
+
+ZIP_SUFFIXES = ['.zip']
+TAR_SUFFIXES = ['.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz']
+
+
+def archive_suffix(path):
+    """
+    :return: the archive suffix of <path>, i.e. '.tar.gz', or None if it is not an archive name
+    """
+    lower = path.lower()
+    for suffix in ZIP_SUFFIXES + TAR_SUFFIXES:
+        if lower.endswith(suffix):
+            return suffix
+    return None
+
+
+def is_archive(path):
+    return archive_suffix(path) is not None and os.path.isfile(path)
+
+
+def archive_stem(path):
+    """
+    The archive's file name without its suffix, i.e. '/runs/june.tar.gz' => 'june'
+    """
+    name = os.path.basename(path)
+    return name[:len(name) - len(archive_suffix(name) or '')]
+
+
+def _zip_names(zf, accept):
+    return sorted(info.filename for info in zf.infolist() if not info.is_dir() and accept(info.filename.rsplit('/', 1)[-1]))
+
+
+def zip_members(path, accept):
+    """
+    :param accept: member base name -> whether to read it
+    :return: [member filename] of the accepted members of zip <path>, sorted
+    """
+    import zipfile
+    with zipfile.ZipFile(path) as zf:
+        return [os.path.join(path, name) for name in _zip_names(zf, accept)]
+
+
+def iter_members(path, accept):
+    """
+    Generate (member filename, contents, None) for the accepted members of
+    archive <path>: for a zip in name order, for a tar in archive order
+    :param accept: member base name -> whether to read it
+    """
+    if archive_suffix(path) in ZIP_SUFFIXES:
+        import zipfile
+        with zipfile.ZipFile(path) as zf:
+            for name in _zip_names(zf, accept):
+                yield os.path.join(path, name), zf.read(name), None
+        return
+    import tarfile
+    # 'r|*' streams: no seeking back, any compression
+    with tarfile.open(path, 'r|*') as tf:
+        for member in tf:
+            if member.isfile() and accept(member.name.rsplit('/', 1)[-1]):
+                yield os.path.join(path, member.name), tf.extractfile(member).read(), None
@@ -0,0 +1,136 @@
+"""
+Persistent per file cache of extraction results (the parameters and summary
+payload the summary is built from), kept in a sqlite file next to the
+summarized files.
+
+An entry is valid as long as the file has the same size and mtime. If only
+the mtime changed (copied or touched files) the content hash decides, so a
+file is never parsed twice for the same contents.
+
+It also keeps whether each xlsx is a post processor output at all, valid for
+the same size and mtime, so other workbooks are not even classified twice.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+CACHE_VERSION = 2
+
+# entries not used for this long are evicted, as are the least recently used
+# ones beyond MAX_ENTRIES
+MAX_AGE_DAYS = 30
+MAX_ENTRIES = 100000
+
+
+def file_hash(filename, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(filename, 'rb') as fd:
+        for chunk in iter(lambda: fd.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def dumps(payload):
+    """
+    json for an extract() payload. parameters keys are cell values, not
+    necessarily strings, so they are stored as pairs.
+    """
+    if payload is None:
+        return json.dumps(None)
+    return json.dumps(dict(payload, parameters=list(payload['parameters'].items())))
+
+
+def loads(text):
+    payload = json.loads(text)
+    if payload is None:
+        return None
+    return dict(payload, parameters=dict(payload['parameters']))
+
+
+class ExtractionCache:
+    def __init__(self, filename):
+        self.filename = filename
+        self.db = sqlite3.connect(filename, timeout=30)
+        self.db.execute('create table if not exists meta (key text primary key, value text)')
+        version = self.db.execute("select value from meta where key = 'version'").fetchone()
+        if version is None or int(version[0]) != CACHE_VERSION:
+            self.db.execute('drop table if exists files')
+            self.db.execute("insert or replace into meta values ('version', ?)", (str(CACHE_VERSION),))
+        self.db.execute('''create table if not exists files (
+            path text primary key, size integer, mtime_ns integer, hash text, payload text, used real)''')
+        # whether each xlsx is a post processor output at all, see core.classify
+        self.db.execute('''create table if not exists verdicts (
+            path text primary key, size integer, mtime_ns integer, verdict integer, used real)''')
+        self.db.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def lookup(self, path):
+        """
+        :return: (found, payload) - payload may be None for a cached verdict
+         that the file is not a post processor output
+        """
+        path = os.path.abspath(path)
+        row = self.db.execute('select size, mtime_ns, hash, payload from files where path = ?', (path,)).fetchone()
+        try:
+            st = os.stat(path)
+        except OSError:
+            row = None
+        if row is None or row[0] != st.st_size or (row[1] != st.st_mtime_ns and row[2] != file_hash(path)):
+            self.misses += 1
+            return False, None
+        self.db.execute('update files set mtime_ns = ?, used = ? where path = ?', (st.st_mtime_ns, time.time(), path))
+        self.hits += 1
+        return True, loads(row[3])
+
+    def store(self, path, payload, digest=None):
+        """
+        :param digest: file_hash of the file, computed from the contents it was
+         extracted from (see core.extract_with_stats); only if it is not given
+         is the file read again here to hash it
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        self.db.execute('insert or replace into files values (?, ?, ?, ?, ?, ?)',
+                        (path, st.st_size, st.st_mtime_ns, digest or file_hash(path), dumps(payload), time.time()))
+
+    def lookup_verdict(self, path):
+        """
+        :return: the stored verdict, or None if there is none for the file as it is now
+        """
+        path = os.path.abspath(path)
+        row = self.db.execute('select size, mtime_ns, verdict from verdicts where path = ?', (path,)).fetchone()
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if row is None or (row[0], row[1]) != (st.st_size, st.st_mtime_ns):
+            return None
+        self.db.execute('update verdicts set used = ? where path = ?', (time.time(), path))
+        return bool(row[2])
+
+    def store_verdict(self, path, verdict):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        self.db.execute('insert or replace into verdicts values (?, ?, ?, ?, ?)',
+                        (path, st.st_size, st.st_mtime_ns, int(verdict), time.time()))
+
+    def evict(self, max_age_days=MAX_AGE_DAYS, max_entries=MAX_ENTRIES):
+        self.db.execute('delete from files where used < ?', (time.time() - max_age_days * 24 * 3600,))
+        self.db.execute('delete from verdicts where used < ?', (time.time() - max_age_days * 24 * 3600,))
+        self.db.execute('delete from files where path not in (select path from files order by used desc limit ?)',
+                        (max_entries,))
+
+    def close(self):
+        self.evict()
+        self.db.commit()
+        self.db.close()
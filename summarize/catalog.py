@@ -0,0 +1,224 @@
+"""
+Catalog of runs by their parameters, for summarizing only some of them.
+
+The catalog is a sqlite file next to the runs holding, for every file, the
+values of its Parameters sheet as rows of (file, parameter, value) indexed by
+parameter and value. It is brought up to date incrementally: only files that
+are new or changed (size, mtime) since they were cataloged have their
+Parameters sheet read. A filter expression then picks the matching files with
+a single query, before any of them is opened for its summary.
+
+A filter compares parameters, in double quotes (or bare if a single word),
+to numbers or to text in single quotes, combined with and, or, not and
+parentheses:
+
+    "Comm advance mode" = 2 and ("Date" >= '2020-01-01' or not Operator = 'alon')
+
+The comparisons are =, !=, <>, <, <=, >, >=. A file without the parameter
+matches no comparison on it. Numbers compare as numbers and text as text,
+any number being less than any text.
+"""
+
+import os
+import re
+import sqlite3
+
+CATALOG_VERSION = 1
+
+TOKEN_RE = re.compile(r'''
+    \s*(?:
+      (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    | (?P<text>'(?:[^']|'')*')
+    | (?P<quoted>"(?:[^"]|"")*")
+    | (?P<word>[A-Za-z_]\w*)
+    | (?P<op><>|!=|<=|>=|[=<>()])
+    )''', re.VERBOSE)
+
+COMPARISONS = {'=': '=', '!=': '!=', '<>': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+
+KEYWORDS = ['and', 'or', 'not']
+
+
+class FilterError(ValueError):
+    pass
+
+
+class _Parser:
+    """
+    Recursive descent parser from a filter expression to an sql condition on
+    files.path and its parameters
+    """
+    def __init__(self, text):
+        self.tokens = []
+        pos = 0
+        text = text.strip()
+        while pos < len(text):
+            m = TOKEN_RE.match(text, pos)
+            if m is None:
+                raise FilterError(f'cannot parse {text[pos:]!r}')
+            kind = m.lastgroup
+            value = m.group(kind)
+            if kind == 'word' and value.lower() in KEYWORDS:
+                kind, value = 'keyword', value.lower()
+            self.tokens.append((kind, value))
+            pos = m.end()
+        self.i = 0
+        self.params = []
+
+    def peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or (kind is not None and token[0] != kind) or (value is not None and token[1] != value):
+            raise FilterError(f'expected {value or kind or "more"}, found {token[1] or "the end"}')
+        self.i += 1
+        return token
+
+    def parse(self):
+        if len(self.tokens) == 0:
+            raise FilterError('empty filter')
+        ret = self.disjunction()
+        if self.peek()[0] is not None:
+            raise FilterError(f'unexpected {self.peek()[1]!r}')
+        return ret
+
+    def disjunction(self):
+        ret = self.conjunction()
+        while self.peek() == ('keyword', 'or'):
+            self.take()
+            ret = f'({ret} or {self.conjunction()})'
+        return ret
+
+    def conjunction(self):
+        ret = self.negation()
+        while self.peek() == ('keyword', 'and'):
+            self.take()
+            ret = f'({ret} and {self.negation()})'
+        return ret
+
+    def negation(self):
+        if self.peek() == ('keyword', 'not'):
+            self.take()
+            return f'(not {self.negation()})'
+        if self.peek() == ('op', '('):
+            self.take()
+            ret = self.disjunction()
+            self.take('op', ')')
+            return ret
+        return self.comparison()
+
+    def comparison(self):
+        kind, name = self.take()
+        if kind == 'quoted':
+            name = name[1:-1].replace('""', '"')
+        elif kind != 'word':
+            raise FilterError(f'expected a parameter, found {name!r}')
+        kind, op = self.take('op')
+        if op not in COMPARISONS:
+            raise FilterError(f'expected a comparison after {name!r}, found {op!r}')
+        kind, value = self.take()
+        if kind == 'number':
+            value = float(value)
+        elif kind == 'text':
+            value = value[1:-1].replace("''", "'")
+        else:
+            raise FilterError(f'expected a number or \'text\' to compare {name!r} to, found {value!r}')
+        self.params += [name, value]
+        return f'files.path in (select path from parameters where name = ? and value {COMPARISONS[op]} ?)'
+
+
+def parse_filter(text):
+    """
+    :return: (sql condition on files.path, [parameter])
+    :raises FilterError:
+    """
+    parser = _Parser(text)
+    condition = parser.parse()
+    return condition, parser.params
+
+
+class Catalog:
+    def __init__(self, filename):
+        self.filename = filename
+        self.db = sqlite3.connect(filename, timeout=30)
+        self.db.execute('create table if not exists meta (key text primary key, value text)')
+        version = self.db.execute("select value from meta where key = 'version'").fetchone()
+        if version is None or int(version[0]) != CATALOG_VERSION:
+            self.db.execute('drop table if exists files')
+            self.db.execute('drop table if exists parameters')
+            self.db.execute("insert or replace into meta values ('version', ?)", (str(CATALOG_VERSION),))
+        # post_processor is 0 for xlsx files that are not post processor outputs
+        self.db.execute('create table if not exists files (path text primary key, size integer, mtime_ns integer, post_processor integer)')
+        self.db.execute('create table if not exists parameters (path text, name, value)')
+        self.db.execute('create index if not exists parameters_by_value on parameters (name, value)')
+        self.db.execute('create index if not exists parameters_by_path on parameters (path)')
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def update(self, filenames, read, jobs=1):
+        """
+        Catalog the files among <filenames> that are new or changed, and forget
+        cataloged files that no longer exist
+        :param read: filename -> its parameters dict, or None if it is not a post processor output
+        :param jobs: worker processes reading files
+        :return: number of files read
+        """
+        known = dict(((path, (size, mtime_ns)) for path, size, mtime_ns in self.db.execute('select path, size, mtime_ns from files')))
+        todo = []
+        unreadable = []
+        for filename in filenames:
+            path = os.path.abspath(filename)
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                # i.e. removed since it was listed: like a file that cannot be read, it matches no filter
+                print(f"{filename}: {type(e).__name__}: {e}, not cataloged")
+                known.pop(path, None)
+                unreadable.append((path,))
+                continue
+            if known.pop(path, None) != (st.st_size, st.st_mtime_ns):
+                todo.append((path, st))
+        gone = unreadable + [(path,) for path in known if not os.path.exists(path)]
+        self.db.executemany('delete from files where path = ?', gone)
+        self.db.executemany('delete from parameters where path = ?', gone)
+        import multiprocessing
+        # a daemonic process (i.e. a batch worker) cannot have worker processes
+        jobs = 1 if multiprocessing.current_process().daemon else min(jobs, len(todo))
+        if jobs > 1:
+            from multiprocessing import Pool
+        pool = Pool(processes=jobs) if jobs > 1 else None
+        try:
+            paths = [path for path, st in todo]
+            for (path, st), parameters in zip(todo, pool.imap(read, paths) if pool else map(read, paths)):
+                self.db.execute('delete from parameters where path = ?', (path,))
+                self.db.execute('insert or replace into files values (?, ?, ?, ?)',
+                                (path, st.st_size, st.st_mtime_ns, int(parameters is not None)))
+                self.db.executemany('insert into parameters values (?, ?, ?)',
+                                    [(path, name, value) for name, value in (parameters or {}).items()
+                                     if name not in (None, '') and isinstance(value, (str, int, float))])
+        finally:
+            if pool:
+                pool.terminate()
+        self.db.commit()
+        return len(todo)
+
+    def select(self, expression, filenames):
+        """
+        :param expression: a filter expression
+        :param filenames: cataloged files to choose from
+        :return: the post processor files among <filenames> matching <expression>, sorted
+        :raises FilterError:
+        """
+        condition, params = parse_filter(expression)
+        matching = {path for path, in self.db.execute(f'select path from files where post_processor = 1 and {condition}', params)}
+        return sorted(filename for filename in filenames if os.path.abspath(filename) in matching)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
@@ -0,0 +1,159 @@
+"""
+Command line entry point: the GUI without arguments, otherwise a console
+run over --dir, a batch of directories, a watch or the service.
+"""
+
+import os
+from argparse import ArgumentParser
+
+from .core import (
+    READERS,
+    CACHE_FILENAME,
+    ROLLUP_FILENAME,
+    FORMATS,
+    DETAIL_FORMATS,
+    Config,
+    Profile,
+    apply_overrides,
+    summarize_dir,
+    summarize_batch,
+    watch_dir,
+    find_run_dirs,
+    write_rollup,
+    start,
+    is_archive,
+)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--dir', action='append', help='directory, or zip or tar archive, to summarize; repeat for a batch of them')
+    parser.add_argument('--recursive', action='store_true', help='summarize every directory under --dir holding xlsx files, each into itself')
+    parser.add_argument('--parallel', type=int, default=1, help='with several directories, how many are summarized at once (default: 1), each read by --jobs workers of its own (by one process before python 3.9)')
+    parser.add_argument('--rollup', action='store_true', help=f'with several directories, also write {ROLLUP_FILENAME} of all their rows')
+    parser.add_argument('--jobs', type=int, help='number of worker processes reading the files (default: [global] jobs from summary.ini, or 1)')
+    parser.add_argument('--reader', choices=READERS, help=f'how files are read (default: [global] reader from summary.ini, or {READERS[0]})')
+    parser.add_argument('--prefetch', type=int, metavar='MB', help='read up to MB megabytes of files ahead of their parsing, for files on a slow share, with --jobs 1 and no --timeout (default: [global] prefetch from summary.ini, or 0 - off)')
+    parser.add_argument('--timeout', type=float, metavar='SECONDS', help='give up on a file that takes longer to read, listing it in the Errors sheet (default: [global] timeout from summary.ini, or 0 - none)')
+    parser.add_argument('--no-cache', action='store_true', help=f'read every file again, ignoring and not updating {CACHE_FILENAME}')
+    parser.add_argument('--update', action='store_true', help='rewrite the latest summary in place, keeping hand entered columns')
+    parser.add_argument('--values-only', action='store_true', help='write computed numbers instead of formulas')
+    parser.add_argument('--format', help=f'comma separated output formats out of {",".join(FORMATS)}, the first is opened when done (default: [global] formats from summary.ini, or xlsx)')
+    parser.add_argument('--aggregate', action='store_true', help='add statistics of the half cycle fields across the files (default: from [aggregates] in summary.ini)')
+    parser.add_argument('--group-by', help='comma separated parameters to group the --aggregate statistics by (default: [aggregates] group_by)')
+    parser.add_argument('--filter', metavar='EXPR', help='summarize only the files whose parameters match, i.e. \'"Comm advance mode" = 2\' (default: [global] filter from summary.ini)')
+    parser.add_argument('--detail', nargs='?', const='csv', choices=DETAIL_FORMATS, help='also write every half cycle of every file in long format to summary_detail.csv, or .parquet (default: [global] detail from summary.ini, or off)')
+    parser.add_argument('--watch', action='store_true', help='keep the summary of --dir up to date as new files are written to it')
+    parser.add_argument('--profile', metavar='OUT.json', help='write phase timings, counters and the slowest files to OUT.json')
+    parser.add_argument('--cprofile', action='store_true', help='with --profile, also run under cProfile: top functions in the report, raw stats in OUT.prof')
+    parser.add_argument('--serve', action='store_true', help='run the headless summarize service, --parallel directories at once')
+    parser.add_argument('--host', default='127.0.0.1', help='address the service listens on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='port the service listens on (default: 8765)')
+    args = parser.parse_args()
+    if args.dir is None and not args.serve:
+        # gui mode
+        from .gui import start_gui
+        start_gui()
+        return
+
+    # console mode
+    overrides = {}
+    if args.jobs is not None:
+        overrides['jobs'] = args.jobs
+    if args.reader is not None:
+        overrides['reader'] = args.reader
+    if args.prefetch is not None:
+        overrides['prefetch'] = args.prefetch
+    if args.timeout is not None:
+        overrides['timeout'] = args.timeout
+    if args.no_cache:
+        overrides['cache'] = False
+    if args.update:
+        overrides['update'] = True
+    if args.values_only:
+        overrides['values_only'] = True
+    if args.format is not None:
+        overrides['formats'] = [x.strip() for x in args.format.split(',') if len(x.strip()) > 0]
+    if args.aggregate or args.group_by is not None:
+        overrides['aggregate'] = True
+    if args.group_by is not None:
+        overrides['aggregate_by'] = [x.strip() for x in args.group_by.split(',') if len(x.strip()) > 0]
+    if args.filter is not None:
+        overrides['filter'] = args.filter
+    if args.detail is not None:
+        overrides['detail'] = args.detail
+    if args.cprofile and args.profile is None:
+        parser.error("--cprofile needs --profile")
+    if args.serve:
+        if args.dir is not None:
+            parser.error("--serve takes directories from its requests, not --dir")
+        from .service import serve
+        serve(host=args.host, port=args.port, workers=args.parallel, defaults=overrides)
+        return
+    if args.recursive or len(args.dir) > 1:
+        if args.watch or args.profile is not None:
+            parser.error("--watch and --profile take a single --dir")
+        unknown = [x for x in overrides.get('formats', []) if x not in FORMATS]
+        if unknown:
+            parser.error(f"unknown format {', '.join(unknown)}, choose from {', '.join(FORMATS)}")
+        summarize_dirs(args.dir, overrides, recursive=args.recursive, parallel=args.parallel, rollup=args.rollup)
+        return
+    d = args.dir[0]
+    config = apply_overrides(Config(d), overrides)
+    unknown = [x for x in config.formats if x not in FORMATS]
+    if unknown:
+        parser.error(f"unknown format {', '.join(unknown)}, choose from {', '.join(FORMATS)}")
+    if config.detail is not None and config.detail not in DETAIL_FORMATS:
+        parser.error(f"unknown detail format {config.detail}, choose from {', '.join(DETAIL_FORMATS)}")
+    if args.watch:
+        if is_archive(d):
+            parser.error("--watch takes a directory, not an archive")
+        if args.profile is not None:
+            parser.error("--profile cannot be used with --watch")
+        try:
+            watch_dir(d, config)
+        except KeyboardInterrupt:
+            pass
+        return
+    profile = Profile(cprofile=args.cprofile)
+    output = summarize_dir(d, config, profile=profile)
+    if args.profile is not None:
+        profile.write(args.profile)
+        print(profile.summary())
+        print(f"wrote profile {args.profile}")
+    if not output:
+        return
+    print(f"wrote {output}")
+    start(output)
+
+
+def summarize_dirs(roots, overrides, recursive=False, parallel=1, rollup=False):
+    """
+    Console batch mode: summarize each of <roots>, or with <recursive> each
+    directory under them holding xlsx files, and print how each one went
+    """
+    if rollup:
+        # the roll-up is read from each directory's xlsx summary
+        root = os.path.commonpath([os.path.abspath(x) for x in roots])
+        formats = apply_overrides(Config(root), overrides).formats
+        if 'xlsx' not in formats:
+            print(f"--rollup needs the xlsx summaries, add xlsx to the formats ({','.join(formats)})")
+            raise SystemExit
+    dirs = find_run_dirs(roots) if recursive else sorted(set(roots))
+    print(f"summarizing {len(dirs)} directories, {parallel} at a time")
+
+    def report(result):
+        d, output, error, timings = result
+        if error is not None:
+            print(f"{d}: failed: {error}")
+        else:
+            print(f"{d}: {'wrote ' + output if output else 'no files found'} ({timings['wall']:.2f}s)")
+
+    results = summarize_batch([(d, None) for d in dirs], overrides=overrides, parallel=parallel, on_done=report,
+                              output_format='xlsx' if rollup else None)
+    failed = [d for d, output, error, timings in results if error is not None]
+    print(f"{len(results) - len(failed)} directories summarized, {len(failed)} failed")
+    if rollup:
+        outputs = [output for d, output, error, timings in results if output is not None]
+        for filename in write_rollup(root, outputs, formats=formats):
+            print(f"wrote {filename}")
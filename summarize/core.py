@@ -0,0 +1,1448 @@
+"""
+The summarize engine: reading post processor workbooks and writing their
+summary, single directories or batches of them. Nothing here needs Qt; the
+GUI is in gui.py and the command line in cli.py.
+
+Heavy modules (xlrd, xlsxwriter, numpy and emolog's formula tables) are only
+imported by the functions that use them, so importing the package, i.e. for
+--help or a library caller that only wants the constants, stays fast.
+"""
+
+import io
+import os
+import re
+import sys
+from collections import deque
+from functools import partial
+from itertools import chain, islice
+from math import isfinite, isinf
+from configparser import ConfigParser
+from urllib.parse import urlparse, unquote
+
+from .xlsx_stream import XlsxStream, sheet_names
+from .writers import FORMATS, SUMMARY_SHEET_NAME, Column, Formula, check_formats
+from .timing import Profile, timed
+from .progress import Progress, Cancelled
+from .archive import is_archive, archive_stem
+from .detail import DETAIL_FORMATS, write_detail, detail_filename
+
+VERSION = 0.1
+
+PARAMETERS_SHEET_NAME = 'Parameters'
+HALF_CYCLES_SHEET_NAME = 'Half-Cycles'
+
+DIRECTION_TEXT = 'Direction'
+DOWN_AVERAGES_TEXT = 'DOWN Averages'
+UP_AVERAGES_TEXT = 'UP Averages'
+ALL_AVERAGES_TEXT = 'ALL Averages'
+HALF_CYCLE_SUMMARY_TEXT = 'Half-Cycle Summary'
+
+# 'stream' reads just the needed rows straight from the xlsx zip, 'xlrd' parses
+# the whole workbook and is used as the fallback for files 'stream' cannot read
+READERS = ['stream', 'xlrd']
+
+CONFIG_FILENAME = 'summary.ini'
+CACHE_FILENAME = '.summary_cache.sqlite'
+CATALOG_FILENAME = '.summary_catalog.sqlite'
+OUTPUT_FILENAME = 'summary.xlsx'
+ROLLUP_FILENAME = 'summary_rollup.xlsx'
+
+# rows are rendered, and their formulas evaluated together, in chunks of this many
+EVALUATE_CHUNK_SIZE = 256
+
+# files queued per worker process at a time; for archive members also how
+# many are held in memory per worker
+IN_FLIGHT_PER_JOB = 4
+
+ERRORS_NAME = 'Errors'
+ERRORS_COLUMNS = [Column(None, 'File', 'file'), Column(None, 'Error', 'user')]
+
+
+class WorkbookError(Exception):
+    """
+    A workbook is not laid out like a post processor output
+    """
+
+MB = 1 << 20
+
+# threads classifying files at once, it is mostly waiting on the disk or share
+CLASSIFY_THREADS = 8
+
+
+def read_xlsx(d):
+    entries = [entry for entry in os.scandir(d) if entry.is_file() and entry.path.endswith('xlsx')]
+    filenames = list(sorted([entry.path for entry in entries]))
+    return filenames
+
+
+def iter_readers(orig_filenames, progress=None):
+    """
+    Generate (filename, xlrd reader) for the post processor files among
+    <orig_filenames>, sorted by filename, opening each one only when the
+    consumer asks for it
+    """
+    import xlrd
+    for i, filename in enumerate(sorted(orig_filenames)):
+        reader = xlrd.open_workbook(filename=filename)
+        if progress:
+            progress(i)
+        if HALF_CYCLES_SHEET_NAME in reader.sheet_names():
+            yield filename, reader
+
+
+def stream_or_xlrd(filename, from_stream, from_xlrd, reader='stream'):
+    """
+    from_stream() with the streaming reader, falling back to from_xlrd() for
+    a workbook the streaming reader cannot read: not a zip (i.e. an xls saved
+    as xlsx), or with a part missing or not xml. Any other error is raised.
+    :param reader: one of READERS, 'xlrd' to only call from_xlrd()
+    :return: what from_stream() or from_xlrd() returned
+    """
+    import zipfile
+    from xml.etree.ElementTree import ParseError
+    if reader == 'stream':
+        try:
+            return from_stream()
+        except (zipfile.BadZipFile, KeyError, ParseError) as e:
+            print(f"{filename}: cannot stream ({error_text(e)}), falling back to xlrd")
+    return from_xlrd()
+
+
+def extract(filename, reader='stream', stats=None, contents=None):
+    """
+    Open a single workbook and pull out everything the summary needs from it.
+    Runs inside the worker processes of iter_extracted, so only the small
+    parameters/summary payload is returned, never the workbook itself.
+    :param filename: xlsx path
+    :param reader: one of READERS
+    :param stats: dict to fill with the seconds of each FILE_PHASES entry, the
+     cells read and the reader used, or None
+    :param contents: the file's bytes if already read (prefetched), else it is opened by name
+    :return: dict(parameters=..., summary=...) or None if the file has no
+     'Half-Cycles' sheet, i.e. was not produced by the post processor
+    """
+    if stats is None:
+        stats = {}
+    return stream_or_xlrd(filename, partial(extract_stream, filename, stats, contents),
+                          partial(extract_xlrd, filename, stats, contents), reader)
+
+
+def extract_with_stats(filename, reader='stream', digest=False):
+    """
+    extract() for the worker processes of iter_extracted. A file that cannot
+    be read fails alone: its payload is None and stats['error'] says why.
+    :param digest: read the file once, both to extract it and to put the sha1
+     of its contents (as cache.file_hash) in stats['digest'], so the cache
+     does not read it again to hash it
+    :return: payload, stats
+    """
+    stats = {}
+    try:
+        contents = None
+        if digest:
+            from .prefetch import read_file
+            contents, stats['digest'] = read_file(filename, digest=True)
+        return extract(filename, reader=reader, stats=stats, contents=contents), stats
+    except Exception as e:
+        stats['error'] = error_text(e)
+        return None, stats
+
+
+def extract_prefetched(item, reader='stream'):
+    """
+    extract_with_stats() for a Prefetcher's (filename, contents, digest)
+    :return: payload, stats - with the bytes_read and the digest of the contents
+    """
+    filename, contents, digest = item
+    stats = dict(bytes_read=0 if contents is None else len(contents), digest=digest)
+    try:
+        return extract(filename, reader=reader, stats=stats, contents=contents), stats
+    except Exception as e:
+        stats['error'] = error_text(e)
+        return None, stats
+
+
+def error_text(e):
+    return f'{type(e).__name__}: {e}' if not isinstance(e, WorkbookError) else str(e)
+
+
+def extract_isolated(extract_one, items, jobs=1, timeout=None):
+    """
+    Generate (item, payload, stats) of extract_one(item) for each of <items>,
+    in order. With jobs > 1, or a timeout, the items are extracted in worker
+    processes, IN_FLIGHT_PER_JOB per worker queued at a time. An item taking
+    longer than <timeout> seconds (counted once the items before it are done)
+    fails with stats['error']: its pool is killed and replaced, and the items
+    queued behind it are given to the new pool, except those already done,
+    whose results are kept. In a daemonic process, which cannot have worker
+    processes, the items are extracted in process and the timeout is not kept.
+    """
+    import multiprocessing
+    if multiprocessing.current_process().daemon:
+        if timeout:
+            print(f"timeout of {timeout}s not kept, reading in a worker process")
+        jobs, timeout = 1, None
+    if jobs <= 1 and not timeout:
+        for item in items:
+            payload, stats = extract_one(item)
+            yield item, payload, stats
+        return
+    from multiprocessing import Pool, TimeoutError
+    items = iter(items)
+    pool = Pool(processes=jobs)
+    pending = deque() # (item, AsyncResult)
+    try:
+        while True:
+            for item in islice(items, jobs * IN_FLIGHT_PER_JOB - len(pending)):
+                pending.append((item, pool.apply_async(extract_one, (item,))))
+            if len(pending) == 0:
+                return
+            item, result = pending.popleft()
+            try:
+                payload, stats = result.get(timeout)
+            except TimeoutError:
+                pool.terminate()
+                pool = Pool(processes=jobs)
+                pending = deque((x, r if r.ready() else pool.apply_async(extract_one, (x,))) for x, r in pending)
+                payload, stats = None, dict(error=f'timed out after {timeout}s')
+            yield item, payload, stats
+    finally:
+        pool.terminate()
+
+
+def extract_xlrd(filename, stats, contents=None):
+    import xlrd
+    stats['reader'] = 'xlrd'
+    with timed(stats, 'open'):
+        reader = xlrd.open_workbook(filename=filename, file_contents=contents)
+        stats['cells_read'] = sum(sheet.nrows * sheet.ncols for sheet in reader.sheets())
+        if HALF_CYCLES_SHEET_NAME not in reader.sheet_names():
+            return None
+    with timed(stats, 'parameters'):
+        parameters = get_parameters(reader)
+    with timed(stats, 'summary'):
+        summary = get_summary_data(reader)
+    return dict(parameters=parameters, summary=summary)
+
+
+def extract_stream(filename, stats=None, contents=None):
+    if stats is None:
+        stats = {}
+    stats['reader'] = 'stream'
+    with XlsxStream(filename if contents is None else io.BytesIO(contents)) as book:
+        try:
+            with timed(stats, 'open'):
+                if HALF_CYCLES_SHEET_NAME not in book.sheet_names():
+                    return None
+            with timed(stats, 'parameters'):
+                parameters = stream_parameters(book)
+            with timed(stats, 'summary'):
+                summary = stream_summary_data(book)
+            return dict(parameters=parameters, summary=summary)
+        finally:
+            stats['cells_read'] = book.cells_read
+
+
+def read_parameters(filename):
+    """
+    Just the Parameters sheet of a workbook, for the run catalog
+    :return: dict(parameter -> value), or None if the file was not produced
+     by the post processor or cannot be read, so it matches no filter
+    """
+    def from_stream():
+        with XlsxStream(filename) as book:
+            if HALF_CYCLES_SHEET_NAME not in book.sheet_names():
+                return None
+            return stream_parameters(book)
+
+    def from_xlrd():
+        import xlrd
+        reader = xlrd.open_workbook(filename=filename)
+        if HALF_CYCLES_SHEET_NAME not in reader.sheet_names():
+            return None
+        return get_parameters(reader)
+    try:
+        return stream_or_xlrd(filename, from_stream, from_xlrd)
+    except Exception as e:
+        print(f"{filename}: {error_text(e)}, not cataloged")
+        return None
+
+
+def classify(filename):
+    """
+    Tell post processor outputs from other xlsx files (earlier summaries,
+    unrelated spreadsheets) by their sheet names alone
+    :return: True or False, or None if it cannot be told without reading all
+     of the file (i.e. not a zip), which is then left to extract
+    """
+    import zipfile
+    from xml.etree.ElementTree import ParseError
+    try:
+        return HALF_CYCLES_SHEET_NAME in sheet_names(filename)
+    except (zipfile.BadZipFile, KeyError, ParseError, OSError):
+        return None
+
+
+def classify_files(filenames, cache=None, threads=CLASSIFY_THREADS):
+    """
+    Drop the files that are certainly not post processor outputs, looking up
+    the verdicts in <cache> and classifying the rest in <threads> threads
+    :param cache: ExtractionCache to keep the verdicts in, or None
+    :return: the files among <filenames> that may be post processor outputs, in order
+    """
+    verdicts = {}
+    if cache is not None:
+        for filename in filenames:
+            verdict = cache.lookup_verdict(filename)
+            if verdict is not None:
+                verdicts[filename] = verdict
+    todo = [filename for filename in filenames if filename not in verdicts]
+    if len(todo) > 0:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(threads, len(todo))) as executor:
+            for filename, verdict in zip(todo, executor.map(classify, todo)):
+                verdicts[filename] = verdict
+                if cache is not None and verdict is not None:
+                    cache.store_verdict(filename, verdict)
+    return [filename for filename in filenames if verdicts[filename] is not False]
+
+
+def select_runs(filenames, output_path, config):
+    """
+    The <filenames> whose parameters match config.filter, looked up in the run
+    catalog in <output_path> after cataloging the files new to it
+    """
+    from .catalog import Catalog, FilterError
+    with Catalog(os.path.join(output_path, CATALOG_FILENAME)) as catalog:
+        read = catalog.update(filenames, read_parameters, jobs=config.jobs)
+        try:
+            selected = catalog.select(config.filter, filenames)
+        except FilterError as e:
+            print(f"filter {config.filter!r}: {e}")
+            raise SystemExit
+    print(f"catalog: {read} files read, {len(selected)} of {len(filenames)} files match {config.filter!r}")
+    return selected
+
+
+def iter_extracted(orig_filenames, jobs=1, reader='stream', cache=None, progress=None, profile=None,
+                   prefetch=0, prefetch_threads=None, timeout=None, errors=None):
+    """
+    Generate (filename, payload) for the post processor files among
+    <orig_filenames> sorted by filename, extract()ing them one at a time as
+    the consumer asks for them, so no workbook outlives its extraction. With
+    jobs > 1 worker processes extract ahead of the consumer; the result is
+    identical to the serial path.
+    :param orig_filenames: [filename]
+    :param jobs: number of worker processes, 1 for in process
+    :param reader: one of READERS
+    :param cache: ExtractionCache or None; only files missing from it are read
+    :param progress: called with the number of files done so far
+    :param profile: Profile timing the 'cache' and 'extract' phases and each file, or None
+    :param prefetch: bytes of files to read ahead of their extraction, 0 to
+     have each file read as it is extracted; only when extracting in process,
+     worker processes (jobs > 1 or a timeout) read their files themselves
+    :param prefetch_threads: files read ahead at once, None for the default
+    :param timeout: seconds a file may take, None for no limit; see extract_isolated
+    :param errors: list to append (filename, reason) to for each file that
+     failed, is skipped and not cached, so it is read again next time
+    """
+    if profile is None:
+        profile = Profile()
+    orig_filenames = sorted(orig_filenames)
+    cached = {}
+    if cache is not None:
+        with profile.phase('cache'):
+            for filename in orig_filenames:
+                found, payload = cache.lookup(filename)
+                if found:
+                    cached[filename] = payload
+    todo = [filename for filename in orig_filenames if filename not in cached]
+    if cache is not None:
+        print(f"cache: {len(cached)} files cached, {len(todo)} to read")
+    jobs = max(1, min(jobs, len(todo)))
+    if prefetch > 0 and (jobs > 1 or timeout):
+        # the contents would be pickled over to the workers, which read in parallel anyway
+        print("prefetch not used, the files are read by worker processes")
+        prefetch = 0
+    prefetcher = None
+    if prefetch > 0 and len(todo) > 0:
+        from .prefetch import Prefetcher, DEFAULT_THREADS
+        prefetcher = Prefetcher(todo, budget=prefetch, threads=prefetch_threads or DEFAULT_THREADS, digest=cache is not None)
+        extract_one, todo = partial(extract_prefetched, reader=reader), prefetcher
+    else:
+        extract_one = partial(extract_with_stats, reader=reader, digest=cache is not None)
+    extracted = extract_isolated(extract_one, todo, jobs=jobs, timeout=timeout)
+    try:
+        for i, filename in enumerate(orig_filenames):
+            failed = False
+            if filename in cached:
+                payload = cached.pop(filename)
+                profile.add_file(filename, dict(cached=True))
+            else:
+                with profile.phase('extract'):
+                    item, payload, stats = next(extracted)
+                digest = stats.pop('digest', None)
+                failed = 'error' in stats
+                if failed:
+                    file_failed(filename, stats['error'], errors, profile)
+                else:
+                    profile.add_file(filename, stats)
+                    if cache is not None:
+                        with profile.phase('cache'):
+                            cache.store(filename, payload, digest=digest)
+            if progress:
+                progress(i)
+            if payload is not None:
+                yield filename, payload
+            elif not failed:
+                profile.count('files_skipped')
+    finally:
+        extracted.close()
+        if prefetcher is not None:
+            prefetcher.close()
+
+
+def iter_extracted_members(archive, jobs=1, reader='stream', progress=None, profile=None, timeout=None, errors=None):
+    """
+    iter_extracted for the workbooks in the zip or tar <archive>, read
+    straight out of it in the order archive.iter_members reads them
+    """
+    from .archive import iter_members
+    if profile is None:
+        profile = Profile()
+    members = iter_members(archive, accept=is_source_filename)
+    extracted = extract_isolated(partial(extract_prefetched, reader=reader), members, jobs=jobs, timeout=timeout)
+    try:
+        for i, ((filename, contents, digest), payload, stats) in enumerate(extracted):
+            stats.pop('digest', None)
+            if 'error' in stats:
+                file_failed(filename, stats['error'], errors, profile)
+            else:
+                profile.add_file(filename, stats)
+            if progress:
+                progress(i)
+            if payload is not None:
+                yield filename, payload
+            elif 'error' not in stats:
+                profile.count('files_skipped')
+    finally:
+        extracted.close()
+        members.close()
+
+
+def file_failed(filename, reason, errors, profile):
+    print(f"{filename}: {reason}, skipped")
+    profile.count('files_failed')
+    if errors is not None:
+        errors.append((filename, reason))
+
+
+def verify_cell_at(sheet, row, col, contents):
+    value = sheet.cell(rowx=row, colx=col).value
+    if value != contents:
+        raise WorkbookError(f"expected sheet {sheet.name}[{row},{col}] to be {contents} but found {value}")
+
+
+def find_row(sheet, col, text, max_row=200):
+    for i in range(min(max_row, sheet.nrows)):
+        if sheet.cell(rowx=i, colx=col).value == text:
+            return i
+    raise WorkbookError(f"{sheet.name}: could not find a row containing {text} in column {col}")
+
+
+def xlrd_value(cell):
+    """
+    A cell's value as XlsxStream reads it: an error cell is its excel text,
+    i.e. '#DIV/0!', where xlrd has an error code
+    """
+    import xlrd
+    if cell.ctype == xlrd.XL_CELL_ERROR:
+        return xlrd.error_text_from_code.get(cell.value, '#N/A')
+    return cell.value
+
+
+def colvals(sheet, col):
+    return [xlrd_value(x) for x in sheet.col(col)]
+
+
+def rowvals(sheet, col):
+    return [xlrd_value(x) for x in sheet.row(col)]
+
+
+def get_parameters(reader):
+    parameters = reader.sheet_by_name(PARAMETERS_SHEET_NAME)
+    keys = colvals(parameters, 0)
+    values = colvals(parameters, 1)
+    return dict(zip(keys, values))
+
+
+def get_summary_data(reader):
+    hc = reader.sheet_by_name(HALF_CYCLES_SHEET_NAME)
+    half_cycle_summary_row_number = find_row(hc, col=0, text=HALF_CYCLE_SUMMARY_TEXT)
+    titles_row_number = half_cycle_summary_row_number + 1
+    down_averages_row_number = half_cycle_summary_row_number + 2
+    up_averages_row_number = half_cycle_summary_row_number + 3
+    all_averages_row_number = half_cycle_summary_row_number + 4
+    for row, text in [
+        (titles_row_number, DIRECTION_TEXT),
+        (down_averages_row_number, DOWN_AVERAGES_TEXT),
+        (up_averages_row_number, UP_AVERAGES_TEXT),
+        (all_averages_row_number, ALL_AVERAGES_TEXT),
+    ]:
+        verify_cell_at(hc, row=row, col=1, contents=text)
+    rowxs = [titles_row_number, down_averages_row_number, up_averages_row_number, all_averages_row_number]
+    summary_titles, down, up, all = [rowvals(hc, rowx)[2:] for rowx in rowxs]
+    return dict(titles=summary_titles, down=down, up=up, all=all)
+
+
+def cellval(row, col):
+    return row[col] if col < len(row) else ''
+
+
+def stream_parameters(book):
+    """
+    get_parameters for an XlsxStream
+    """
+    return {cellval(row, 0): cellval(row, 1) for row in book.iter_rows(PARAMETERS_SHEET_NAME)}
+
+
+def stream_summary_data(book, max_row=200):
+    """
+    get_summary_data for an XlsxStream: reads the 'Half-Cycles' sheet only up
+    to the end of the summary block, skipping all the per half cycle rows.
+    """
+    rows = book.iter_rows(HALF_CYCLES_SHEET_NAME)
+    try:
+        for row in islice(rows, max_row):
+            if cellval(row, 0) == HALF_CYCLE_SUMMARY_TEXT:
+                break
+        else:
+            raise WorkbookError(f"{HALF_CYCLES_SHEET_NAME}: could not find a row containing {HALF_CYCLE_SUMMARY_TEXT} in column 0")
+        block = list(islice(rows, 4))
+    finally:
+        rows.close()
+    block += [[]] * (4 - len(block))
+    for row, text in zip(block, [DIRECTION_TEXT, DOWN_AVERAGES_TEXT, UP_AVERAGES_TEXT, ALL_AVERAGES_TEXT]):
+        if cellval(row, 1) != text:
+            raise WorkbookError(f"expected {HALF_CYCLES_SHEET_NAME} summary row to be {text} but found {cellval(row, 1)}")
+    # xlrd pads all rows to the sheet width, pad the block to its own width so
+    # trailing empty cells still line up with their titles
+    width = max(len(row) for row in block)
+    summary_titles, down, up, all = [(row + [''] * (width - len(row)))[2:] for row in block]
+    return dict(titles=summary_titles, down=down, up=up, all=all)
+
+
+def half_cycle_blocks(rows):
+    """
+    The per half cycle rows of the 'Half-Cycles' sheet: the rows with a
+    direction in column 1 under a titles row ('Direction' in column 1), up to
+    the next empty one; the summary block's averages are not half cycles
+    :param rows: the sheet's rows top to bottom, each a list of cell values
+    :return: [(field titles, [[half cycle, direction, value per title]])], a block per titles row
+    """
+    blocks = []
+    block = None
+    for row in rows:
+        label = cellval(row, 1)
+        if label == DIRECTION_TEXT:
+            block = (row[2:], [])
+            blocks.append(block)
+        elif label in (DOWN_AVERAGES_TEXT, UP_AVERAGES_TEXT, ALL_AVERAGES_TEXT):
+            continue
+        elif label == '':
+            block = None
+        elif block is not None:
+            titles, block_rows = block
+            block_rows.append(row + [''] * (len(titles) + 2 - len(row)))
+    return [(titles, block_rows) for titles, block_rows in blocks if len(block_rows) > 0]
+
+
+def extract_detail(item, reader='stream'):
+    """
+    The parameters and all the half cycle rows of a workbook, for the detail
+    export; like extract_prefetched, a file that cannot be read fails alone
+    :param item: (filename, contents or None, digest)
+    :return: dict(parameters=..., blocks=half_cycle_blocks) or None if it is
+     not a post processor file, stats
+    """
+    filename, contents, digest = item
+    stats = {}
+
+    def from_stream():
+        with XlsxStream(filename if contents is None else io.BytesIO(contents)) as book:
+            if HALF_CYCLES_SHEET_NAME not in book.sheet_names():
+                return None
+            return dict(parameters=stream_parameters(book), blocks=half_cycle_blocks(book.iter_rows(HALF_CYCLES_SHEET_NAME)))
+
+    def from_xlrd():
+        import xlrd
+        book = xlrd.open_workbook(filename=filename, file_contents=contents)
+        if HALF_CYCLES_SHEET_NAME not in book.sheet_names():
+            return None
+        hc = book.sheet_by_name(HALF_CYCLES_SHEET_NAME)
+        return dict(parameters=get_parameters(book), blocks=half_cycle_blocks(rowvals(hc, i) for i in range(hc.nrows)))
+    try:
+        return stream_or_xlrd(filename, from_stream, from_xlrd, reader), stats
+    except Exception as e:
+        stats['error'] = error_text(e)
+        return None, stats
+
+
+def small_int_dict(arrays):
+    """
+    Allocate an integer starting with 0 for each new key found in the <arrays>
+    going over them one by one. An example:
+
+    small_int_dict([['a', 'b'], ['a', 'c']]) => {'a': 0, 'b': 1, 'c': 2}
+    :param arrays: [[Object]]
+    :return: dict(Object -> int)
+    """
+    ret = {} # val -> int
+    for i, arr in enumerate(arrays):
+        for val in arr:
+            if val not in ret:
+                ret[val] = len(ret)
+    return ret
+
+
+class IntAlloc():
+    def __init__(self, init=0):
+        self.val = init
+
+    def inc(self, delta):
+        self.val += delta
+        return self.val
+
+
+def summarize_dir(d, config, profile=None):
+    if is_archive(d):
+        return summarize_archive(d, config, profile=profile)
+    if profile is None:
+        profile = Profile()
+    profile.start()
+    try:
+        with profile.phase('scan'):
+            filenames = read_xlsx(d)
+    finally:
+        profile.stop()
+    output_filename = summarize_files(filenames=filenames, output_path=d, config=config, profile=profile)
+    return output_filename
+
+
+def summarize_archive(archive, config, progress=None, profile=None):
+    """
+    Summarize the post processor workbooks in the zip or tar <archive>
+    without extracting it, into <archive name>_summary.xlsx next to it. Its
+    members are not files, so they are not cached, cataloged or updated in place.
+    """
+    from .archive import zip_members, archive_suffix, ZIP_SUFFIXES
+    for option in ['update', 'filter']:
+        if getattr(config, option):
+            print(f"{archive}: ignoring {option}, not available for archives")
+    config.cache = config.update = False
+    config.filter = None
+    # a tar can only be listed by reading all of it, so its progress has no total
+    filenames = []
+    if archive_suffix(archive) in ZIP_SUFFIXES:
+        filenames = zip_members(archive, accept=is_source_filename)
+    return summarize_files(filenames, os.path.dirname(os.path.abspath(archive)), config, progress=progress, profile=profile,
+                           archive=archive)
+
+
+def is_output_filename(name):
+    """
+    True for our own summary outputs and their temporaries, and for office
+    lock files - none of which should trigger a new summary
+    """
+    noext, ext = OUTPUT_FILENAME.rsplit('.', 1)
+    rollup = ROLLUP_FILENAME.rsplit('.', 1)[0]
+    return name.startswith('~$') or re.fullmatch(rf'({noext}|{rollup})(_\d+)?\.{ext}(\.tmp)?', name) is not None
+
+
+def is_source_filename(name):
+    """
+    True for the xlsx files that may be post processor workbooks, i.e. not
+    our own outputs
+    :param name: file name or path, or archive member name
+    """
+    return name.endswith('.xlsx') and not is_output_filename(os.path.basename(name))
+
+
+def watch_dir(d, config, stop=None, on_summary=None):
+    """
+    Keep the summary of directory <d> up to date: summarize it, then again
+    whenever new workbooks are completely written to it. The summary is
+    updated in place and the extraction cache makes sure only the newly
+    arrived files are parsed.
+    :param stop: threading.Event, watch until it is set
+    :param on_summary: called with the summary filename after each update
+    """
+    from .watch import watch
+    config.update = True
+    if not config.cache:
+        print("warning: watching without the cache parses all files on every update")
+
+    def resummarize(filenames):
+        for filename in filenames:
+            print(f"new file {filename}")
+        output = summarize_dir(d, config)
+        if output and on_summary:
+            on_summary(output)
+
+    resummarize([])
+    print(f"watching {d}")
+    watch(d, resummarize, accept=is_source_filename, stop=stop)
+
+
+def find_run_dirs(roots):
+    """
+    The directories under <roots>, recursively, holding xlsx files other than
+    our own outputs. Hidden directories are skipped.
+    :return: [directory], sorted; roots that are archives are kept as they are
+    """
+    ret = set()
+    for root in roots:
+        if is_archive(root):
+            ret.add(root)
+            continue
+        for d, dirnames, names in os.walk(root):
+            dirnames[:] = [x for x in dirnames if not x.startswith('.')]
+            if any(is_source_filename(name) for name in names):
+                ret.add(d)
+    return sorted(ret)
+
+
+def apply_overrides(config, overrides):
+    """
+    :param overrides: dict(Config attribute -> value), i.e. from the command line
+    """
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return config
+
+
+def summarize_batch_dir(d, filenames=None, overrides=None, output_format=None):
+    """
+    Summarize a single directory of a batch using its own summary.ini. Runs in
+    the worker processes of summarize_batch, so failures are returned, not raised.
+    :param filenames: [filename] to summarize, None for all of the directory
+    :param output_format: FORMATS name of the output to return, None for the
+     first of the directory's formats; a directory not writing it fails
+    :return: (d, output filename or None, error or None, profile report)
+    """
+    import multiprocessing
+    config = apply_overrides(Config(d), overrides or {})
+    if multiprocessing.current_process().daemon:
+        # a worker of summarize_batch before python 3.9, which cannot have workers of its own
+        config.jobs = 1
+    profile = Profile()
+    if output_format is not None:
+        if output_format not in config.formats:
+            return d, None, f"no {output_format} output, formats are {','.join(config.formats)}", profile.report()
+        config.formats = [output_format] + [x for x in config.formats if x != output_format]
+    try:
+        if filenames is None or is_archive(d):
+            output = summarize_dir(d, config, profile=profile)
+        else:
+            output = summarize_files(filenames, d, config, profile=profile)
+    except (Exception, SystemExit) as e:
+        return d, None, str(e) or type(e).__name__, profile.report()
+    return d, output, None, profile.report()
+
+
+def summarize_batch(batches, overrides=None, parallel=1, stop=None, on_done=None, output_format=None):
+    """
+    Summarize many directories, each into itself, <parallel> at a time. A
+    directory that fails does not stop the others.
+    :param batches: [(directory, [filename] or None for all of its files)]
+    :param overrides: dict(Config attribute -> value) applied over each directory's own Config
+    :param parallel: directories summarized at once, each in its own process,
+     which reads the directory's files with its jobs workers (in process before
+     python 3.9, where the processes are daemonic)
+    :param stop: threading.Event, directories not started yet are skipped once it is set
+    :param on_done: called with each summarize_batch_dir result as it is done
+    :param output_format: FORMATS name of the output to return for each directory, see summarize_batch_dir
+    :return: [summarize_batch_dir result], in the order of <batches>
+    """
+    if on_done is None:
+        on_done = do_nothing
+    results = {}
+    if parallel <= 1:
+        for d, filenames in batches:
+            if stop is not None and stop.is_set():
+                break
+            results[d] = summarize_batch_dir(d, filenames, overrides, output_format)
+            on_done(results[d])
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=parallel) as executor:
+            futures = [executor.submit(summarize_batch_dir, d, filenames, overrides, output_format) for d, filenames in batches]
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                result = future.result()
+                results[result[0]] = result
+                on_done(result)
+                if stop is not None and stop.is_set():
+                    for pending in futures:
+                        pending.cancel()
+    return [results[d] for d, filenames in batches if d in results]
+
+
+def write_rollup(root, outputs, formats=('xlsx',)):
+    """
+    Write the rows of all the summaries <outputs> into a single roll-up in
+    <root>, file names relative to <root>. Its columns are those of all the
+    summaries in order of appearance, missing values are left empty.
+    :param outputs: [summary xlsx filename]
+    :param formats: FORMATS names to write
+    :return: [written filename]
+    """
+    keys = {} # (direction, title) -> column
+    for output in outputs:
+        with XlsxStream(output) as book:
+            rows = book.iter_rows(SUMMARY_SHEET_NAME)
+            groups = next(rows, [])
+            for col, title in enumerate(next(rows, [])[1:], start=1):
+                keys.setdefault((cellval(groups, col) or None, title), len(keys))
+    columns = [Column(None, None, 'file')] + [Column(group, title, 'field' if group else 'parameter') for group, title in keys]
+    stem = ROLLUP_FILENAME.rsplit('.', 1)[0]
+    writers = [FORMATS[format][1](allocate_unused_file_in_directory(os.path.join(root, f'{stem}.{FORMATS[format][0]}')))
+               for format in formats]
+    for writer in writers:
+        writer.open(columns)
+    try:
+        for output in outputs:
+            d = os.path.relpath(os.path.dirname(output), root)
+            with XlsxStream(output) as book:
+                rows = book.iter_rows(SUMMARY_SHEET_NAME)
+                groups, titles = next(rows, []), next(rows, [])
+                index = [keys[(cellval(groups, col) or None, cellval(titles, col))] for col in range(1, len(titles))]
+                for row in rows:
+                    if cellval(row, 0) == '':
+                        continue
+                    data = [os.path.join(d, row[0])] + [None] * len(keys)
+                    for key, value in zip(index, row[1:]):
+                        data[1 + key] = value
+                    for writer in writers:
+                        writer.write_row(data)
+    finally:
+        for writer in writers:
+            writer.close()
+    return [writer.filename for writer in writers]
+
+
+def cached_formula(text, value, values_only):
+    """
+    The cell to write for formula <text> evaluated to <value>: the formula with
+    its cached value, or just the value when <values_only>. Errors are cached
+    as the excel error, or left blank when <values_only>.
+    """
+    if value is None:
+        return Formula(text, None)
+    if not isfinite(value):
+        return None if values_only else Formula(text, '#DIV/0!' if isinf(value) else '#VALUE!')
+    return float(value) if values_only else Formula(text, float(value))
+
+
+def chunked(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+def do_nothing(*args):
+    pass
+
+
+def added_titles(config):
+    """
+    The half cycle fields summarize_files adds to the configured ones, since
+    the configured formulas read them
+    """
+    from emolog.emotool.ppxl_util import HALF_CYCLE_PREDEFINED_TITLES
+    from .formulas import missing_input_titles
+    parameter_names = HALF_CYCLE_PREDEFINED_TITLES + [x for x in config.parameters]
+    return missing_input_titles(config.half_cycle_fields, set(parameter_names) | set(config.half_cycle_fields))
+
+
+def summarize_files(filenames, output_path, config, progress=None, profile=None, archive=None):
+    """
+    read all .xls files in the directory that have a 'Half-Cycles' sheet, and
+    create a new summary.xls file from them
+    :param dir:
+    :param progress: Progress to report to, or None; if it is cancelled
+     Cancelled is raised and no output is left behind
+    :param profile: Profile to add this run's timings and counters to, or None
+    :param archive: zip or tar to read the files from, named <archive>_summary;
+     <filenames> are then its members, for the progress only
+    :return: written xlsx filename full path if successful, else None
+    """
+    if config.detail and config.detail not in DETAIL_FORMATS:
+        print(f"detail: unknown format {config.detail}, choose from {', '.join(DETAIL_FORMATS)}")
+        raise SystemExit
+    check_formats(config.formats + ([config.detail] if config.detail else []))
+    if progress is None:
+        progress = Progress()
+    if profile is None:
+        profile = Profile()
+    profile.start()
+    try:
+        if archive is None:
+            with profile.phase('classify'):
+                filenames = classify_runs(filenames, output_path, config, profile)
+        if config.filter:
+            with profile.phase('catalog'):
+                filenames = select_runs(filenames, output_path, config)
+        progress.start(total=len(filenames))
+        errors = [] # (filename, reason) of the files that failed, they are left out
+        ret = _summarize_files(filenames, output_path, config, progress, profile, errors, archive)
+        if config.detail and ret is not None:
+            with profile.phase('detail'):
+                summarize_detail(filenames, ret, config, progress, profile, archive,
+                                 failed={filename for filename, reason in errors})
+    finally:
+        profile.stop()
+    progress.finish()
+    return ret
+
+
+def summarize_detail(filenames, summary_filename, config, progress, profile, archive=None, failed=()):
+    """
+    Write the long format detail of every half cycle of <filenames>, see
+    detail.py, next to <summary_filename> in config.detail format. The files
+    are read again, whole this time, by config.jobs workers; the runs are
+    written in filename order, or for a tar in archive order, each tagged
+    with its path relative to the summary's directory or to the archive.
+    :param failed: files left out of the summary, left out of the detail too
+    :return: the detail filename
+    """
+    from emolog.emotool.ppxl_util import HALF_CYCLE_PREDEFINED_TITLES
+    parameter_names = HALF_CYCLE_PREDEFINED_TITLES + [x for x in config.parameters]
+    if archive is not None:
+        from .archive import iter_members
+        items = (item for item in iter_members(archive, accept=is_source_filename)
+                 if item[0] not in failed)
+    else:
+        items = [(filename, None, None) for filename in sorted(filenames) if filename not in failed]
+    jobs = max(1, min(config.jobs, len(filenames) or config.jobs))
+    extracted = extract_isolated(partial(extract_detail, reader=config.reader), items, jobs=jobs, timeout=config.timeout or None)
+
+    def runs():
+        for (filename, contents, digest), payload, stats in extracted:
+            progress.check()
+            if 'error' in stats:
+                print(f"{filename}: {stats['error']}, left out of the detail")
+            elif payload is not None:
+                yield filename, payload
+
+    filename = detail_filename(summary_filename, config.detail)
+    try:
+        rows = write_detail(runs(), filename, config.detail, parameter_names,
+                            root=archive if archive is not None else os.path.dirname(summary_filename))
+    finally:
+        extracted.close()
+    profile.count('detail_rows', rows)
+    print(f"wrote {filename}, {rows} half cycle values")
+    return filename
+
+
+def classify_runs(filenames, output_path, config, profile):
+    """
+    classify_files, with the verdicts kept in the extraction cache if it is on
+    """
+    if not config.cache:
+        selected = classify_files(filenames)
+    else:
+        from .cache import ExtractionCache
+        with ExtractionCache(os.path.join(output_path, CACHE_FILENAME)) as cache:
+            selected = classify_files(filenames, cache)
+    profile.count('files_rejected', len(filenames) - len(selected))
+    return selected
+
+
+def _summarize_files(filenames, output_path, config, progress, profile, errors, archive=None):
+    from emolog.emotool.ppxl_util import (
+    HALF_CYCLE_CELL_TO_FORMULA,
+    HALF_CYCLE_PREDEFINED_TITLES,
+    HALF_CYCLE_PREDEFINED_CELL_NAMES,
+    HALF_CYCLE_TITLE_TO_CELL_NAME,
+    )
+    import numpy as np
+    from .evaluate import FormulaEvaluator
+    from .store import RunStore
+    from .template import RowTemplate
+
+    user_defined_fields = [x for x in config.user_defined_fields if x not in HALF_CYCLE_PREDEFINED_TITLES]
+    half_cycle_directions = config.half_cycle_directions
+    half_cycle_fields = config.half_cycle_fields
+    parameter_names = HALF_CYCLE_PREDEFINED_TITLES + [x for x in config.parameters]
+
+    # check we have all inputs required for the formula presented
+    missing_titles = added_titles(config)
+    if missing_titles:
+        half_cycle_fields = half_cycle_fields + missing_titles
+        print(f"added missing {missing_titles!r}")
+
+    # compute titles - we have a left col for the 'Up/Down/All' caption
+    summary_titles = half_cycle_fields
+    N_par = len(parameter_names)
+    columns = ([Column(None, None, 'file')] + [Column(None, title, 'user') for title in user_defined_fields]
+               + [Column(None, title, 'parameter') for title in parameter_names]
+               + [Column(d, title, 'field') for d in half_cycle_directions for title in summary_titles])
+
+    aggregator = None
+    if config.aggregate:
+        from .aggregate import Aggregator, AGGREGATES_NAME
+        try:
+            aggregator = Aggregator(columns, group_by=config.aggregate_by, statistics=config.aggregate_statistics)
+        except ValueError as e:
+            print(f"aggregates: {e}")
+            raise SystemExit
+
+    print(f"reading parameters and summaries ({config.jobs} jobs)")
+    cache = None
+    if config.cache:
+        from .cache import ExtractionCache
+        cache = ExtractionCache(os.path.join(output_path, CACHE_FILENAME))
+    outputs = []
+    timeout = config.timeout or None
+    try:
+        # the initial filenames contains xlsx that are not produced by the post processor
+        if archive is not None:
+            source = extracted = iter_extracted_members(archive, jobs=config.jobs, reader=config.reader,
+                                                        progress=lambda i: progress.update('extract', i + 1), profile=profile,
+                                                        timeout=timeout, errors=errors)
+            if not filenames:
+                # a tar is read in archive order, the (small) payloads are sorted by name
+                extracted = sorted(extracted, key=lambda x: x[0])
+        else:
+            source = extracted = iter_extracted(filenames, jobs=config.jobs, reader=config.reader, cache=cache,
+                                                progress=lambda i: progress.update('extract', i + 1), profile=profile,
+                                                prefetch=config.prefetch * MB, prefetch_threads=config.prefetch_threads,
+                                                timeout=timeout, errors=errors)
+
+        # in update mode the latest summary is rewritten in place, keeping what
+        # operators entered by hand in it
+        update = config.update and 'xlsx' in config.formats
+        previous_filename = latest_summary(os.path.join(output_path, OUTPUT_FILENAME)) if update else None
+        kept = {}
+        if previous_filename is not None:
+            # telling whether anything changed takes all the (small) payloads up front
+            extracted = list(extracted)
+            with profile.phase('update'):
+                kept = read_summary_rows(previous_filename, titles=set(config.user_defined_fields) | set(HALF_CYCLE_PREDEFINED_TITLES))
+            filenames = [filename for filename, payload in extracted]
+            basenames = [os.path.basename(filename) for filename in filenames]
+            # only the rows of files that no longer exist are dropped, a file
+            # left out of this summary (filtered out, failed or not given)
+            # keeps its previous row, and what was entered in it by hand
+            left_out = sorted(basename for basename in set(kept) - set(basenames)
+                              if os.path.exists(os.path.join(output_path, basename)))
+            if left_out:
+                print(f"keeping the previous rows of {len(left_out)} files left out of this summary")
+                with profile.phase('update'):
+                    previous_payloads = summary_payloads(previous_filename, left_out, half_cycle_directions)
+                extracted = sorted(extracted + [(os.path.join(output_path, basename), previous_payloads[basename])
+                                                for basename in left_out], key=lambda x: x[0])
+            changed = changed_files(filenames, previous_filename, kept)
+            gone = sorted(set(kept) - set(basenames) - set(left_out))
+            print(f"updating {previous_filename}: {len(changed)} new or changed files, {len(gone)} removed, {len(errors)} failed")
+            for basename in gone:
+                print(f"dropping row of missing file {basename}")
+            # a file that failed is rewritten into the summary's Errors sheet
+            if len(extracted) > 0 and len(changed) == 0 and len(gone) == 0 and len(errors) == 0 and not newer(os.path.join(output_path, CONFIG_FILENAME), previous_filename):
+                print("summary is up to date")
+                return previous_filename
+
+        extracted = iter(extracted)
+        first = next(extracted, None)
+        if first is None:
+            print("no files found")
+            return
+        extracted = chain([first], extracted)
+
+        # (writer, filename to replace with what it writes, or None)
+        stem = OUTPUT_FILENAME.rsplit('.', 1)[0]
+        if archive is not None:
+            stem = f'{archive_stem(archive)}_{stem}'
+        for format in config.formats:
+            ext, writer_class = FORMATS[format]
+            initial = os.path.join(output_path, f'{stem}.{ext}')
+            previous = latest_summary(initial) if config.update else None
+            if previous is not None:
+                outputs.append((writer_class(f'{previous}.tmp'), previous))
+            else:
+                outputs.append((writer_class(allocate_unused_file_in_directory(initial)), None))
+
+        evaluator = FormulaEvaluator(HALF_CYCLE_CELL_TO_FORMULA,
+                                     cell_names=set(HALF_CYCLE_TITLE_TO_CELL_NAME.values()) | set(HALF_CYCLE_PREDEFINED_CELL_NAMES))
+        template = RowTemplate(user_defined_fields, parameter_names, summary_titles, half_cycle_directions)
+        # the titles whose values are formula inputs
+        input_titles = [title for title in summary_titles if title in HALF_CYCLE_TITLE_TO_CELL_NAME and title not in template.formula_titles]
+
+        def evaluate(store, rendered):
+            """
+            Evaluate the formulas of the <rendered> rows of <store>, in place,
+            a direction at a time over whole columns; the evaluated fields
+            replace the extracted ones in the store's view for the aggregates
+            """
+            n = len(rendered)
+            predefined = {cell: [data[template.parameters_index + k] for data, formula_cells in rendered]
+                          for k, cell in enumerate(HALF_CYCLE_PREDEFINED_CELL_NAMES[:N_par])}
+            for direction in range(len(half_cycle_directions)):
+                inputs = dict(predefined)
+                for title in input_titles:
+                    if store.has_field(direction, title):
+                        inputs[HALF_CYCLE_TITLE_TO_CELL_NAME[title]] = store.arithmetic(direction, title)
+                wanted = {HALF_CYCLE_TITLE_TO_CELL_NAME[title] for data, formula_cells in rendered
+                          for index, d, title in formula_cells if d == direction}
+                results = evaluator.evaluate(inputs, wanted, n=n)
+                evaluated = {title: np.full(n, np.nan) for title in template.formula_titles}
+                for i, (data, formula_cells) in enumerate(rendered):
+                    for index, d, title in formula_cells:
+                        if d != direction:
+                            continue
+                        cell = HALF_CYCLE_TITLE_TO_CELL_NAME[title]
+                        value = results[cell][i] if cell in results else None
+                        data[index] = cached_formula(data[index], value, config.values_only)
+                        if value is not None and isfinite(value):
+                            evaluated[title][i] = value
+                for title, values in evaluated.items():
+                    store.set_result(direction, title, values)
+
+        def rows():
+            row = IntAlloc(init=2) # below the direction and title rows
+
+            # files are rendered as soon as they are extracted, a chunk at a
+            # time into a columnar store, so each formula is evaluated for the
+            # whole chunk at once and the aggregates take whole columns
+            for chunk in chunked(extracted, EVALUATE_CHUNK_SIZE):
+                with profile.phase('render'):
+                    store = RunStore(parameter_names, summary_titles, half_cycle_directions)
+                    for filename, payload in chunk:
+                        store.add(filename, payload)
+                    del chunk # the store holds the runs from here on
+                    rendered = [template.fill(store, i, row.val + i, kept.get(os.path.basename(store.filenames[i]), {}))
+                                for i in range(len(store))]
+                with profile.phase('evaluate'):
+                    evaluate(store, rendered)
+                if aggregator is not None:
+                    with profile.phase('aggregate'):
+                        aggregator.add_rows([data for data, formula_cells in rendered], store.field_matrix())
+                for data, formula_cells in rendered:
+                    yield data
+                row.inc(len(store))
+
+        opened = []
+        try:
+            with profile.phase('write'):
+                for writer, previous in outputs:
+                    writer.open(columns)
+                    opened.append(writer)
+            for data in rows():
+                with profile.phase('write'):
+                    for writer, previous in outputs:
+                        writer.write_row(data)
+                profile.add_row(len(data), outputs=len(outputs))
+                progress.update('write', profile.counters['rows_written'] // len(outputs) + profile.counters['files_skipped']
+                                + profile.counters['files_failed'])
+            if aggregator is not None:
+                with profile.phase('aggregate'):
+                    table_columns, table_rows = aggregator.table()
+                with profile.phase('write'):
+                    for writer, previous in outputs:
+                        writer.write_table(AGGREGATES_NAME, table_columns, table_rows)
+            if errors:
+                print(f"{len(errors)} files failed and were left out, see {ERRORS_NAME}")
+                with profile.phase('write'):
+                    for writer, previous in outputs:
+                        writer.write_table(ERRORS_NAME, ERRORS_COLUMNS, [[os.path.basename(filename), reason] for filename, reason in errors])
+        finally:
+            with profile.phase('write'):
+                for writer in opened:
+                    writer.close()
+    except BaseException as e:
+        # no output is left half written, whatever stopped it
+        for writer, previous in outputs:
+            if os.path.exists(writer.filename):
+                os.unlink(writer.filename)
+        if isinstance(e, Cancelled):
+            print("cancelled")
+        raise
+    finally:
+        source.close() # stops the worker processes early if we did not get to the end
+        if cache is not None:
+            cache.close()
+    with profile.phase('finish'):
+        output_filenames = [writer.filename if previous is None else replace_file(writer.filename, previous)
+                            for writer, previous in outputs]
+    for output_filename in output_filenames[1:]:
+        print(f"wrote {output_filename}")
+    return output_filenames[0]
+
+
+def newer(filename, than):
+    return os.path.exists(filename) and os.path.getmtime(filename) > os.path.getmtime(than)
+
+
+def changed_files(filenames, summary_filename, rows):
+    """
+    :param filenames: [source filename]
+    :param summary_filename: a previous summary
+    :param rows: read_summary_rows of summary_filename
+    :return: the filenames that have no row in the summary or were modified after it was written
+    """
+    return [filename for filename in filenames
+            if os.path.basename(filename) not in rows or newer(filename, summary_filename)]
+
+
+def read_summary_rows(filename, titles):
+    """
+    Read back the rows of a summary written by summarize_files
+    :param filename: summary xlsx
+    :param titles: the columns to read, by title
+    :return: dict(source file basename -> dict(title -> value))
+    """
+    with XlsxStream(filename) as book:
+        rows = book.iter_rows(SUMMARY_SHEET_NAME)
+        next(rows, None) # direction titles
+        cols = {}
+        for col, title in enumerate(next(rows, [])):
+            if title in titles and title not in cols:
+                cols[title] = col
+        return {row[0]: {title: cellval(row, col) for title, col in cols.items()}
+                for row in rows if cellval(row, 0) != ''}
+
+
+def summary_payloads(filename, basenames, directions):
+    """
+    Rebuild extract() payloads from the rows of a summary written by
+    summarize_files, for files it summarized that are not extracted again
+    :param filename: summary xlsx
+    :param basenames: the source files to rebuild, by basename
+    :param directions: the half cycle directions to give every payload
+    :return: dict(source file basename -> payload)
+    """
+    ret = {}
+    with XlsxStream(filename) as book:
+        rows = book.iter_rows(SUMMARY_SHEET_NAME)
+        groups = next(rows, [])
+        titles = next(rows, [])
+        field_titles = list(dict.fromkeys(title for col, title in enumerate(titles) if cellval(groups, col) != ''))
+        for row in rows:
+            if cellval(row, 0) not in basenames:
+                continue
+            parameters = {}
+            fields = {direction.lower(): {} for direction in directions}
+            for col in range(1, len(titles)):
+                group, title, value = cellval(groups, col), cellval(titles, col), cellval(row, col)
+                if group == '':
+                    parameters[title] = value
+                elif group.lower() in fields:
+                    fields[group.lower()][title] = value
+            ret[row[0]] = dict(parameters=parameters, summary=dict(
+                titles=field_titles, **{direction: [values.get(title, '') for title in field_titles]
+                                        for direction, values in fields.items()}))
+    return ret
+
+
+def replace_file(new, old):
+    """
+    Move <new> over <old>. If <old> cannot be replaced, i.e. it is open in
+    excel on windows, <new> is moved to the next unused name instead.
+    :return: the final filename
+    """
+    try:
+        os.replace(new, old)
+        return old
+    except PermissionError:
+        fallback = allocate_unused_file_in_directory(old)
+        print(f"cannot replace {old}, is it open? writing {fallback} instead")
+        os.replace(new, fallback)
+        return fallback
+
+
+def latest_summary(initial):
+    """
+    The last file allocate_unused_file_in_directory(initial) allocated, or None
+    """
+    d = os.path.dirname(initial)
+    noext, ext = os.path.basename(initial).rsplit('.', 1)
+    latest = None
+    fname = initial
+    i = 1
+    while os.path.exists(fname) and i < 1000:
+        latest = fname
+        fname = os.path.join(d, f'{noext}_{i}.{ext}')
+        i += 1
+    return latest
+
+
+def allocate_unused_file_in_directory(initial):
+    """look for a file at the dirname(initial) with basename(initial)
+    file name. If one already exists, try adding _1, then _2 etc. right
+    before the extention
+    """
+    i = 1
+    d = os.path.dirname(initial)
+    filename_with_ext = os.path.basename(initial)
+    noext, ext = filename_with_ext.rsplit('.', 1)
+    fname = initial
+    while os.path.exists(fname) and i < 1000:
+        fname = os.path.join(d, f'{noext}_{i}.{ext}')
+        i += 1
+    return fname
+
+
+def paths_from_file_urls(urls):
+    ret = []
+    for url in urls:
+        if len(url) == 0:
+            continue
+        parsed = urlparse(url)
+        if parsed.scheme != 'file':
+            print(f'ignoring scheme = {parsed.scheme!r} ({url!r})')
+            continue
+        path = unquote(parsed.path if len(parsed.path) > 0 else parsed.netloc)
+        if 'win' in sys.platform and path[:1] == '/':
+            path = path[1:]
+        if not os.path.exists(path):
+            print(f"no such file: {path!r} ({url!r})")
+            continue
+        ret.append(path)
+    return ret
+
+
+def start(filename):
+    if hasattr(os, 'startfile'):
+        os.startfile(filename)
+    else:
+        os.system(f'xdg-open "{filename}"')
+
+
+class Config:
+    def __init__(self, d):
+        if is_archive(d):
+            d = os.path.dirname(os.path.abspath(d)) # archives are configured by the summary.ini next to them
+        ini_filename = os.path.join(d, CONFIG_FILENAME)
+        if os.path.exists(ini_filename):
+            print(f"reading config from {ini_filename}")
+            self.config = ConfigParser()
+            self.config.read(ini_filename)
+        else:
+            self.config = None
+        # merge half_cycle and half_cycles sections, converting them to
+        # half_cycle section
+        half_cycles = self._get_sections(['half_cycle', 'half_cycles'])
+        self.user_defined_fields = self._get_strings('user_defined', 'fields', ["Pump Head [m]", "Damper used?", "PSU or Solar Panels", "MPPT used?", "General Notes"])
+        self.half_cycle_fields = half_cycles.get('fields', ['Average Velocity [m/s]', 'Flow Rate [LPM]'])
+        self.half_cycle_directions = half_cycles.get('directions', ['down', 'up', 'all'])
+        self.parameters = self._get_strings('global', 'parameters', [])
+        self.jobs = int(self._get('global', 'jobs', 1))
+        self.reader = self._get('global', 'reader', READERS[0])
+        self.cache = self._get_boolean('global', 'cache', True)
+        self.update = self._get_boolean('global', 'update', False)
+        self.values_only = self._get_boolean('global', 'values_only', False)
+        self.formats = self._get_strings('global', 'formats', ['xlsx'])
+        # seconds a single file may take to read, 0 for no limit
+        self.timeout = float(self._get('global', 'timeout', 0))
+        # megabytes of input files read ahead of their parsing, 0 for none, see prefetch.py
+        self.prefetch = int(self._get('global', 'prefetch', 0))
+        self.prefetch_threads = int(self._get('global', 'prefetch_threads', 4))
+        # only the files whose parameters match, see catalog.py
+        self.filter = self._get('global', 'filter', None)
+        # long format export of every half cycle, one of DETAIL_FORMATS or None, see detail.py
+        self.detail = self._get('global', 'detail', None) or None
+        # statistics across the files, on by having an [aggregates] section
+        self.aggregate = self._get_boolean('aggregates', 'enabled', self.config is not None and self.config.has_section('aggregates'))
+        self.aggregate_by = self._get_strings('aggregates', 'group_by', [])
+        self.aggregate_statistics = self._get_strings('aggregates', 'statistics', ['count', 'mean', 'std', 'min', 'max'])
+
+    def _get_sections(self, sections):
+        ds = [self._get_section(s) for s in sections]
+        dret = {}
+        for d in ds:
+            dret.update(d)
+        return self._parse_strings(dret)
+
+    def _parse_strings(self, d):
+        def split(v):
+            return [x.strip() for x in v.split(',')]
+        return {k: split(v) for k, v in d.items()}
+
+    def _get_section(self, section):
+        if not self.config or not self.config.has_section(section):
+            return {}
+        return dict(self.config._unify_values(section, None))
+
+    def _get(self, section, field, default):
+        if self.config is not None and self.config.has_option(section, field):
+            return self.config.get(section, field, raw=True) # avoid % interpolation, we want to have % values
+        return default
+
+    def _get_boolean(self, section, field, default):
+        if self.config is not None and self.config.has_option(section, field):
+            return self.config.getboolean(section, field)
+        return default
+
+    def _get_strings(self, section, field, default):
+        if self.config is not None and self.config.has_option(section, field):
+            return [x.strip() for x in [y for y in self.config.get(section, field, raw=True).split(',') if len(y) > 0]]
+        return default
+
+
+parameters_help = """\
+ Create a file named "summary.ini" in the file directory.
+ Example contents:
+
+[global]
+parameters=Comm advance mode,Comm advance const delay up,Comm advance const delay down
+;; Number of worker processes reading the files, defaults to 1
+jobs=4
+;; How files are read: stream (default, fast) or xlrd (full parse)
+reader=stream
+;; Keep what was read from each file in .summary_cache.sqlite, defaults to yes
+cache=yes
+;; Rewrite the latest summary in place keeping the hand entered columns,
+;; instead of creating a new summary_N.xlsx, defaults to no
+update=no
+;; Write computed numbers instead of formulas, defaults to no
+values_only=no
+;; Output formats, first one is opened when done: xlsx,csv,parquet,sqlite
+formats=xlsx
+;; Seconds a single file may take to read before it is given up on, as
+;; files that cannot be read are, and listed in an Errors sheet; defaults to 0 (no limit)
+timeout=0
+;; Megabytes of files to read ahead while others are parsed, for files on a
+;; slow network share, and how many files are read at once; defaults to 0 (off).
+;; Only with jobs=1 and no timeout, worker processes read their own files
+prefetch=0
+prefetch_threads=4
+;; Summarize only the files whose parameters match, i.e.
+;; filter="Comm advance mode" = 2 and "Date" >= '2020-01-01'
+;; They are looked up in .summary_catalog.sqlite; defaults to all files
+;filter=
+;; Also write every half cycle of every file, one row per half cycle and
+;; field tagged with the file and its parameters, to summary_detail.csv (or
+;; .parquet); defaults to off
+;detail=csv
+
+[aggregates]
+;; Having this section adds an Aggregates sheet (a table in sqlite, a
+;; summary_aggregates file for csv and parquet) with statistics of every half
+;; cycle field per group of files sharing the values of these parameters;
+;; defaults to a single group of all files
+group_by=Comm advance mode
+;; Defaults to: count,mean,std,min,max
+statistics=count,mean,std,min,max
+
+[half_cycle]
+;; Defaults to: Average Velocity [m/s],Flow Rate [LPM]
+fields=Average Velocity [m/s],Flow Rate [LPM]
+;; Defaults to: down,up,all
+directions=down,up,all
+"""
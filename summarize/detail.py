@@ -0,0 +1,85 @@
+"""
+Long format export of every half cycle of every run, for per cycle analysis.
+
+The summary keeps a single averages row per direction of each run; the
+detail keeps the half cycle rows below it in the 'Half-Cycles' sheet, in
+long format: one row per half cycle and field, tagged with the file (its
+path relative to the summarized directory or archive) and its parameters,
+
+    File, <parameter>..., Half-Cycle, Direction, Field, Value
+
+so runs with different fields share one table. It is written to csv or
+parquet as the runs arrive, a run at a time, so however many rows there are
+only one run and one parquet batch are ever held in memory.
+"""
+
+import os
+
+from .writers import FORMATS, Column
+
+DETAIL_NAME = 'Detail'
+
+DETAIL_FORMATS = ['csv', 'parquet']
+
+# rows per parquet row group, larger than the summary's as there are many more of them
+DETAIL_BATCH_SIZE = 65536
+
+HALF_CYCLE_TITLE = 'Half-Cycle'
+
+
+def detail_filename(summary_filename, format):
+    """
+    i.e. /runs/summary_2.xlsx, 'parquet' => /runs/summary_2_detail.parquet
+    """
+    stem = os.path.splitext(summary_filename)[0]
+    return f'{stem}_{DETAIL_NAME.lower()}.{FORMATS[format][0]}'
+
+
+def detail_columns(parameter_names):
+    return ([Column(None, None, 'file')] + [Column(None, name, 'parameter') for name in parameter_names]
+            + [Column(None, HALF_CYCLE_TITLE, 'field'), Column(None, 'Direction', 'user'),
+               Column(None, 'Field', 'user'), Column(None, 'Value', 'field')])
+
+
+def detail_rows(filename, payload, parameter_names, root=None):
+    """
+    Generate the long format rows of a single run
+    :param payload: from core.extract_detail
+    :param root: directory or archive the file is tagged relative to, None
+     for its base name
+    """
+    tag = [os.path.basename(filename) if root is None else os.path.relpath(filename, root)]
+    tag += [payload['parameters'].get(name) for name in parameter_names]
+    for titles, rows in payload['blocks']:
+        for row in rows:
+            half_cycle, direction = row[0], row[1]
+            for title, value in zip(titles, row[2:]):
+                if title not in (None, ''):
+                    yield tag + [half_cycle, direction, title, value]
+
+
+def write_detail(runs, filename, format, parameter_names, root=None):
+    """
+    :param runs: generates (filename, payload) of each run, in order
+    :param filename: to write, replaced once it is complete
+    :param format: one of DETAIL_FORMATS
+    :param root: see detail_rows
+    :return: number of rows written
+    """
+    writer_class = FORMATS[format][1]
+    tmp = f'{filename}.tmp'
+    writer = writer_class(tmp, batch_size=DETAIL_BATCH_SIZE) if format == 'parquet' else writer_class(tmp)
+    written = 0
+    writer.open(detail_columns(parameter_names))
+    try:
+        for run_filename, payload in runs:
+            for row in detail_rows(run_filename, payload, parameter_names, root):
+                writer.write_row(row)
+                written += 1
+    except BaseException:
+        writer.close()
+        os.unlink(tmp)
+        raise
+    writer.close()
+    os.replace(tmp, filename)
+    return written
@@ -0,0 +1,249 @@
+"""
+Evaluate the half cycle formulas in python, for many rows at once.
+
+The formulas in HALF_CYCLE_CELL_TO_FORMULA produce excel formula text. Each
+one is rendered once with placeholder cell references, parsed and compiled
+into a numpy expression, so a whole column of rows is computed in a single
+vectorized pass. Excel semantics that matter here are kept: empty cells
+count as 0, text in arithmetic is an error, errors propagate, '^' is left
+associative and negation binds tighter than '^'.
+
+Formulas using anything outside the supported subset are reported as
+unsupported and left for the spreadsheet to compute.
+"""
+
+import re
+
+import numpy as np
+
+from .formulas import FormulaGraph, formula_inputs
+
+PLACEHOLDER_PREFIX = '__cell_'
+
+# wraps number literals in the compiled expressions, not an excel function name
+NUMBER = '__number'
+
+TOKEN_RE = re.compile(r'''
+    \s*(?:
+      (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    | (?P<string>"(?:[^"]|"")*")
+    | (?P<name>[A-Za-z_][A-Za-z0-9_.]*)
+    | (?P<op><>|<=|>=|[-+*/^&=<>(),%])
+    )''', re.VERBOSE)
+
+COMPARISONS = {'=': '==', '<>': '!=', '<': '<', '>': '>', '<=': '<=', '>=': '>='}
+
+
+class UnsupportedFormula(ValueError):
+    pass
+
+
+def _round(x, digits=0):
+    # excel rounds half away from zero, numpy to even
+    scale = 10.0 ** digits
+    return np.sign(x) * np.floor(np.abs(x) * scale + 0.5) / scale
+
+
+def _iferror(x, alternative):
+    x = np.asarray(x, dtype=float)
+    return np.where(np.isfinite(x), x, alternative)
+
+
+FUNCTIONS = {
+    'IF': lambda condition, true, false=False: np.where(condition, true, false),
+    'IFERROR': _iferror,
+    'ABS': np.abs,
+    'SQRT': np.sqrt,
+    'EXP': np.exp,
+    'LN': np.log,
+    'LOG10': np.log10,
+    'LOG': lambda x, base=10: np.log(x) / np.log(base),
+    'POWER': np.power,
+    'ROUND': _round,
+    'MIN': lambda *args: np.minimum.reduce(np.broadcast_arrays(*args)),
+    'MAX': lambda *args: np.maximum.reduce(np.broadcast_arrays(*args)),
+    'SUM': lambda *args: sum(args),
+    'AVERAGE': lambda *args: sum(args) / len(args),
+    'AND': lambda *args: np.logical_and.reduce(np.broadcast_arrays(*args)),
+    'OR': lambda *args: np.logical_or.reduce(np.broadcast_arrays(*args)),
+    'NOT': np.logical_not,
+    'PI': lambda: np.pi,
+}
+
+
+class _Parser:
+    """
+    Recursive descent parser from excel formula text to a fully parenthesized
+    python expression over the FUNCTIONS namespace and placeholder variables
+    """
+    def __init__(self, text, variables):
+        self.variables = variables
+        self.tokens = []
+        pos = 0
+        text = text.rstrip()
+        while pos < len(text):
+            m = TOKEN_RE.match(text, pos)
+            if m is None:
+                raise UnsupportedFormula(f'cannot parse {text[pos:]!r}')
+            kind = m.lastgroup
+            self.tokens.append((kind, m.group(kind)))
+            pos = m.end()
+        self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        token = self.peek()
+        if token[0] is None or (value is not None and token[1] != value):
+            raise UnsupportedFormula(f'expected {value!r}, found {token[1]!r}')
+        self.i += 1
+        return token
+
+    def parse(self):
+        ret = self.comparison()
+        if self.peek()[0] is not None:
+            raise UnsupportedFormula(f'unexpected {self.peek()[1]!r}')
+        return ret
+
+    def binary(self, operand, operators, render):
+        ret = operand()
+        while self.peek()[0] == 'op' and self.peek()[1] in operators:
+            op = self.take()[1]
+            ret = render(op, ret, operand())
+        return ret
+
+    def comparison(self):
+        return self.binary(self.concatenation, COMPARISONS, lambda op, a, b: f'({a} {COMPARISONS[op]} {b})')
+
+    def concatenation(self):
+        def concat(op, a, b):
+            raise UnsupportedFormula('text concatenation')
+        return self.binary(self.additive, ['&'], concat)
+
+    def additive(self):
+        return self.binary(self.term, ['+', '-'], lambda op, a, b: f'({a} {op} {b})')
+
+    def term(self):
+        return self.binary(self.power, ['*', '/'], lambda op, a, b: f'({a} {op} {b})')
+
+    def power(self):
+        return self.binary(self.percent, ['^'], lambda op, a, b: f'({a} ** {b})')
+
+    def percent(self):
+        ret = self.unary()
+        while self.peek() == ('op', '%'):
+            self.take()
+            ret = f'({ret} / 100)'
+        return ret
+
+    def unary(self):
+        if self.peek() in [('op', '-'), ('op', '+')]:
+            op = self.take()[1]
+            return f'({op}{self.unary()})'
+        return self.primary()
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == 'number':
+            # numpy scalars, so i.e. 1/0 is an error (inf) and not an exception
+            return f'{NUMBER}({float(value)!r})'
+        if kind == 'op' and value == '(':
+            ret = self.comparison()
+            self.take(')')
+            return ret
+        if kind == 'name':
+            upper = value.upper()
+            if self.peek() == ('op', '('):
+                if upper not in FUNCTIONS:
+                    raise UnsupportedFormula(f'function {value}')
+                self.take('(')
+                args = []
+                if self.peek() != ('op', ')'):
+                    args.append(self.comparison())
+                    while self.peek() == ('op', ','):
+                        self.take()
+                        args.append(self.comparison())
+                self.take(')')
+                return f'{upper}({", ".join(args)})'
+            if value in self.variables:
+                return value
+            if upper in ('TRUE', 'FALSE'):
+                return upper.capitalize()
+            raise UnsupportedFormula(f'reference {value}')
+        raise UnsupportedFormula(f'{kind} {value!r}')
+
+
+def placeholder(cell_name):
+    return f'{PLACEHOLDER_PREFIX}{cell_name}'
+
+
+def compile_formula(formula, cell_names):
+    """
+    :param formula: a HALF_CYCLE_CELL_TO_FORMULA function
+    :param cell_names: all the cell names the formula may be called with
+    :return: code object evaluating the formula over placeholder(cell) variables
+    :raises UnsupportedFormula:
+    """
+    cells = {name: placeholder(name) for name in cell_names}
+    text = formula(**cells)
+    if not text.startswith('='):
+        raise UnsupportedFormula(f'not a formula: {text!r}')
+    expression = _Parser(text[1:], variables=set(cells.values())).parse()
+    return compile(expression, '<formula>', 'eval')
+
+
+def to_float(value):
+    """
+    A cell value as excel arithmetic sees it: empty is 0, text is an error (nan)
+    """
+    if value is None or value == '':
+        return 0.0
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    return np.nan
+
+
+class FormulaEvaluator:
+    """
+    :param cell_to_formula: dict(cell name -> formula function)
+    :param cell_names: every cell name a formula may be called with
+    """
+    def __init__(self, cell_to_formula, cell_names):
+        cell_names = set(cell_names) | set(cell_to_formula)
+        for formula in cell_to_formula.values():
+            cell_names |= set(formula_inputs(formula))
+        self.code = {}
+        self.unsupported = {}
+        for cell, formula in cell_to_formula.items():
+            try:
+                self.code[cell] = compile_formula(formula, cell_names)
+            except UnsupportedFormula as e:
+                self.unsupported[cell] = str(e)
+        for cell, reason in sorted(self.unsupported.items()):
+            print(f"not evaluating {cell}: {reason}")
+        self.order = [cell for cell in FormulaGraph(cell_to_formula).order if cell in self.code]
+        self.namespace = dict(FUNCTIONS, __builtins__={}, **{NUMBER: np.float64})
+
+    def evaluate(self, inputs, cells, n):
+        """
+        :param inputs: dict(cell name -> [value]), one value per row
+        :param cells: the formula cells wanted
+        :param n: number of rows
+        :return: dict(cell name -> numpy array of float), non finite values
+         are excel errors; cells that cannot be evaluated are missing
+        """
+        env = {placeholder(cell): np.array([to_float(v) for v in values], dtype=float)
+               for cell, values in inputs.items()}
+        ret = {}
+        with np.errstate(all='ignore'):
+            for cell in self.order:
+                try:
+                    value = eval(self.code[cell], self.namespace, env)
+                except NameError:
+                    continue # an input is not available
+                value = np.broadcast_to(np.asarray(value, dtype=float), (n,))
+                env[placeholder(cell)] = value
+                if cell in cells:
+                    ret[cell] = value
+        return ret
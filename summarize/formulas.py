@@ -0,0 +1,114 @@
+"""
+Dependency graph of the half cycle formulas in emolog's ppxl_util.
+
+Each formula in HALF_CYCLE_CELL_TO_FORMULA is a function whose *_cell
+arguments are the cells it reads. The graph is built once, checked for
+cycles, and the transitive inputs of every formula are computed in
+topological order, so answering "which cells does this set of titles need"
+is a set union.
+"""
+
+from functools import lru_cache
+
+from emolog.emotool.ppxl_util import (
+HALF_CYCLE_CELL_TO_FORMULA,
+HALF_CYCLE_TITLE_TO_CELL_NAME,
+HALF_CYCLE_CELL_TO_TITLE_NAME,
+HALF_CYCLE_FORMULA_TITLES,
+)
+
+
+def formula_inputs(formula):
+    """
+    The cell names a formula reads, i.e. its *_cell arguments
+    """
+    return [x for x in formula.__code__.co_varnames if x.endswith('_cell')]
+
+
+class FormulaGraph:
+    """
+    :param cell_to_formula: dict(cell name -> formula function)
+    :raises ValueError: if the formulas depend on each other in a cycle
+    """
+    def __init__(self, cell_to_formula):
+        self.inputs = {cell: sorted(set(formula_inputs(formula))) for cell, formula in cell_to_formula.items()}
+        self.order = self._topological_order()
+        # transitive inputs of each formula, every input is done before its dependents
+        self.closure = {}
+        for cell in self.order:
+            closure = set()
+            for input in self.inputs[cell]:
+                closure.add(input)
+                closure |= self.closure.get(input, frozenset())
+            self.closure[cell] = frozenset(closure)
+
+    def _topological_order(self):
+        """
+        Kahn's algorithm over the formula cells, inputs that are not formulas
+        themselves are leaves
+        """
+        dependents = {cell: [] for cell in self.inputs}
+        pending = {}
+        for cell, inputs in self.inputs.items():
+            formula_inputs = [input for input in inputs if input in self.inputs]
+            pending[cell] = len(formula_inputs)
+            for input in formula_inputs:
+                dependents[input].append(cell)
+        ready = sorted(cell for cell, count in pending.items() if count == 0)
+        order = []
+        while ready:
+            cell = ready.pop()
+            order.append(cell)
+            for dependent in dependents[cell]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.inputs):
+            raise ValueError(f"formula dependency cycle: {' -> '.join(self._find_cycle(set(self.inputs) - set(order)))}")
+        return order
+
+    def _find_cycle(self, cells):
+        # every cell left by Kahn's algorithm has an input that is also left,
+        # so walking inputs must revisit a cell
+        path = [min(cells)]
+        while True:
+            cell = next(input for input in self.inputs[path[-1]] if input in cells)
+            if cell in path:
+                return path[path.index(cell):] + [cell]
+            path.append(cell)
+
+    def required(self, cells):
+        """
+        :return: frozenset of all cells the formulas of <cells> read, directly
+         or through other formulas
+        """
+        ret = frozenset()
+        for cell in cells:
+            ret |= self.closure.get(cell, frozenset())
+        return ret
+
+
+@lru_cache(maxsize=1)
+def formula_graph():
+    return FormulaGraph(HALF_CYCLE_CELL_TO_FORMULA)
+
+
+@lru_cache(maxsize=None)
+def _required_cell_names(titles):
+    return formula_graph().required(HALF_CYCLE_TITLE_TO_CELL_NAME[k] for k in titles if k in HALF_CYCLE_FORMULA_TITLES)
+
+
+def required_cell_names_from_titles(titles):
+    """ return the sum of cells required for given titles """
+    return set(_required_cell_names(frozenset(titles)))
+
+
+def missing_input_titles(fields, available_titles):
+    """
+    Titles that must be added to <fields> for their formulas to have all
+    their inputs, beyond what <available_titles> (parameters and fields) has
+    :return: [title], sorted by cell name
+    """
+    available_cell_names = {HALF_CYCLE_TITLE_TO_CELL_NAME[x] for x in set(HALF_CYCLE_TITLE_TO_CELL_NAME.keys()) & set(available_titles)}
+    missing = required_cell_names_from_titles(fields) - available_cell_names
+    return [HALF_CYCLE_CELL_TO_TITLE_NAME[x] for x in sorted(missing)]
@@ -0,0 +1,354 @@
+"""
+The Qt front end: drag workbooks or directories in, summarize them in a
+background thread with progress and cancel, or keep watching a directory.
+"""
+
+import os
+import sys
+from threading import Event
+from time import strftime
+
+from PyQt5 import QtGui, QtCore
+from PyQt5.QtCore import QThread, pyqtSignal # punt on QProcess due to IPC complexity
+from PyQt5.QtWidgets import QPushButton, QWidget, QApplication, QLabel, QGridLayout, QProgressBar, QMessageBox, QSpinBox, QCheckBox
+
+from .core import (
+    Config,
+    Profile,
+    Progress,
+    Cancelled,
+    summarize_files,
+    summarize_archive,
+    summarize_batch,
+    watch_dir,
+    find_run_dirs,
+    is_archive,
+    read_xlsx,
+    added_titles,
+    paths_from_file_urls,
+    start,
+    parameters_help,
+)
+
+
+def button(parent, title, callback):
+    class Button(QPushButton):
+        def mousePressEvent(self, e):
+            QPushButton.mousePressEvent(self, e)
+            callback()
+    return Button(title, parent)
+
+
+class SummarizeThread(QThread):
+    """
+    Runs summarize_files. Emits sig with throttled ProgressState updates, then
+    done with the output filename ('' if there was nothing to summarize), or
+    failed with the reason if it was cancelled or failed.
+    """
+    sig = pyqtSignal(object)
+    done = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, files, output, jobs, parent):
+        super().__init__(parent)
+        self.files = files
+        self.output = output
+        self.jobs = jobs
+        self.cancel = Event()
+        self.profile = Profile()
+
+    def run(self):
+        config = Config(self.output)
+        config.jobs = self.jobs
+        progress = Progress(callback=self.sig.emit, cancel=self.cancel)
+        try:
+            if is_archive(self.output):
+                output_file = summarize_archive(self.output, config, progress=progress, profile=self.profile)
+            else:
+                output_file = summarize_files(list(self.files), self.output, config=config, progress=progress, profile=self.profile)
+        except Cancelled:
+            self.failed.emit("cancelled")
+        except (Exception, SystemExit) as e:
+            self.failed.emit(f"failed: {e}" if str(e) else "failed, see the console")
+        else:
+            self.done.emit(output_file or '')
+
+
+class BatchThread(QThread):
+    """
+    Runs summarize_batch over several directories, emitting sig with each
+    directory's summarize_batch_dir result and then done
+    """
+    sig = pyqtSignal(object)
+    done = pyqtSignal()
+
+    def __init__(self, batches, parallel, parent):
+        super().__init__(parent)
+        self.batches = batches
+        self.parallel = parallel
+        self.cancel = Event()
+
+    def run(self):
+        summarize_batch(self.batches, overrides=dict(jobs=1), parallel=self.parallel, stop=self.cancel, on_done=self.sig.emit)
+        self.done.emit()
+
+
+class WatchThread(QThread):
+    sig = pyqtSignal(str)
+
+    def __init__(self, output, jobs, parent):
+        super().__init__(parent)
+        self.output = output
+        self.jobs = jobs
+        self.stop = Event()
+
+    def run(self):
+        config = Config(self.output)
+        config.jobs = self.jobs
+        watch_dir(self.output, config, stop=self.stop, on_summary=self.sig.emit)
+
+
+gui_help = f"""\
+Drag files and click the resulting button. Opens
+the result file (created in the same directory) when it is completely finished
+(watch the pretty progress monitor, or Cancel it). The window then stays open
+for dragging the next batch.
+
+Files from several directories, or whole directories (searched for
+directories with xlsx files), are summarized each directory into itself, as
+many at once as there are Jobs. A zip or tar archive of workbooks is
+summarized without extracting it, into <archive>_summary.xlsx next to it.
+
+With "Watch directory" checked the summary of the whole directory is instead
+kept up to date in place as new files are written to it, until the window is
+closed.
+
+Adding more parameters:
+This is a manual process - no GUI:
+{parameters_help}
+"""
+
+
+class GUI(QWidget):
+
+    def __init__(self):
+        super().__init__()
+        self.initUI()
+        self.batches = {} # directory -> {filename}
+        self.files = set()
+        self.output = None
+        self.summarize_thread = None
+        self.watch_thread = None
+
+
+    def show_help(self):
+        QMessageBox.information(self, "Help", gui_help)
+
+
+    def updateProgBar(self, state):
+        self.progress.setValue(int(state.fraction * self.progress.maximum()))
+        eta = '' if state.eta is None else f", {int(state.eta) // 60}:{int(state.eta) % 60:02} left"
+        self.status_label.setText(f"{state.phase}: {state.files_done}/{state.files_total} files, {state.files_per_second:.1f} files/s{eta}")
+
+    def summarize(self):
+        if len(self.batches) > 1:
+            self.summarizeBatch()
+            return
+        summarize_thread = SummarizeThread(files=self.files, output=self.output, jobs=self.jobs.value(), parent=self)
+        summarize_thread.sig.connect(self.updateProgBar)
+        summarize_thread.done.connect(self.onSummarizeDone)
+        summarize_thread.failed.connect(self.onSummarizeFailed)
+        self.summarize_button.hide()
+        self.progress.setValue(0)
+        self.progress.show()
+        self.cancel_button.show()
+        self.status_label.setText('')
+        self.setAcceptDrops(False)
+        summarize_thread.start()
+        self.summarize_thread = summarize_thread
+
+    def summarizeBatch(self):
+        """
+        Summarize each dropped directory into itself, as many at once as there are jobs
+        """
+        batches = [(d, sorted(files)) for d, files in sorted(self.batches.items())]
+        self.batch_results = []
+        summarize_thread = BatchThread(batches, parallel=self.jobs.value(), parent=self)
+        summarize_thread.sig.connect(self.onBatchResult)
+        summarize_thread.done.connect(self.onBatchDone)
+        self.summarize_button.hide()
+        self.progress.setValue(0)
+        self.progress.show()
+        self.cancel_button.show()
+        self.status_label.setText(f"0/{len(batches)} directories")
+        self.setAcceptDrops(False)
+        summarize_thread.start()
+        self.summarize_thread = summarize_thread
+
+    def onBatchResult(self, result):
+        self.batch_results.append(result)
+        d, output, error, timings = result
+        total = len(self.summarize_thread.batches)
+        self.progress.setValue(self.progress.maximum() * len(self.batch_results) // total)
+        self.status_label.setText(f"{len(self.batch_results)}/{total} directories, {d}: {'failed: ' + error if error else output}")
+
+    def onBatchDone(self):
+        failed = [f"{d}: {error}" for d, output, error, timings in self.batch_results if error is not None]
+        status = f"summarized {len(self.batch_results) - len(failed)} of {len(self.summarize_thread.batches)} directories"
+        self.resetBatch('\n'.join([status] + failed))
+
+    def cancelSummarize(self):
+        self.cancel_button.hide()
+        self.status_label.setText("cancelling")
+        self.summarize_thread.cancel.set()
+
+    def onSummarizeDone(self, output_file):
+        if self.watch.isChecked() and not is_archive(self.output):
+            self.startWatching()
+            return
+        if output_file:
+            start(output_file)
+            self.resetBatch(f"wrote {output_file}\n{self.summarize_thread.profile.summary()}")
+        else:
+            self.resetBatch("no files found")
+
+    def onSummarizeFailed(self, reason):
+        self.resetBatch(reason)
+
+    def resetBatch(self, status):
+        """
+        Ready for another batch of files, showing the <status> of the last one
+        """
+        self.summarize_thread.wait()
+        self.batches = {}
+        self.files = set()
+        self.output = None
+        self.progress.hide()
+        self.cancel_button.hide()
+        self.drag_label.setText(self.drag_text)
+        self.drag_label.show()
+        self.formula_label.setText('')
+        self.status_label.setText(status)
+        self.setAcceptDrops(True)
+
+    def startWatching(self):
+        self.summarize_button.hide()
+        self.progress.hide()
+        self.watch.setEnabled(False)
+        self.watch_thread = WatchThread(output=self.output, jobs=self.jobs.value(), parent=self)
+        self.watch_thread.sig.connect(self.onWatchSummary)
+        self.watch_thread.start()
+        self.drag_label.setText(f"watching {self.output}")
+        self.drag_label.show()
+
+    def onWatchSummary(self, output_file):
+        self.drag_label.setText(f"watching {self.output}\nupdated {output_file} at {strftime('%H:%M:%S')}")
+
+    def closeEvent(self, e):
+        if self.summarize_thread is not None and self.summarize_thread.isRunning():
+            self.summarize_thread.cancel.set()
+            self.summarize_thread.wait()
+        if self.watch_thread is not None:
+            self.watch_thread.stop.set()
+            self.watch_thread.wait()
+        e.accept()
+
+    def initUI(self):
+        self.setAcceptDrops(True)
+
+        layout = self.layout = QGridLayout()
+        layout.setSpacing(10)
+        self.setLayout(layout)
+
+        # TODO ugly hack to make grid give more space to label - better to use
+        # spacing, once I learn how.
+        l = ' ' * 10 + 'Drag files Here' + ' ' * 10
+        self.drag_text = '/' + (' ' * (len(l) - 1 + 10)) + '\n' + l + '\n' + ' ' * (len(l) - 1 + 10) + '/'
+        self.drag_label = QLabel(self.drag_text)
+        layout.addWidget(self.drag_label, 1, 0)
+        layout.addWidget(button(title="Help", callback=self.show_help, parent=self), 2, 0)
+        if os.path.exists(BUILD_NAME_FILENAME):
+            with open(BUILD_NAME_FILENAME) as f:
+                layout.addWidget(QLabel(f.read().strip()), 3, 0)
+
+        self.summarize_button = button(title='Summarize', callback=self.summarize, parent=self)
+        self.summarize_button.hide()
+        layout.addWidget(self.summarize_button, 2, 0)
+        self.setWindowTitle('Post Process xlsx summarizer')
+
+        self.progress = QProgressBar()
+        self.progress.setMaximum(1000)
+        self.progress.hide()
+        layout.addWidget(self.progress, 3, 0)
+        self.cancel_button = button(title='Cancel', callback=self.cancelSummarize, parent=self)
+        self.cancel_button.hide()
+        layout.addWidget(self.cancel_button, 3, 1)
+
+        jobs_label = QLabel('Jobs')
+        jobs_label.setToolTip('Number of worker processes reading the files')
+        layout.addWidget(jobs_label, 4, 0)
+        self.jobs = QSpinBox()
+        self.jobs.setRange(1, os.cpu_count() or 1)
+        self.jobs.setValue(os.cpu_count() or 1)
+        layout.addWidget(self.jobs, 4, 1)
+
+        self.watch = QCheckBox('Watch directory')
+        self.watch.setToolTip('Keep the summary up to date as new files are written to the directory')
+        layout.addWidget(self.watch, 5, 0)
+
+        self.formula_label = QLabel('')
+        self.formula_label.setWordWrap(True)
+        layout.addWidget(self.formula_label, 6, 0, 1, 2)
+
+        self.status_label = QLabel('')
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label, 7, 0, 1, 2)
+
+    def update_button_label(self, new_text):
+        self.summarize_button.setText(new_text)
+
+    def dragEnterEvent(self, e):
+        e.accept()
+
+    def dropEvent(self, e):
+        # files are summarized into their own directory, dropped directories
+        # are searched for directories with xlsx files, each summarized into itself
+        mime = e.mimeData().text()
+        paths = paths_from_file_urls([x.strip() for x in mime.split('\n')])
+        if len(paths) == 0:
+            print("no files dragged")
+            return
+        for path in paths:
+            if is_archive(path):
+                # summarized as a whole, next to it
+                self.batches.setdefault(path, set()).add(path)
+            elif os.path.isdir(path):
+                for d in find_run_dirs([path]):
+                    self.batches.setdefault(d, set()).update(read_xlsx(d))
+            else:
+                self.batches.setdefault(os.path.dirname(path), set()).add(path)
+        self.batches = {d: files for d, files in self.batches.items() if len(files) > 0}
+        if len(self.batches) == 0:
+            print("no xlsx files dragged")
+            e.accept()
+            return
+        self.drag_label.hide()
+        self.summarize_button.show()
+        if len(self.batches) == 1:
+            (self.output, self.files), = self.batches.items()
+            self.update_button_label(f"{len(self.files)} to {self.output}")
+            extra = added_titles(Config(self.output))
+            self.formula_label.setText(f"formulas also add: {', '.join(extra)}" if extra else '')
+        else:
+            self.files = set()
+            self.output = None
+            self.update_button_label(f"{sum(len(x) for x in self.batches.values())} files in {len(self.batches)} directories, each into itself")
+            self.formula_label.setText('')
+        e.accept()
+
+
+def start_gui():
+    app = QApplication(sys.argv)
+    ex = GUI()
+    ex.show()
+    app.exec_()
@@ -0,0 +1,100 @@
+"""
+Read-ahead of whole files, for inputs on slow (network) shares.
+
+Parsing a workbook straight from a share waits on every read, and nothing is
+read while a workbook is parsed or the summary written. A Prefetcher reads
+the files with a few threads ahead of whoever consumes them, into memory,
+so parsing works on bytes already there (BytesIO / xlrd's file_contents)
+while the next files are in flight. What is read ahead is bounded by a byte
+budget: a file is only started once the bytes of the files read or being
+read and not yet handed to the consumer, plus its own, fit in the budget (a
+file larger than the budget is read alone). What the consumer holds once
+handed is up to it; the budget never waits on the consumer, which may hold
+any number of files before it is done with the first. Files are only
+prefetched for extraction in process: worker processes read their own files,
+rather than have the contents pickled over to them.
+"""
+
+import hashlib
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_THREADS = 4
+
+
+def read_file(filename, digest=False):
+    """
+    :return: (contents, sha1 hex digest of them or None), or (None, None) if
+     it cannot be read, leaving the error to whoever opens it by name
+    """
+    try:
+        with open(filename, 'rb') as fd:
+            contents = fd.read()
+    except OSError:
+        return None, None
+    return contents, hashlib.sha1(contents).hexdigest() if digest else None
+
+
+class Prefetcher:
+    """
+    Iterate to get (filename, contents or None, digest or None) in the order
+    of <filenames>.
+    :param filenames: [filename], in the order they are consumed
+    :param budget: bytes read ahead and not yet handed out, at most
+    :param threads: files read at once
+    :param digest: also compute the sha1 of each file, as cache.file_hash does
+    """
+    def __init__(self, filenames, budget, threads=DEFAULT_THREADS, digest=False):
+        self.filenames = list(filenames)
+        self.budget = budget
+        self.digest = digest
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.lock = threading.Lock()
+        self.pending = deque() # (filename, size, future), submitted and not yet handed out
+        self.next = 0 # index of the next filename to submit
+        self.reserved = 0 # bytes submitted and not yet handed out
+        self.read = 0 # bytes read in total
+        self.closed = False
+
+    def _submit(self):
+        # start reading as many files as fit in the budget, keeping their order
+        with self.lock:
+            while self.next < len(self.filenames) and not self.closed:
+                filename = self.filenames[self.next]
+                try:
+                    size = os.path.getsize(filename)
+                except OSError:
+                    size = 0
+                if self.reserved > 0 and self.reserved + size > self.budget:
+                    return
+                self.reserved += size
+                self.pending.append((filename, size, self.executor.submit(read_file, filename, self.digest)))
+                self.next += 1
+
+    def __iter__(self):
+        self._submit()
+        while True:
+            with self.lock:
+                if len(self.pending) == 0:
+                    # with nothing reserved _submit always starts the next file, so all are handed out
+                    return
+                filename, size, future = self.pending.popleft()
+            contents, digest = future.result()
+            with self.lock:
+                self.reserved -= size
+            if contents is not None:
+                self.read += len(contents)
+            # the next files are read while the consumer works on this one
+            self._submit()
+            yield filename, contents, digest
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            pending, self.pending = self.pending, deque()
+        # files not started yet are not read; shutdown(cancel_futures=True) needs python 3.9
+        for filename, size, future in pending:
+            future.cancel()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,91 @@
+"""
+Progress of a summary across its phases, for showing and cancelling it.
+
+Every input file goes through extraction and then, unless it is not a post
+processor file, has its row rendered and written; the run ends with moving
+the outputs into place. Each of those phases has a weight, so the overall
+fraction moves evenly whichever phase dominates. Reports are throttled to one
+per interval, so thousands of files do not flood whoever listens (i.e. the
+Qt event loop).
+"""
+
+from collections import namedtuple
+from time import perf_counter
+
+# share of the total run time per phase, roughly as measured with --profile
+PHASE_WEIGHTS = dict(extract=0.75, write=0.2, finish=0.05)
+
+# seconds between reports
+PROGRESS_INTERVAL = 0.1
+
+ProgressState = namedtuple('ProgressState', ['phase', 'fraction', 'files_done', 'files_total', 'files_per_second', 'eta'])
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Progress:
+    """
+    :param callback: called with a ProgressState at most every <interval>
+     seconds, on every phase change and when done
+    :param cancel: threading.Event, once set the next update raises Cancelled
+    :param interval: seconds between reports
+    """
+    def __init__(self, callback=None, cancel=None, interval=PROGRESS_INTERVAL):
+        self.callback = callback
+        self.cancel = cancel
+        self.interval = interval
+        self.total = 0
+        self.done = dict.fromkeys(PHASE_WEIGHTS, 0)
+        self.phase = None
+        self.started = None
+        self.reported = None
+
+    def start(self, total):
+        """
+        :param total: number of input files
+        """
+        self.total = total
+        self.started = perf_counter()
+        self.reported = None
+
+    def check(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise Cancelled()
+
+    def update(self, phase, done):
+        """
+        :param done: input files done with <phase> so far
+        """
+        self.check()
+        self.done[phase] = done
+        now = perf_counter()
+        if phase != self.phase or self.reported is None or now - self.reported >= self.interval:
+            self.phase = phase
+            self.report(now)
+
+    def finish(self):
+        for phase in self.done:
+            self.done[phase] = self.total
+        self.phase = 'done'
+        self.report(perf_counter())
+
+    def fraction(self):
+        if self.total == 0:
+            return 1.0 if self.phase == 'done' else 0.0
+        return sum(weight * min(self.done[phase], self.total) / self.total for phase, weight in PHASE_WEIGHTS.items())
+
+    def state(self, now=None):
+        now = perf_counter() if now is None else now
+        elapsed = now - (self.started or now)
+        fraction = self.fraction()
+        files_done = self.done['extract']
+        files_per_second = files_done / elapsed if elapsed > 0 else 0.0
+        eta = elapsed * (1 - fraction) / fraction if fraction > 0 else None
+        return ProgressState(self.phase, fraction, files_done, self.total, files_per_second, eta)
+
+    def report(self, now):
+        self.reported = now
+        if self.callback is not None:
+            self.callback(self.state(now))
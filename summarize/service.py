@@ -0,0 +1,273 @@
+"""
+Headless summarize service: a local HTTP server queueing summarize jobs.
+
+Acquisition scripts POST a directory and get a job back; the job runs on a
+pool of worker processes started when the service starts, each warmed up
+(heavy imports done) as it starts, so a job costs only its own work. Python
+3.6 has no pool initializer: there the warm up is queued as a task per
+worker, which another worker may take instead. A job for a directory that
+already has a job waiting for its turn is coalesced into that job, and two
+jobs for the same directory never run at once. Outputs are never opened.
+
+Jobs update the latest summary of their directory in place unless their
+options say "update": false, so a directory summarized over and over does
+not collect a summary_N.xlsx per job.
+
+    POST /jobs            {"dir": "...", "options": {"jobs": 2, ...}}
+                          -> 202 job, or 200 with the waiting job it joined
+    GET  /jobs            -> [job]
+    GET  /jobs/<id>       -> job; ?wait=<seconds> waits for it to finish
+
+A job is {"id", "dir", "options", "status": "queued", "running", "done" or
+"failed", "output", "error", "timings" (a Profile report), "submitted",
+"started", "finished"}.
+
+The workers are daemonic before python 3.9, so there a job reads its files
+in its worker process, whatever its jobs option.
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from itertools import count
+from socketserver import ThreadingMixIn
+from time import time
+from urllib.parse import urlparse, parse_qs
+
+from .core import summarize_batch_dir, READERS
+from .formulas import formula_graph
+from .writers import FORMATS
+from .detail import DETAIL_FORMATS
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# finished jobs kept for GET /jobs/<id>, oldest are forgotten first
+JOB_HISTORY = 1000
+
+# options of the jobs that set them neither themselves nor by the service's defaults
+DEFAULT_OPTIONS = dict(update=True)
+
+# job option -> check of its value, the options are Config attributes
+OPTIONS = {
+    'jobs': lambda x: isinstance(x, int) and x >= 1,
+    'reader': lambda x: x in READERS,
+    'prefetch': lambda x: isinstance(x, int) and x >= 0,
+    'timeout': lambda x: isinstance(x, (int, float)) and not isinstance(x, bool) and x >= 0,
+    'cache': lambda x: isinstance(x, bool),
+    'update': lambda x: isinstance(x, bool),
+    'values_only': lambda x: isinstance(x, bool),
+    'formats': lambda x: isinstance(x, list) and len(x) > 0 and all(f in FORMATS for f in x),
+    'aggregate': lambda x: isinstance(x, bool),
+    'aggregate_by': lambda x: isinstance(x, list) and all(isinstance(title, str) for title in x),
+    'filter': lambda x: x is None or isinstance(x, str),
+    'detail': lambda x: x is None or x in DETAIL_FORMATS,
+}
+
+
+def warm_up(i=None):
+    # runs in each worker process: does the imports core defers to first use
+    # and builds the formula tables every job uses
+    import xlsxwriter  # noqa: F401
+    from . import evaluate  # noqa: F401
+    formula_graph()
+    return os.getpid()
+
+
+class Job:
+    def __init__(self, id, d, options):
+        self.id = id
+        self.dir = d
+        self.options = options
+        self.status = 'queued'
+        self.output = None
+        self.error = None
+        self.timings = None
+        self.submitted = time()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def as_dict(self):
+        return dict(id=self.id, dir=self.dir, options=self.options, status=self.status, output=self.output,
+                    error=self.error, timings=self.timings, submitted=self.submitted, started=self.started,
+                    finished=self.finished)
+
+
+class Service:
+    """
+    :param workers: worker processes, i.e. directories summarized at once
+    :param defaults: options for jobs that do not set them, over DEFAULT_OPTIONS
+    """
+    def __init__(self, workers=1, defaults=None):
+        self.workers = workers
+        self.defaults = dict(DEFAULT_OPTIONS, **(defaults or {}))
+        if sys.version_info >= (3, 7):
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+        else:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.condition = threading.Condition()
+        self.jobs = OrderedDict() # id -> Job
+        self.queue = [] # queued Jobs, oldest first
+        self.running_dirs = set()
+        self.ids = count(1)
+        self.closed = False
+        self.dispatchers = [threading.Thread(target=self._dispatch, daemon=True) for i in range(workers)]
+
+    def start(self):
+        # starts the workers; before python 3.7 this is their warm up too
+        list(self.executor.map(warm_up, range(self.workers)))
+        print(f"{self.workers} workers ready")
+        for dispatcher in self.dispatchers:
+            dispatcher.start()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.executor.shutdown()
+
+    def submit(self, d, options=None):
+        """
+        :return: (Job, True if it is a new job, False if it joined a queued one)
+        """
+        d = os.path.abspath(d)
+        options = dict(self.defaults, **(options or {}))
+        with self.condition:
+            for job in self.queue:
+                if job.dir == d and job.options == options:
+                    return job, False
+            job = Job(next(self.ids), d, options)
+            self.jobs[job.id] = job
+            self.queue.append(job)
+            self.condition.notify()
+        return job, True
+
+    def get(self, id):
+        with self.condition:
+            return self.jobs.get(id)
+
+    def list(self):
+        with self.condition:
+            return [job.as_dict() for job in self.jobs.values()]
+
+    def _next_job(self):
+        """
+        The oldest queued job whose directory is not being summarized, waiting for one
+        """
+        with self.condition:
+            while not self.closed:
+                for job in self.queue:
+                    if job.dir not in self.running_dirs:
+                        self.queue.remove(job)
+                        self.running_dirs.add(job.dir)
+                        job.status = 'running'
+                        job.started = time()
+                        return job
+                self.condition.wait()
+        return None
+
+    def _dispatch(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                d, output, error, timings = self.executor.submit(summarize_batch_dir, job.dir, None, job.options).result()
+            except Exception as e: # the worker died, or the service is closing
+                output, error, timings = None, str(e) or type(e).__name__, None
+            with self.condition:
+                job.output, job.error, job.timings = output, error, timings
+                job.status = 'failed' if error is not None else 'done'
+                job.finished = time()
+                self.running_dirs.discard(job.dir)
+                self._forget_old_jobs()
+                self.condition.notify_all()
+            job.done.set()
+            print(f"job {job.id} {job.dir}: {job.status} {job.output or job.error or ''}")
+
+    def _forget_old_jobs(self):
+        finished = [id for id, job in self.jobs.items() if job.finished is not None]
+        for id in finished[:max(0, len(finished) - JOB_HISTORY)]:
+            del self.jobs[id]
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class Handler(BaseHTTPRequestHandler):
+    def _reply(self, code, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, code, message):
+        self._reply(code, dict(error=message))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [x for x in url.path.split('/') if x]
+        service = self.server.service
+        if parts == ['jobs']:
+            return self._reply(200, service.list())
+        if len(parts) != 2 or parts[0] != 'jobs' or not parts[1].isdigit():
+            return self._error(404, f"no such path {url.path}")
+        job = service.get(int(parts[1]))
+        if job is None:
+            return self._error(404, f"no job {parts[1]}")
+        wait = parse_qs(url.query).get('wait')
+        if wait:
+            try:
+                job.done.wait(float(wait[0]))
+            except ValueError:
+                return self._error(400, f"wait must be seconds, not {wait[0]!r}")
+        self._reply(200, job.as_dict())
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip('/') != '/jobs':
+            return self._error(404, f"no such path {self.path}")
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        except ValueError as e:
+            return self._error(400, f"bad json: {e}")
+        d = request.get('dir') if isinstance(request, dict) else None
+        if not isinstance(d, str) or not os.path.isdir(d):
+            return self._error(400, f"dir must be an existing directory, not {d!r}")
+        options = request.get('options', {})
+        if not isinstance(options, dict):
+            return self._error(400, "options must be an object")
+        bad = [name for name, value in options.items() if name not in OPTIONS or not OPTIONS[name](value)]
+        if bad:
+            return self._error(400, f"bad options {', '.join(bad)}, known are {', '.join(OPTIONS)}")
+        job, new = self.server.service.submit(d, options)
+        self._reply(202 if new else 200, job.as_dict())
+
+    def log_message(self, format, *args):
+        pass # jobs are logged when they finish
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=1, defaults=None):
+    """
+    Run the service until interrupted
+    :param defaults: job options for jobs that do not set them, i.e. from the command line
+    """
+    service = Service(workers=workers, defaults=defaults)
+    service.start()
+    server = Server((host, port), Handler)
+    server.service = service
+    print(f"serving on http://{host}:{server.server_address[1]}/jobs")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,136 @@
+"""
+Columnar store of extracted runs.
+
+A chunk of runs (post processor files) is kept as columns instead of a dict of
+parameters and a list of titles and values per file: the half cycle titles are
+interned once, every parameter and every (direction, field) is one typed
+column with numbers in an array('d'), and the few cells that are not numbers
+(dates, operator names, excel errors, empty or missing cells) are kept aside
+by row. Rows are rendered from the columns, the formulas and the aggregates
+read whole numpy columns.
+"""
+
+from array import array
+
+import numpy as np
+
+from .core import small_int_dict
+
+
+class TypedColumn:
+    """
+    Cell values of one column: numbers in a float array, anything else (text,
+    '', None for a missing cell, ints and bools to give them back as read) by row
+    """
+    def __init__(self):
+        self.numbers = array('d')
+        self.other = {} # row -> value
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def append(self, value):
+        if type(value) is float:
+            self.numbers.append(value)
+            return
+        self.other[len(self.numbers)] = value
+        self.numbers.append(float(value) if isinstance(value, (bool, int)) else np.nan)
+
+    def value(self, i):
+        """
+        :return: the value at row <i> as it was appended
+        """
+        return self.other[i] if i in self.other else self.numbers[i]
+
+    def array(self):
+        """
+        :return: float numpy array, nan for anything that is not a number
+        """
+        return np.frombuffer(self.numbers, dtype=float) if len(self.numbers) > 0 else np.zeros(0)
+
+    def arithmetic(self):
+        """
+        :return: float numpy array of the values as excel arithmetic sees them:
+         empty and missing are 0, text is an error (nan)
+        """
+        from .evaluate import to_float
+        ret = self.array().copy()
+        for i, value in self.other.items():
+            ret[i] = to_float(value)
+        return ret
+
+
+class RunStore:
+    """
+    :param parameter_names: the parameters kept, in column order
+    :param titles: the half cycle field titles kept, in column order
+    :param directions: the half cycle directions, i.e. ['Up', 'Down']
+    """
+    def __init__(self, parameter_names, titles, directions):
+        self.parameter_names = parameter_names
+        self.titles = titles
+        self.directions = directions
+        self.title_ids = small_int_dict([titles])
+        self.filenames = []
+        self.parameters = [TypedColumn() for name in parameter_names]
+        self.fields = [[TypedColumn() for title in titles] for direction in directions]
+        self.seen = [set() for direction in directions] # title ids present in any run, per direction
+        self.results = {} # (direction index, title id) -> float numpy array replacing the column for aggregates
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def add(self, filename, payload):
+        """
+        :param payload: extract's dict(parameters=dict, summary=dict(titles=[title], <direction>=[value]))
+        """
+        parameters, summary = payload['parameters'], payload['summary']
+        for name, column in zip(self.parameter_names, self.parameters):
+            column.append(parameters.get(name))
+        ids = [self.title_ids.get(title) for title in summary['titles']]
+        for direction, (columns, seen) in enumerate(zip(self.fields, self.seen)):
+            row = [None] * len(columns)
+            for title_id, value in zip(ids, summary[self.directions[direction].lower()]):
+                if title_id is not None:
+                    row[title_id] = value
+                    seen.add(title_id)
+            for column, value in zip(columns, row):
+                column.append(value)
+        self.filenames.append(filename)
+
+    def parameter_values(self, i):
+        return [column.value(i) for column in self.parameters]
+
+    def field_values(self, direction, i):
+        """
+        :return: [value] per title for run <i>, None where the run has no such field
+        """
+        return [column.value(i) for column in self.fields[direction]]
+
+    def has_field(self, direction, title):
+        """
+        :return: True if any run has <title> for <direction>
+        """
+        return self.title_ids[title] in self.seen[direction]
+
+    def arithmetic(self, direction, title):
+        return self.fields[direction][self.title_ids[title]].arithmetic()
+
+    def set_result(self, direction, title, values):
+        """
+        Replace what the aggregates see of a field, i.e. with the values its formula evaluated to
+        :param values: float numpy array, nan where there is no number
+        """
+        self.results[(direction, self.title_ids[title])] = values
+
+    def field_matrix(self):
+        """
+        :return: float numpy array of shape (runs, directions * titles), the
+         field columns in summary order, nan where there is no number
+        """
+        ret = np.empty((len(self), len(self.directions) * len(self.titles)))
+        for direction, columns in enumerate(self.fields):
+            for title_id, column in enumerate(columns):
+                values = self.results.get((direction, title_id))
+                ret[:, direction * len(self.titles) + title_id] = column.array() if values is None else values
+        return ret
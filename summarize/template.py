@@ -0,0 +1,87 @@
+"""
+Summary row template, compiled once per configuration.
+
+What a summary row looks like only depends on the configuration and the row
+number: which data index every parameter and field lands in, which fields
+are formulas, and the formula text with its cell references. The template
+resolves all of that up front, rendering each formula once with its
+references' row left as a marker; a row is then the run's values copied into
+place and each formula's text joined with the row number.
+"""
+
+import os
+
+# stands for the row number in compiled formula text, cannot appear in a formula
+ROW_MARKER = '\0'
+
+
+class RowTemplate:
+    """
+    :param user_defined_fields: titles of the user columns, filled in by hand
+    :param parameter_names: the parameter columns, the predefined ones first
+    :param summary_titles: the half cycle field titles, per direction
+    :param directions: the half cycle directions
+    """
+    def __init__(self, user_defined_fields, parameter_names, summary_titles, directions):
+        from xlsxwriter.utility import xl_col_to_name
+        from emolog.emotool.ppxl_util import (
+            HALF_CYCLE_CELL_TO_FORMULA,
+            HALF_CYCLE_PREDEFINED_CELL_NAMES,
+            HALF_CYCLE_TITLE_TO_CELL_NAME,
+        )
+        self.user_defined_fields = user_defined_fields
+        self.parameter_names = parameter_names
+        self.summary_titles = summary_titles
+        self.directions = directions
+        n_user = len(user_defined_fields)
+        self.parameters_index = 1 + n_user # after the file name and the user columns
+        self.fields_index = self.parameters_index + len(parameter_names)
+        self.width = self.fields_index + len(directions) * len(summary_titles)
+
+        def reference(index):
+            return xl_col_to_name(index) + ROW_MARKER
+
+        predefined = {name: reference(self.parameters_index + i) for i, name in enumerate(HALF_CYCLE_PREDEFINED_CELL_NAMES)}
+        # per direction: [(field index, data index, title, formula text split at the row markers)]
+        self.formulas = []
+        for direction in range(len(directions)):
+            left = self.field_index(direction, 0)
+            cells = dict(predefined)
+            cells.update({HALF_CYCLE_TITLE_TO_CELL_NAME[title]: reference(left + i) for i, title in enumerate(summary_titles)
+                          if title in HALF_CYCLE_TITLE_TO_CELL_NAME})
+            assert len(cells.values()) == len(set(cells.values())), "error: allocated same cell to two variables"
+            self.formulas.append([
+                (i, left + i, title, HALF_CYCLE_CELL_TO_FORMULA[HALF_CYCLE_TITLE_TO_CELL_NAME[title]](**cells).split(ROW_MARKER))
+                for i, title in enumerate(summary_titles)
+                if HALF_CYCLE_TITLE_TO_CELL_NAME.get(title) in HALF_CYCLE_CELL_TO_FORMULA])
+        self.formula_titles = list({title: None for formulas in self.formulas for i, index, title, parts in formulas})
+
+    def field_index(self, direction, i):
+        """
+        :return: data index of the <i>th summary title of <direction>
+        """
+        return self.fields_index + direction * len(self.summary_titles) + i
+
+    def fill(self, store, i, rowx, kept_values):
+        """
+        :param store: RunStore holding the run
+        :param i: the run's index in <store>
+        :param rowx: the zero based sheet row the run is written to
+        :param kept_values: dict(title -> value) kept from a previous summary's row
+        :return: data, [(data index, direction index, formula title)] of the
+         formulas, which replace the field values of runs that have the field
+        """
+        row = str(rowx + 1)
+        data = [os.path.split(store.filenames[i])[-1]]
+        data.extend([kept_values.get(title, '') for title in self.user_defined_fields])
+        data.extend([kept_values.get(title, value) if value in (None, '') else value
+                     for title, value in zip(self.parameter_names, store.parameter_values(i))])
+        formula_cells = []
+        for direction, formulas in enumerate(self.formulas):
+            values = store.field_values(direction, i)
+            for k, index, title, parts in formulas:
+                if values[k] is not None:
+                    values[k] = row.join(parts)
+                    formula_cells.append((index, direction, title))
+            data.extend(values)
+        return data, formula_cells
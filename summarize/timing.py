@@ -0,0 +1,146 @@
+"""
+Where a summary spends its time.
+
+A Profile adds up wall time per phase of summarize_files, the time each file
+took to extract (split into opening the workbook, reading the parameters and
+finding and reading the summary block) and a few counters. Extraction may run
+in worker processes: the workers time themselves with timed() into a plain
+dict that travels back with the payload, and the parent adds it to the
+Profile. With cprofile=True the parent process is also run under cProfile.
+
+The report is a dict ready for json, write() saves it and summary() renders
+the phase breakdown as text.
+"""
+
+import io
+import json
+from contextlib import contextmanager
+from time import perf_counter
+
+# phases of summarize_files in the order they happen, timed in the parent process
+PHASES = ['scan', 'classify', 'catalog', 'cache', 'extract', 'update', 'render', 'evaluate', 'write', 'aggregate', 'detail', 'finish']
+
+# phases of a single file's extraction, timed where it is extracted
+FILE_PHASES = ['open', 'parameters', 'summary']
+
+SLOWEST_FILES = 10
+CPROFILE_FUNCTIONS = 30
+
+
+@contextmanager
+def timed(stats, name):
+    """
+    Add the time spent in the block to stats[name]
+    """
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        stats[name] = stats.get(name, 0.0) + perf_counter() - start
+
+
+class Profile:
+    """
+    :param cprofile: also capture cProfile stats of the calling process
+    :param slowest: how many of the slowest files to report
+    """
+    def __init__(self, cprofile=False, slowest=SLOWEST_FILES):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.file_phases = dict.fromkeys(FILE_PHASES, 0.0)
+        self.counters = dict(files_read=0, files_cached=0, files_skipped=0, files_rejected=0, files_failed=0, cells_read=0, bytes_read=0, rows_written=0, cells_written=0, detail_rows=0)
+        self.files = [] # (seconds, filename, stats)
+        self.slowest = slowest
+        self.cprofile = None
+        if cprofile:
+            import cProfile
+            self.cprofile = cProfile.Profile()
+        self.started = None
+        self.wall = 0.0
+
+    def start(self):
+        self.started = perf_counter()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+    def stop(self):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        if self.started is not None:
+            self.wall += perf_counter() - self.started
+            self.started = None
+
+    def phase(self, name):
+        return timed(self.phases, name)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def add_file(self, filename, stats):
+        """
+        :param stats: filled in by extract(): seconds per FILE_PHASES entry,
+         cells_read, reader actually used, bytes_read if it was prefetched, and
+         cached=True if it came from the cache
+        """
+        if stats.get('cached'):
+            self.count('files_cached')
+            return
+        self.count('files_read')
+        self.count('cells_read', stats.get('cells_read', 0))
+        self.count('bytes_read', stats.get('bytes_read', 0))
+        for name in FILE_PHASES:
+            self.file_phases[name] += stats.get(name, 0.0)
+        self.files.append((sum(stats.get(name, 0.0) for name in FILE_PHASES), filename, stats))
+
+    def add_row(self, cells, outputs=1):
+        self.count('rows_written', outputs)
+        self.count('cells_written', cells * outputs)
+
+    def slowest_files(self):
+        return [dict(filename=filename, seconds=seconds, **{k: v for k, v in stats.items() if k != 'cached'})
+                for seconds, filename, stats in sorted(self.files, key=lambda x: x[0], reverse=True)[:self.slowest]]
+
+    def cprofile_functions(self, limit=CPROFILE_FUNCTIONS):
+        import pstats
+        stats = pstats.Stats(self.cprofile, stream=io.StringIO())
+        stats.sort_stats('cumulative')
+        ret = []
+        for (filename, line, function) in stats.fcn_list[:limit]:
+            calls, primitive_calls, tottime, cumtime, callers = stats.stats[(filename, line, function)]
+            ret.append(dict(function=f'{filename}:{line}({function})', calls=calls, tottime=tottime, cumtime=cumtime))
+        return ret
+
+    def report(self):
+        ret = dict(
+            wall=self.wall,
+            phases=self.phases,
+            file_phases=self.file_phases,
+            counters=self.counters,
+            slowest_files=self.slowest_files(),
+        )
+        if self.cprofile is not None:
+            ret['cprofile'] = self.cprofile_functions()
+        return ret
+
+    def write(self, filename):
+        """
+        Save the report as json to <filename>, and the raw cProfile stats, if
+        captured, next to it with a .prof extension (for pstats / snakeviz)
+        """
+        with open(filename, 'w') as fd:
+            json.dump(self.report(), fd, indent=2)
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(f"{filename.rsplit('.', 1)[0]}.prof")
+
+    def summary(self):
+        """
+        The phase breakdown and slowest file as text, one item per line
+        """
+        wall = self.wall or sum(self.phases.values()) or 1.0
+        lines = [f"total {self.wall:.2f}s, {self.counters['files_read']} files read, {self.counters['files_cached']} cached"]
+        for name, seconds in self.phases.items():
+            if seconds > 0:
+                lines.append(f"{name:<10} {seconds:8.2f}s {100 * seconds / wall:5.1f}%")
+        if self.files:
+            seconds, filename, stats = max(self.files, key=lambda x: x[0])
+            lines.append(f"slowest file {filename} {seconds:.2f}s")
+        return '\n'.join(lines)
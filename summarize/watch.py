@@ -0,0 +1,148 @@
+"""
+Watch a directory for newly written files.
+
+Uses inotify on linux (through ctypes, no extra dependency) and falls back to
+polling the directory listing elsewhere. Bursts of writes are debounced and a
+file is only reported once it stopped changing and is a complete zip (xlsx)
+file, so a half copied workbook is never handed on.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+import zipfile
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+
+INOTIFY_EVENT = struct.Struct('iIII') # wd, mask, cookie, len - followed by len bytes of name
+
+
+class InotifyWatcher:
+    def __init__(self, d):
+        self.d = d
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(d), IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch {d} failed')
+
+    def wait(self, timeout):
+        """
+        :return: set of names changed in the directory, empty on timeout
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        names = set()
+        data = os.read(self.fd, 64 * 1024)
+        i = 0
+        while i < len(data):
+            wd, mask, cookie, length = INOTIFY_EVENT.unpack_from(data, i)
+            i += INOTIFY_EVENT.size
+            if mask & IN_Q_OVERFLOW:
+                names.update(os.listdir(self.d))
+            elif length > 0:
+                names.add(os.fsdecode(data[i:i + length].rstrip(b'\0')))
+            i += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollWatcher:
+    def __init__(self, d, interval=1.0):
+        self.d = d
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self):
+        return {entry.name: (entry.stat().st_size, entry.stat().st_mtime_ns)
+                for entry in os.scandir(self.d) if entry.is_file()}
+
+    def wait(self, timeout):
+        end = time.time() + timeout
+        while True:
+            time.sleep(max(0, min(self.interval, end - time.time())))
+            snapshot = self._snapshot()
+            names = {name for name, stat in snapshot.items() if self.snapshot.get(name) != stat}
+            self.snapshot = snapshot
+            if names or time.time() >= end:
+                return names
+
+    def close(self):
+        pass
+
+
+def make_watcher(d):
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(d)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), polling {d}")
+    return PollWatcher(d)
+
+
+def is_complete(filename):
+    """
+    A zip file's central directory is written last, so a file that opens as a
+    zip is not being written anymore
+    """
+    try:
+        with zipfile.ZipFile(filename):
+            return True
+    except (OSError, zipfile.BadZipFile):
+        return False
+
+
+def _stat(filename):
+    try:
+        st = os.stat(filename)
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return None
+
+
+def watch(d, callback, accept=lambda name: True, quiet=2.0, stop=None):
+    """
+    Call callback([filename]) with the files in <d> that were written since
+    the last call. Runs until stop (a threading.Event) is set, forever if None.
+    :param accept: name filter, only names it returns True for are reported
+    :param quiet: seconds with no writes before a burst is considered done
+    """
+    watcher = make_watcher(d)
+    pending = {} # name -> stat when last seen changing
+    try:
+        while stop is None or not stop.is_set():
+            names = {name for name in watcher.wait(timeout=quiet if pending else 1.0) if accept(name)}
+            for name in names:
+                pending[name] = _stat(os.path.join(d, name))
+            if names or not pending:
+                continue
+            # quiet for a whole period: take the files that stopped changing
+            ready = []
+            for name, stat in list(pending.items()):
+                filename = os.path.join(d, name)
+                current = _stat(filename)
+                if current is None:
+                    del pending[name]
+                elif current != stat:
+                    pending[name] = current
+                elif is_complete(filename):
+                    del pending[name]
+                    ready.append(filename)
+            if ready:
+                callback(sorted(ready))
+    finally:
+        watcher.close()
@@ -0,0 +1,289 @@
+"""
+Output writers for the summary rows.
+
+Every writer gets the same row model summarize_files builds: a list of
+Column descriptions, then one list of values per file, pushed one row at a
+time so nothing is buffered beyond a writer's own batch. Formula cells arrive
+as Formula values; writers other than xlsx store their computed value.
+Extra tables (i.e. the aggregates) are written with write_table before close.
+
+FORMATS maps a --format name to its file extension and writer class;
+check_formats tells whether they can all be written before any is opened.
+"""
+
+import csv
+from collections import namedtuple
+from math import isfinite
+
+# a formula cell with its value as computed in python, None if not computed
+Formula = namedtuple('Formula', ['text', 'value'])
+
+# group: the direction of a half cycle field, None otherwise
+# kind: 'file', 'user', 'parameter' or 'field'
+Column = namedtuple('Column', ['group', 'title', 'kind'])
+
+FILE_TITLE = 'File'
+SUMMARY_SHEET_NAME = 'Summary'
+
+# rows are written to parquet in record batches of this many
+PARQUET_BATCH_SIZE = 1024
+
+
+def flat_names(columns):
+    """
+    One unique name per column for formats with a single header row, i.e.
+    'down Flow Rate [LPM]'
+    """
+    ret = []
+    seen = set()
+    for column in columns:
+        name = FILE_TITLE if column.kind == 'file' else column.title
+        if column.group is not None:
+            name = f'{column.group} {name}'
+        unique = name
+        i = 2
+        while unique in seen:
+            unique = f'{name} ({i})'
+            i += 1
+        seen.add(unique)
+        ret.append(unique)
+    return ret
+
+
+def plain_value(value):
+    """
+    The value to store for a cell outside of excel: formulas by their computed
+    value, missing if it is an error or was not computed
+    """
+    if isinstance(value, Formula):
+        return value.value if isinstance(value.value, float) and isfinite(value.value) else None
+    return value
+
+
+def number(value):
+    value = plain_value(value)
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    return None
+
+
+class Writer:
+    """
+    Base class: open(columns), write_row(values) for each file, close()
+    """
+    # module the writer needs beyond the requirements, see check_formats
+    requires = None
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def open(self, columns):
+        self.columns = columns
+
+    def write_row(self, values):
+        raise NotImplementedError
+
+    def write_table(self, name, columns, rows):
+        """
+        Write a complete extra table <name>; by default to a file of the same
+        format next to the summary, named after both
+        """
+        base = self.filename[:-len('.tmp')] if self.filename.endswith('.tmp') else self.filename
+        stem, ext = base.rsplit('.', 1)
+        writer = type(self)(f'{stem}_{name.lower()}.{ext}')
+        writer.open(columns)
+        for row in rows:
+            writer.write_row(row)
+        writer.close()
+
+    def close(self):
+        pass
+
+
+class XlsxWriter(Writer):
+    """
+    Writes the summary sheet row by row, in order, using xlsxwriter's
+    constant_memory mode: each row is flushed to disk once the next one
+    starts, so memory stays flat however many rows are written. The two title
+    rows hold the directions above the titles; the file column has no title.
+    """
+    def __init__(self, filename, sheet_name=SUMMARY_SHEET_NAME):
+        super().__init__(filename)
+        self.sheet_name = sheet_name
+
+    def open(self, columns):
+        import xlsxwriter as xlwr
+        super().open(columns)
+        self.workbook = xlwr.Workbook(self.filename, {'constant_memory': True})
+        self.title_format = self.workbook.add_format(properties=dict(text_wrap=True, align='left', bold=True))
+        self.col_format = self.workbook.add_format(properties=dict(text_wrap=True, align='left', num_format='0.000'))
+        self.sheet = self.workbook.add_worksheet(self.sheet_name)
+        self.row = 0
+        self._write(1, [column.group if column.kind == 'field' else '' for column in columns[1:]], self.title_format)
+        self._write(1, [column.title for column in columns[1:]], self.title_format)
+
+    def _write(self, col, data, cell_format):
+        for i, value in enumerate(data):
+            if isinstance(value, Formula):
+                if value.value is None:
+                    self.sheet.write_formula(self.row, col + i, value.text, cell_format)
+                else:
+                    self.sheet.write_formula(self.row, col + i, value.text, cell_format, value.value)
+            else:
+                self.sheet.write(self.row, col + i, value, cell_format) # cannot use named arguments due to (row, col, *args) def
+        self.row += 1
+
+    def write_row(self, values):
+        self._write(0, values, self.col_format)
+
+    def write_table(self, name, columns, rows):
+        """
+        A sheet <name> after the summary sheet, with the same two title rows
+        but from the first column, as the table has no untitled file column
+        """
+        self.sheet = self.workbook.add_worksheet(name)
+        self.row = 0
+        self._write(0, [column.group if column.kind == 'field' else '' for column in columns], self.title_format)
+        self._write(0, [column.title for column in columns], self.title_format)
+        for row in rows:
+            self._write(0, row, self.col_format)
+
+    def close(self):
+        self.workbook.close()
+
+
+class CsvWriter(Writer):
+    def open(self, columns):
+        super().open(columns)
+        self.fd = open(self.filename, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.fd)
+        self.writer.writerow(flat_names(columns))
+
+    def write_row(self, values):
+        self.writer.writerow(['' if v is None else v for v in map(plain_value, values)])
+
+    def close(self):
+        self.fd.close()
+
+
+class SqliteWriter(Writer):
+    """
+    A 'summary' table with a column per summary column: REAL for half cycle
+    fields, untyped (sqlite stores what it gets) for parameters, TEXT otherwise
+    """
+    TABLE = 'summary'
+    TYPES = {'file': 'TEXT', 'user': 'TEXT', 'parameter': '', 'field': 'REAL'}
+
+    def open(self, columns):
+        import sqlite3
+        super().open(columns)
+        self.db = sqlite3.connect(self.filename)
+        names = ', '.join(f'"{name}" {self.TYPES[column.kind]}'.rstrip()
+                          for name, column in zip(flat_names(columns), columns))
+        self.db.execute(f'drop table if exists {self.TABLE}')
+        self.db.execute(f'create table {self.TABLE} ({names})')
+        self.insert = f'insert into {self.TABLE} values ({", ".join("?" * len(columns))})'
+
+    def write_row(self, values):
+        self.db.execute(self.insert, [number(v) if column.kind == 'field' else plain_value(v)
+                                      for column, v in zip(self.columns, values)])
+
+    def write_table(self, name, columns, rows):
+        table = name.lower()
+        names = ', '.join(f'"{name}" {self.TYPES[column.kind]}'.rstrip()
+                          for name, column in zip(flat_names(columns), columns))
+        self.db.execute(f'drop table if exists {table}')
+        self.db.execute(f'create table {table} ({names})')
+        self.db.executemany(f'insert into {table} values ({", ".join("?" * len(columns))})',
+                            [[number(v) if column.kind == 'field' else plain_value(v) for column, v in zip(columns, row)]
+                             for row in rows])
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+class ParquetWriter(Writer):
+    """
+    Typed columns: float64 for half cycle fields, string for the file and user
+    columns, and for parameters float64 if the first batch only has numbers
+    there, string otherwise (later values that do not fit a float64 column
+    are stored as missing). Needs pyarrow.
+    :param batch_size: rows per record batch (row group)
+    """
+    requires = 'pyarrow'
+
+    def __init__(self, filename, batch_size=PARQUET_BATCH_SIZE):
+        super().__init__(filename)
+        self.batch_size = batch_size
+
+    def open(self, columns):
+        import pyarrow
+        import pyarrow.parquet
+        super().open(columns)
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.names = flat_names(columns)
+        self.schema = None
+        self.writer = None
+        self.batch = []
+
+    def _infer_schema(self):
+        types = []
+        for i, column in enumerate(self.columns):
+            if column.kind == 'field':
+                types.append(self.pa.float64())
+            elif column.kind == 'parameter' and all(plain_value(row[i]) in (None, '') or number(row[i]) is not None for row in self.batch):
+                types.append(self.pa.float64())
+            else:
+                types.append(self.pa.string())
+        return self.pa.schema(list(zip(self.names, types)))
+
+    def _flush(self):
+        if self.schema is None:
+            self.schema = self._infer_schema()
+            self.writer = self.pq.ParquetWriter(self.filename, self.schema)
+        arrays = []
+        for i, field in enumerate(self.schema):
+            if field.type == self.pa.float64():
+                data = [number(row[i]) for row in self.batch]
+            else:
+                data = [None if v is None else str(v) for v in (plain_value(row[i]) for row in self.batch)]
+            arrays.append(self.pa.array(data, type=field.type))
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+        self.batch = []
+
+    def write_row(self, values):
+        self.batch.append(values)
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+
+    def close(self):
+        if self.batch or self.writer is None:
+            self._flush()
+        self.writer.close()
+
+
+# format name -> (extension, writer class)
+FORMATS = {
+    'xlsx': ('xlsx', XlsxWriter),
+    'csv': ('csv', CsvWriter),
+    'parquet': ('parquet', ParquetWriter),
+    'sqlite': ('sqlite', SqliteWriter),
+}
+
+
+def check_formats(formats):
+    """
+    Fail before anything is written if one of <formats> is unknown or the
+    module its writer needs is not installed, so no output is left half written
+    """
+    from importlib.util import find_spec
+    for format in formats:
+        if format not in FORMATS:
+            print(f"unknown format {format}, choose from {', '.join(FORMATS)}")
+            raise SystemExit
+        requires = FORMATS[format][1].requires
+        if requires is not None and find_spec(requires) is None:
+            print(f"{format} output needs {requires} (pip install {requires})")
+            raise SystemExit
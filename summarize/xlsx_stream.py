@@ -0,0 +1,206 @@
+"""
+Streaming reader for xlsx workbooks.
+
+Reads sheet names and sheet rows straight out of the zip container, parsing
+the sheet xml incrementally, so a caller that only needs the first few rows
+of a sheet never pays for (or holds in memory) the rest of it. Cell values
+follow the xlrd conventions: numbers are floats, booleans ints, empty cells
+are ''; error cells are their excel text, i.e. '#DIV/0!'.
+"""
+
+import posixpath
+from xml.etree.ElementTree import iterparse, fromstring
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+DOC_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+OFFICE_DOCUMENT_REL_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+SHARED_STRINGS_REL_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings'
+
+DEFAULT_WORKBOOK_PART = 'xl/workbook.xml'
+
+
+def col_index(ref):
+    """
+    Column index of a cell reference, i.e.: 'A1' => 0, 'AB12' => 27
+    """
+    ret = 0
+    for c in ref:
+        if not c.isalpha():
+            break
+        ret = ret * 26 + ord(c.upper()) - ord('A') + 1
+    return ret - 1
+
+
+def _text(elem):
+    """
+    Text of a string item (<si> or <is>): either a single <t> or rich text
+    runs <r><t/></r>. Phonetic runs (<rPh>) are skipped like excel does.
+    """
+    parts = []
+    for child in elem:
+        if child.tag == f'{MAIN_NS}r':
+            child = child.find(f'{MAIN_NS}t')
+        if child is not None and child.tag == f'{MAIN_NS}t':
+            parts.append(child.text or '')
+    return ''.join(parts)
+
+
+def _resolve(base_part, target):
+    if target.startswith('/'):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_part), target))
+
+
+def _rels_part(part):
+    d, name = posixpath.split(part)
+    return posixpath.join(d, '_rels', f'{name}.rels')
+
+
+class XlsxStream:
+    """
+    An opened xlsx file. Use as a context manager, or call close().
+    :param file: path or seekable binary file object
+    """
+    def __init__(self, file):
+        import zipfile
+        self.zip = zipfile.ZipFile(file)
+        self._sheet_parts = None
+        self._shared_strings_part = None
+        self._shared_strings = None
+        self.cells_read = 0 # cells parsed by iter_rows so far
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.zip.close()
+
+    def _read_xml(self, part):
+        return fromstring(self.zip.read(part))
+
+    def _relationships(self, part):
+        """
+        :return: dict(id -> (type, resolved target part))
+        """
+        rels_part = _rels_part(part)
+        if rels_part not in self.zip.NameToInfo:
+            return {}
+        return {rel.get('Id'): (rel.get('Type'), _resolve(part, rel.get('Target')))
+                for rel in self._read_xml(rels_part).iter(f'{PKG_REL_NS}Relationship')}
+
+    def _workbook_part(self):
+        for rel_type, target in self._relationships('').values():
+            if rel_type == OFFICE_DOCUMENT_REL_TYPE:
+                return target
+        return DEFAULT_WORKBOOK_PART
+
+    def _read_workbook(self):
+        workbook_part = self._workbook_part()
+        rels = self._relationships(workbook_part)
+        workbook = self._read_xml(workbook_part)
+        self._sheet_parts = {}
+        for sheet in workbook.iter(f'{MAIN_NS}sheet'):
+            rel_type, target = rels[sheet.get(f'{DOC_REL_NS}id')]
+            self._sheet_parts[sheet.get('name')] = target
+        for rel_type, target in rels.values():
+            if rel_type == SHARED_STRINGS_REL_TYPE:
+                self._shared_strings_part = target
+
+    def sheet_names(self):
+        if self._sheet_parts is None:
+            self._read_workbook()
+        return list(self._sheet_parts)
+
+    def shared_strings(self):
+        if self._shared_strings is None:
+            self.sheet_names()
+            self._shared_strings = []
+            if self._shared_strings_part is not None:
+                with self.zip.open(self._shared_strings_part) as fd:
+                    for event, elem in iterparse(fd):
+                        if elem.tag == f'{MAIN_NS}si':
+                            self._shared_strings.append(_text(elem))
+                            elem.clear()
+        return self._shared_strings
+
+    def _value(self, c):
+        t = c.get('t', 'n')
+        if t == 'inlineStr':
+            is_ = c.find(f'{MAIN_NS}is')
+            return '' if is_ is None else _text(is_)
+        v = c.find(f'{MAIN_NS}v')
+        if v is None or v.text is None:
+            return '#N/A' if t == 'e' else ''
+        if t == 'n':
+            return float(v.text)
+        if t == 's':
+            return self.shared_strings()[int(v.text)]
+        if t == 'b':
+            return int(v.text)
+        return v.text # 'str' (formula result), 'e' (error text), 'd' (iso date)
+
+    def iter_rows(self, name):
+        """
+        Generate the rows of sheet <name> top to bottom, each a list of cell
+        values, with empty rows included so the n-th row generated is sheet row
+        n. Closing the generator (or abandoning it) stops reading the sheet.
+        """
+        if self._sheet_parts is None:
+            self._read_workbook()
+        if name not in self._sheet_parts:
+            raise KeyError(f'no sheet named {name!r}')
+        with self.zip.open(self._sheet_parts[name]) as fd:
+            next_rowx = 0
+            sheet_data = None
+            for event, elem in iterparse(fd, events=('start', 'end')):
+                if event == 'start':
+                    if elem.tag == f'{MAIN_NS}sheetData':
+                        sheet_data = elem
+                    continue
+                if elem.tag != f'{MAIN_NS}row':
+                    continue
+                r = elem.get('r')
+                rowx = next_rowx if r is None else int(r) - 1
+                while next_rowx < rowx:
+                    yield []
+                    next_rowx += 1
+                row = []
+                cells = 0
+                for c in elem.iter(f'{MAIN_NS}c'):
+                    cells += 1
+                    ref = c.get('r')
+                    colx = len(row) if ref is None else col_index(ref)
+                    row.extend([''] * (colx - len(row)))
+                    row.append(self._value(c))
+                self.cells_read += cells
+                sheet_data.clear() # drop parsed rows, keeps memory flat on big sheets
+                yield row
+                next_rowx = rowx + 1
+
+
+def sheet_names(file):
+    """
+    Sheet names of an xlsx, reading nothing but the zip central directory and
+    the workbook part up to its <sheets>, i.e. to tell workbooks apart without
+    opening them
+    :param file: path or seekable binary file object
+    """
+    import zipfile
+    with zipfile.ZipFile(file) as zf:
+        if DEFAULT_WORKBOOK_PART in zf.NameToInfo:
+            names = []
+            with zf.open(DEFAULT_WORKBOOK_PART) as fd:
+                for event, elem in iterparse(fd):
+                    if elem.tag == f'{MAIN_NS}sheet':
+                        names.append(elem.get('name'))
+                    elif elem.tag == f'{MAIN_NS}sheets':
+                        break
+            return names
+    # the workbook part is elsewhere, found through the package relationships
+    with XlsxStream(file) as book:
+        return book.sheet_names()
@@ -0,0 +1,60 @@
+"""
+Fixtures shared by the tests: small post processor workbooks
+"""
+
+import os
+
+import pytest
+
+from summarize.core import (
+    PARAMETERS_SHEET_NAME,
+    HALF_CYCLES_SHEET_NAME,
+    HALF_CYCLE_SUMMARY_TEXT,
+    DIRECTION_TEXT,
+    DOWN_AVERAGES_TEXT,
+    UP_AVERAGES_TEXT,
+    ALL_AVERAGES_TEXT,
+)
+
+TITLES = ['Average Velocity [m/s]', 'Flow Rate [LPM]']
+
+
+def write_run(filename, parameters, down, up, titles=TITLES, half_cycles=()):
+    """
+    Write a workbook laid out like the post processor's
+    :param parameters: [(name, value)]
+    :param down: DOWN averages, one per title; up: UP averages
+    :param half_cycles: [(direction, [value per title])] rows below the summary block
+    """
+    import xlsxwriter
+    workbook = xlsxwriter.Workbook(filename)
+    sheet = workbook.add_worksheet(PARAMETERS_SHEET_NAME)
+    for row, (name, value) in enumerate(parameters):
+        sheet.write_row(row, 0, [name, value])
+    sheet = workbook.add_worksheet(HALF_CYCLES_SHEET_NAME)
+    sheet.write(0, 0, HALF_CYCLE_SUMMARY_TEXT)
+    sheet.write_row(1, 1, [DIRECTION_TEXT] + list(titles))
+    sheet.write_row(2, 1, [DOWN_AVERAGES_TEXT] + list(down))
+    sheet.write_row(3, 1, [UP_AVERAGES_TEXT] + list(up))
+    sheet.write_row(4, 1, [ALL_AVERAGES_TEXT] + [(d + u) / 2 for d, u in zip(down, up)])
+    sheet.write_row(6, 0, ['Half-Cycle', DIRECTION_TEXT] + list(titles))
+    for i, (direction, values) in enumerate(half_cycles):
+        sheet.write_row(7 + i, 0, [i, direction] + list(values))
+    workbook.close()
+    return filename
+
+
+@pytest.fixture
+def make_run(tmp_path):
+    """
+    make_run(name, value, [directory], [parameter=value...]) writes <name>.xlsx
+    in <directory> (a temporary directory by default) with Operator 'alon'
+    unless given, its averages value and value + 1, and returns its path
+    """
+    def make(name, value, directory=None, **parameters):
+        d = str(tmp_path) if directory is None else directory
+        os.makedirs(d, exist_ok=True)
+        return write_run(os.path.join(d, f'{name}.xlsx'), sorted(dict(dict(Operator='alon'), **parameters).items()),
+                         down=[value, value + 1], up=[value + 0.5, value + 1.5],
+                         half_cycles=[('DOWN', [value, value + 1]), ('UP', [value + 0.5, value + 1.5])])
+    return make
@@ -0,0 +1,112 @@
+"""
+Tests of the extraction cache: what is a hit, and that a hit skips extraction
+"""
+
+import os
+
+import pytest
+
+from summarize import cache as cache_module, core
+from summarize.cache import ExtractionCache, file_hash
+from summarize.core import iter_extracted
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ExtractionCache(':memory:')
+    yield cache
+    cache.close()
+
+
+def set_mtime(filename, delta_s):
+    st = os.stat(filename)
+    os.utime(filename, ns=(st.st_atime_ns, st.st_mtime_ns + int(delta_s * 1e9)))
+
+
+@pytest.fixture
+def extracted(monkeypatch):
+    """
+    The files extract() is called on, run in process
+    """
+    calls = []
+    extract = core.extract
+
+    def counting(filename, **kwargs):
+        calls.append(os.path.basename(filename))
+        return extract(filename, **kwargs)
+    monkeypatch.setattr(core, 'extract', counting)
+    return calls
+
+
+def test_lookup(make_run, cache):
+    filename = make_run('a', 1.0)
+    assert cache.lookup(filename) == (False, None)
+    cache.store(filename, dict(parameters={'x': 1.0}, summary={}))
+    assert cache.lookup(filename) == (True, dict(parameters={'x': 1.0}, summary={}))
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_not_post_processor_is_cached(make_run, cache):
+    filename = make_run('a', 1.0)
+    cache.store(filename, None)
+    assert cache.lookup(filename) == (True, None)
+
+
+def test_content_change_invalidates(make_run, cache):
+    filename = make_run('a', 1.0)
+    cache.store(filename, dict(parameters={}, summary={}))
+    make_run('a', 2.0)
+    assert cache.lookup(filename) == (False, None)
+
+
+def test_mtime_change_with_other_contents_invalidates(make_run, cache):
+    filename = make_run('a', 1.0)
+    cache.store(filename, dict(parameters={}, summary={}))
+    with open(filename, 'r+b') as f: # same size, other contents
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 1]))
+    set_mtime(filename, 10)
+    assert cache.lookup(filename) == (False, None)
+
+
+def test_mtime_change_with_same_contents_is_a_hit(make_run, cache):
+    # a copied or touched file is not read again
+    filename = make_run('a', 1.0)
+    cache.store(filename, dict(parameters={}, summary={}))
+    set_mtime(filename, 10)
+    assert cache.lookup(filename)[0]
+
+
+def test_stored_digest_is_trusted(make_run, cache):
+    filename = make_run('a', 1.0)
+    cache.store(filename, dict(parameters={}, summary={}), digest='0' * 40)
+    set_mtime(filename, 10)
+    assert cache.lookup(filename) == (False, None) # compared to the digest given, not to a hash of the file
+
+
+def test_hit_skips_extraction(make_run, cache, extracted):
+    filenames = [make_run('a', 1.0), make_run('b', 2.0)]
+    first = list(iter_extracted(filenames, cache=cache))
+    assert extracted == ['a.xlsx', 'b.xlsx']
+    make_run('b', 3.0)
+    second = list(iter_extracted(filenames, cache=cache))
+    assert extracted == ['a.xlsx', 'b.xlsx', 'b.xlsx'] # only the changed file is read again
+    assert second[0] == first[0]
+    assert second[1][1]['summary']['down'] == [3.0, 4.0]
+
+
+@pytest.mark.parametrize('jobs, prefetch', [(1, 0), (2, 0), (1, 10 ** 6)])
+def test_store_does_not_read_files_again(make_run, cache, monkeypatch, jobs, prefetch):
+    # the digest comes from the contents the file was extracted from
+    filenames = [make_run('a', 1.0), make_run('b', 2.0)]
+    digests = [file_hash(filename) for filename in filenames]
+
+    def no_hash(filename, chunk_size=None):
+        raise AssertionError(f'{filename} read again to hash it')
+    monkeypatch.setattr(cache_module, 'file_hash', no_hash)
+    assert len(list(iter_extracted(filenames, jobs=jobs, prefetch=prefetch, cache=cache))) == 2
+    stored = [cache.db.execute('select hash from files where path = ?', (os.path.abspath(filename),)).fetchone()[0]
+              for filename in filenames]
+    assert stored == digests
@@ -0,0 +1,140 @@
+"""
+Tests of the filter expressions of the run catalog, against an in-memory
+catalog of files with known parameters
+"""
+
+import os
+
+import pytest
+
+from summarize.catalog import Catalog, FilterError, parse_filter
+
+# file -> its parameters, None for a file that is not a post processor output
+PARAMETERS = {
+    'a.xlsx': {'Mode': 2.0, 'Date': '2020-03-01', 'Operator': 'alon', 'Pump Head [m]': 10.0, 'Note': "it's"},
+    'b.xlsx': {'Mode': 1.0, 'Date': '2019-05-01', 'Operator': 'dan', 'Pump Head [m]': 20.0, 'Note': 'say "hi"',
+               'Label "x"': 'q'},
+    'c.xlsx': {'Mode': '2', 'Date': '2019-01-01', 'Operator': 'dan'}, # Mode is text, no Pump Head
+    'd.xlsx': None,
+}
+
+
+def catalog_of(directory, parameters):
+    """
+    :return: (in-memory Catalog of empty files in <directory> read as having
+     <parameters>, their filenames)
+    """
+    filenames = []
+    for name in parameters:
+        filename = os.path.join(str(directory), name)
+        open(filename, 'w').close()
+        filenames.append(filename)
+    by_path = {os.path.abspath(filename): parameters[os.path.basename(filename)] for filename in filenames}
+    catalog = Catalog(':memory:')
+    catalog.update(filenames, by_path.get)
+    return catalog, filenames
+
+
+@pytest.fixture(scope='module')
+def select(tmp_path_factory):
+    catalog, filenames = catalog_of(tmp_path_factory.mktemp('runs'), PARAMETERS)
+    yield lambda expression: [os.path.basename(f) for f in catalog.select(expression, filenames)]
+    catalog.close()
+
+
+@pytest.mark.parametrize('expression, expected', [
+    # numbers and text
+    ('Mode = 2', ['a.xlsx']),
+    ('Mode = 2.0', ['a.xlsx']),
+    ('Mode = 2e0', ['a.xlsx']),
+    ("Mode = '2'", ['c.xlsx']), # text is not the number
+    ('Mode != 2', ['b.xlsx', 'c.xlsx']),
+    ('Mode <> 2', ['b.xlsx', 'c.xlsx']),
+    ('Mode > -1', ['a.xlsx', 'b.xlsx', 'c.xlsx']),
+    ('Mode > 1', ['a.xlsx', 'c.xlsx']), # any text is more than any number
+    ("Mode < 'a'", ['a.xlsx', 'b.xlsx', 'c.xlsx']),
+    ("Date >= '2019-05-01'", ['a.xlsx', 'b.xlsx']),
+    ("Date < '2019-05-01'", ['c.xlsx']),
+    # quoting
+    ("Operator = 'alon'", ['a.xlsx']),
+    ('"Operator" = \'alon\'', ['a.xlsx']),
+    ('"Pump Head [m]" = 10', ['a.xlsx']),
+    ("Note = 'it''s'", ['a.xlsx']),
+    ('Note = \'say "hi"\'', ['b.xlsx']),
+    ('"Label ""x""" = \'q\'', ['b.xlsx']),
+    ("Operator = 'Alon'", []), # text compares case sensitively
+    # missing parameters
+    ('"Pump Head [m]" != 10', ['b.xlsx']),
+    ('Missing = 1', []),
+    # and binds tighter than or
+    ("Operator = 'dan' or Mode = 2 and Date >= '2020-01-01'", ['a.xlsx', 'b.xlsx', 'c.xlsx']),
+    ("(Operator = 'dan' or Mode = 2) and Date >= '2020-01-01'", ['a.xlsx']),
+    ("Mode = 2 and Operator = 'dan' or Mode = 1", ['b.xlsx']),
+    ("Mode = 2 and (Operator = 'dan' or Mode = 1)", []),
+    ('Mode = 1 OR Mode = 2', ['a.xlsx', 'b.xlsx']), # keywords are case insensitive
+    # not binds tighter than and
+    ("not Operator = 'alon'", ['b.xlsx', 'c.xlsx']),
+    ("not Mode = 2 and Operator = 'dan'", ['b.xlsx', 'c.xlsx']),
+    ("not (Mode = 2 and Operator = 'dan')", ['a.xlsx', 'b.xlsx', 'c.xlsx']),
+    ("not (Mode = 1 or Operator = 'alon')", ['c.xlsx']),
+    ('not not Mode = 1', ['b.xlsx']),
+    ('not "Pump Head [m]" = 10', ['b.xlsx', 'c.xlsx']), # a file without the parameter is not excluded
+    ('not Mode = 5', ['a.xlsx', 'b.xlsx', 'c.xlsx']), # never a file that is not a post processor output
+])
+def test_select(select, expression, expected):
+    assert select(expression) == expected
+
+
+@pytest.mark.parametrize('expression', [
+    '',
+    '   ',
+    'Mode',
+    'Mode =',
+    '= 2',
+    'Mode == 2',
+    'Mode = Operator', # bare words are parameters, not text
+    'Mode = "2"', # double quotes are parameters, not text
+    "Mode = 'open",
+    '"Mode = 2',
+    '(Mode = 2',
+    'Mode = 2)',
+    'Mode = 2 and',
+    'Mode = 2 Mode = 1',
+    'not',
+    'Mode ~ 2',
+    '2 = Mode',
+    'and = 2',
+])
+def test_errors(expression):
+    with pytest.raises(FilterError):
+        parse_filter(expression)
+
+
+def test_parameters_are_bound_not_inlined():
+    condition, params = parse_filter("Note = 'x'' or 1=1 --' and \"Pump Head [m]\" > 1.5")
+    assert "'" not in condition
+    assert params == ['Note', "x' or 1=1 --", 'Pump Head [m]', 1.5]
+
+
+def test_update_reads_only_new_and_changed_files(tmp_path):
+    catalog, filenames = catalog_of(tmp_path, {'a.xlsx': {'Mode': 1.0}, 'b.xlsx': {'Mode': 2.0}})
+    read = []
+
+    def read_parameters(path):
+        read.append(os.path.basename(path))
+        return {'Mode': 3.0}
+    assert catalog.update(filenames, read_parameters) == 0
+    with open(filenames[0], 'w') as f:
+        f.write('changed')
+    assert catalog.update(filenames, read_parameters) == 1
+    assert read == ['a.xlsx']
+    assert [os.path.basename(f) for f in catalog.select('Mode = 3', filenames)] == ['a.xlsx']
+    catalog.close()
+
+
+def test_update_forgets_missing_files(tmp_path):
+    catalog, filenames = catalog_of(tmp_path, {'a.xlsx': {'Mode': 1.0}, 'b.xlsx': {'Mode': 1.0}})
+    os.unlink(filenames[1])
+    catalog.update(filenames, lambda path: {'Mode': 1.0}) # b is listed, but removed
+    assert catalog.select('Mode = 1', filenames) == filenames[:1]
+    catalog.close()
@@ -0,0 +1,42 @@
+"""
+Tests of the long format detail: every half cycle of every run, tagged with
+the run it comes from
+"""
+
+import csv
+import os
+import zipfile
+
+import pytest
+
+from summarize.core import Config, summarize_dir
+
+
+def detail_files(summary):
+    with open(os.path.splitext(summary)[0] + '_detail.csv', newline='') as f:
+        return sorted({row['File'] for row in csv.DictReader(f)})
+
+
+@pytest.fixture
+def config():
+    def make(d):
+        config = Config(d)
+        config.detail = 'csv'
+        return config
+    return make
+
+
+def test_directory_runs_are_tagged_by_name(tmp_path, make_run, config):
+    d = str(tmp_path / 'runs')
+    make_run('a', 1.0, d)
+    make_run('b', 2.0, d)
+    assert detail_files(summarize_dir(d, config(d))) == ['a.xlsx', 'b.xlsx']
+
+
+def test_archive_runs_of_the_same_name_are_told_apart(tmp_path, make_run, config):
+    archive = str(tmp_path / 'runs.zip')
+    with zipfile.ZipFile(archive, 'w') as zf:
+        for folder, value in [('monday', 1.0), ('tuesday', 2.0)]:
+            zf.write(make_run('run', value, str(tmp_path / folder)), f'{folder}/run.xlsx')
+    assert detail_files(summarize_dir(archive, config(str(tmp_path)))) == \
+        [os.path.join('monday', 'run.xlsx'), os.path.join('tuesday', 'run.xlsx')]
@@ -0,0 +1,175 @@
+"""
+Tests of the python evaluation of the half cycle formulas against the excel
+semantics it keeps
+"""
+
+import numpy as np
+import pytest
+
+from summarize.evaluate import FormulaEvaluator, UnsupportedFormula, compile_formula, to_float
+
+
+def evaluate(text, n=1, **inputs):
+    """
+    Evaluate formula <text> over <n> rows, {a} and {b} in it standing for the
+    input cells a_cell and b_cell given in <inputs> as lists of values
+    :return: numpy array, or None if the formula was not evaluated
+    """
+    evaluator = FormulaEvaluator({'x_cell': lambda a_cell, b_cell, **_: text.format(a=a_cell, b=b_cell)},
+                                 cell_names=['a_cell', 'b_cell'])
+    result = evaluator.evaluate({f'{name}_cell': values for name, values in inputs.items()}, {'x_cell'}, n=n)
+    return result.get('x_cell')
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('=1+2*3', 7),
+    ('=(1+2)*3', 9),
+    ('=10/4', 2.5),
+    ('=10-4-3', 3),
+    ('=-2^2', 4), # negation binds tighter than ^
+    ('=2^3^2', 64), # ^ is left associative
+    ('=-2^3', -8),
+    ('=2*-3', -6),
+    ('=50%', 0.5),
+    ('=-50%', -0.5),
+    ('=200%*3', 6),
+    ('=2^200%', 4), # % binds tighter than ^
+    ('=1+2=3', 1),
+    ('=2<>2', 0),
+    ('=1<2', 1),
+    ('=2>=3', 0),
+    ('=1.5e2', 150),
+    ('=.5', 0.5),
+])
+def test_precedence(text, expected):
+    assert evaluate(text)[0] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('=ROUND(2.5)', 3), # half away from zero, not to even
+    ('=ROUND(-2.5)', -3),
+    ('=ROUND(1.25, 1)', 1.3),
+    ('=round(0.5)', 1), # function names are case insensitive
+    ('=IF(1=1, 2, 3)', 2),
+    ('=IF(1=2, 2)', 0), # the missing false value is FALSE
+    ('=IF(TRUE, 1, 0)', 1),
+    ('=IFERROR(1/0, 7)', 7),
+    ('=IFERROR(4, 7)', 4),
+    ('=MIN(3, 1, 2)', 1),
+    ('=MAX(3, 1, 2)', 3),
+    ('=SUM(1, 2, 3)', 6),
+    ('=AVERAGE(1, 2, 3)', 2),
+    ('=AND(1=1, 2=3)', 0),
+    ('=OR(1=1, 2=3)', 1),
+    ('=NOT(1=1)', 0),
+    ('=ABS(-2)', 2),
+    ('=SQRT(16)', 4),
+    ('=POWER(2, 10)', 1024),
+    ('=LOG(100)', 2),
+    ('=LOG(8, 2)', 3),
+    ('=LN(EXP(2))', 2),
+    ('=PI()', np.pi),
+])
+def test_functions(text, expected):
+    assert evaluate(text)[0] == pytest.approx(expected)
+
+
+def test_inputs_are_columns():
+    result = evaluate('={a}*2+{b}', n=3, a=[1, 2, 3], b=[10, 20, 30])
+    assert list(result) == [12, 24, 36]
+
+
+def test_constant_formula_fills_all_rows():
+    assert list(evaluate('=1+1', n=3)) == [2, 2, 2]
+
+
+def test_if_per_row():
+    result = evaluate('=IF({a}=0, 0, {b}/{a})', n=3, a=[0, 2, 4], b=[5, 5, 5])
+    assert list(result) == [0, 2.5, 1.25]
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, 0.0),
+    ('', 0.0),
+    (3, 3.0),
+    (2.5, 2.5),
+    (True, 1.0),
+])
+def test_to_float(value, expected):
+    assert to_float(value) == expected
+
+
+def test_text_is_an_error():
+    assert np.isnan(to_float('n/a'))
+
+
+def test_empty_is_zero():
+    assert list(evaluate('={a}+1', n=2, a=['', None])) == [1, 1]
+
+
+@pytest.mark.parametrize('text', [
+    '={a}+1',
+    '={a}*0', # an error times 0 is still an error
+    '=ROUND({a})',
+    '=MAX({a}, 1)',
+])
+def test_errors_propagate(text):
+    assert not np.isfinite(evaluate(text, a=['text'])[0])
+
+
+@pytest.mark.parametrize('text', [
+    '=1/0',
+    '=(-8)^(1/3)', # #NUM! in excel, not a complex number
+    '=SQRT(-1)',
+])
+def test_constant_errors(text):
+    assert not np.isfinite(evaluate(text)[0])
+
+
+def test_division_by_zero_is_an_error():
+    assert not np.isfinite(evaluate('=1/{a}', a=[0])[0])
+    assert not np.isfinite(evaluate('=1/{a}', a=[''])[0]) # empty is 0
+
+
+def test_iferror_catches_input_errors():
+    assert list(evaluate('=IFERROR({a}+1, -1)', n=2, a=['text', 1])) == [-1, 2]
+
+
+def test_missing_input_is_not_evaluated():
+    assert evaluate('={a}+{b}', a=[1]) is None
+
+
+def test_formulas_read_formulas():
+    evaluator = FormulaEvaluator({
+        'b_cell': lambda a_cell, **_: f'={a_cell}*2',
+        'c_cell': lambda b_cell, **_: f'={b_cell}+1',
+    }, cell_names=['a_cell'])
+    result = evaluator.evaluate({'a_cell': [1, 2]}, {'c_cell'}, n=2)
+    assert list(result['c_cell']) == [3, 5]
+    assert 'b_cell' not in result # evaluated, but not asked for
+
+
+@pytest.mark.parametrize('text', [
+    '=VLOOKUP(1, 2, 3)', # function outside the supported subset
+    '="a"&"b"', # text concatenation
+    '="text"',
+    '=A1+1', # reference to a cell that is not a formula input
+    '=1 2',
+    '=(1+2',
+    '=1+',
+    '=SUM(1;2)',
+    '1+2', # not a formula
+])
+def test_unsupported(text):
+    with pytest.raises(UnsupportedFormula):
+        compile_formula(lambda **_: text, cell_names=[])
+
+
+def test_unsupported_formulas_are_left_to_the_spreadsheet():
+    evaluator = FormulaEvaluator({
+        'x_cell': lambda a_cell, **_: f'=VLOOKUP({a_cell}, 1, 2)',
+        'y_cell': lambda a_cell, **_: f'={a_cell}+1',
+    }, cell_names=['a_cell'])
+    assert list(evaluator.unsupported) == ['x_cell']
+    result = evaluator.evaluate({'a_cell': [1]}, {'x_cell', 'y_cell'}, n=1)
+    assert list(result) == ['y_cell']
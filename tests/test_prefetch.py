@@ -0,0 +1,102 @@
+"""
+Tests of the read-ahead of files, alone and feeding the extraction
+"""
+
+import os
+import threading
+
+import pytest
+
+from summarize.core import iter_extracted
+from summarize import prefetch
+from summarize.prefetch import Prefetcher
+
+
+@pytest.fixture
+def files(tmp_path):
+    # not workbooks: each fails its extraction, with its contents read ahead all the same
+    filenames = []
+    for i in range(8):
+        filename = os.path.join(str(tmp_path), f'run_{i}.xlsx')
+        with open(filename, 'wb') as f:
+            f.write(bytes([i]) * (1000 + i))
+        filenames.append(filename)
+    return filenames
+
+
+def run_within(seconds, f):
+    """
+    :return: f(), failing the test if it has not returned within <seconds>
+    """
+    ret = []
+    thread = threading.Thread(target=lambda: ret.append(f()), daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert not thread.is_alive(), f'still running after {seconds}s'
+    return ret[0]
+
+
+def test_prefetch_in_order(files):
+    prefetcher = Prefetcher(files, budget=2500, threads=2, digest=True)
+    items = list(prefetcher)
+    assert [filename for filename, contents, digest in items] == files
+    assert all(contents == open(filename, 'rb').read() for filename, contents, digest in items)
+    assert all(len(digest) == 40 for filename, contents, digest in items)
+    assert prefetcher.read == sum(os.path.getsize(filename) for filename in files)
+    prefetcher.close()
+
+
+def test_budget_bounds_read_ahead(files):
+    prefetcher = Prefetcher(files, budget=2500, threads=4)
+    items = iter(prefetcher)
+    next(items)
+    # run_1 and run_2 fit in the budget along with each other, run_3 does not
+    assert [filename for filename, size, future in prefetcher.pending] == files[1:3]
+    assert prefetcher.reserved <= 2500
+    prefetcher.close()
+
+
+def test_consumer_may_hold_any_number_of_files(files):
+    # files larger than the budget, all taken before any is done with
+    prefetcher = Prefetcher(files, budget=1, threads=2)
+    assert len(run_within(30, lambda: list(prefetcher))) == len(files)
+    prefetcher.close()
+
+
+def test_missing_file(files):
+    prefetcher = Prefetcher(files[:1] + ['missing.xlsx'], budget=1)
+    assert [contents is None for filename, contents, digest in prefetcher] == [False, True]
+    prefetcher.close()
+
+
+def test_close_stops_reading(files):
+    prefetcher = Prefetcher(files, budget=10 ** 6, threads=1)
+    items = iter(prefetcher)
+    next(items)
+    prefetcher.close()
+    assert list(items) == []
+
+
+@pytest.mark.parametrize('jobs, timeout', [
+    (2, None),
+    (1, 30),
+    (2, 30),
+    (1, None),
+])
+def test_prefetch_files_larger_than_the_budget(files, jobs, timeout):
+    # in process the files are prefetched, worker processes read them themselves
+    errors = []
+    extracted = run_within(60, lambda: list(iter_extracted(files, jobs=jobs, prefetch=1, timeout=timeout,
+                                                            errors=errors)))
+    assert extracted == []
+    assert [filename for filename, reason in errors] == files
+
+
+@pytest.mark.parametrize('jobs, timeout', [(2, None), (1, 30)])
+def test_worker_processes_are_not_prefetched_for(files, monkeypatch, jobs, timeout):
+    def no_prefetcher(*args, **kwargs):
+        raise AssertionError('prefetched for worker processes')
+    monkeypatch.setattr(prefetch, 'Prefetcher', no_prefetcher)
+    errors = []
+    assert list(iter_extracted(files, jobs=jobs, prefetch=10 ** 6, timeout=timeout, errors=errors)) == []
+    assert [filename for filename, reason in errors] == files
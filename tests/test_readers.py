@@ -0,0 +1,224 @@
+"""
+Parity of the two readers: the streaming reader and xlrd extract the same
+payload from the same workbook, whatever the kinds of its cells, and the
+same files fall back from one to the other wherever a workbook is read
+"""
+
+import zipfile
+from xml.sax.saxutils import escape
+
+import pytest
+
+from summarize import core
+from summarize.core import (
+    PARAMETERS_SHEET_NAME,
+    HALF_CYCLES_SHEET_NAME,
+    HALF_CYCLE_SUMMARY_TEXT,
+    DIRECTION_TEXT,
+    DOWN_AVERAGES_TEXT,
+    UP_AVERAGES_TEXT,
+    ALL_AVERAGES_TEXT,
+    extract_stream,
+    extract_xlrd,
+    extract_detail,
+    extract,
+    read_parameters,
+)
+
+MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+
+def n(value):
+    return ('n', repr(float(value)))
+
+
+def inline(text):
+    return ('inlineStr', text)
+
+
+def error(text):
+    return ('e', text)
+
+
+def boolean(value):
+    return ('b', str(int(value)))
+
+
+def formula_text(text):
+    return ('str', text)
+
+
+def column_name(col):
+    name = ''
+    col += 1
+    while col:
+        col, rem = divmod(col - 1, 26)
+        name = chr(ord('A') + rem) + name
+    return name
+
+
+def write_xlsx(filename, sheets):
+    """
+    Write an xlsx with exactly the cell types given, as excel saves them
+    :param sheets: [(name, rows)], each row a list of cells: None for no
+     cell, a str for a shared string, or (t, text) as made by n, inline,
+     error, boolean and formula_text
+    """
+    shared = []
+
+    def cell_xml(ref, cell):
+        if isinstance(cell, str):
+            if cell not in shared:
+                shared.append(cell)
+            return f'<c r="{ref}" t="s"><v>{shared.index(cell)}</v></c>'
+        t, text = cell
+        if t == 'inlineStr':
+            return f'<c r="{ref}" t="inlineStr"><is><t>{escape(text)}</t></is></c>'
+        if t == 'e' and text is None:
+            return f'<c r="{ref}" t="e"/>' # an error without its cached value
+        f = '<f>1/0</f>' if t in ('e', 'str') else ''
+        return f'<c r="{ref}" t="{t}">{f}<v>{escape(text)}</v></c>'
+
+    sheet_parts = []
+    for name, rows in sheets:
+        xml_rows = []
+        for rowx, row in enumerate(rows):
+            cells = ''.join(cell_xml(f'{column_name(colx)}{rowx + 1}', cell)
+                            for colx, cell in enumerate(row) if cell is not None)
+            if cells:
+                xml_rows.append(f'<row r="{rowx + 1}">{cells}</row>')
+        sheet_parts.append(f'<worksheet xmlns="{MAIN}"><sheetData>{"".join(xml_rows)}</sheetData></worksheet>')
+    sheet_entries = ''.join(f'<sheet name="{escape(name)}" sheetId="{i + 1}" r:id="rId{i + 1}"/>'
+                            for i, (name, rows) in enumerate(sheets))
+    sheet_rels = ''.join(f'<Relationship Id="rId{i + 1}" Type="{REL}/worksheet" Target="worksheets/sheet{i + 1}.xml"/>'
+                         for i in range(len(sheets)))
+    overrides = ''.join(f'<Override PartName="/xl/worksheets/sheet{i + 1}.xml" ContentType='
+                        f'"application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                        for i in range(len(sheets)))
+    strings = ''.join(f'<si><t>{escape(text)}</t></si>' for text in shared)
+    with zipfile.ZipFile(filename, 'w') as zf:
+        zf.writestr('[Content_Types].xml', f'''<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\
+<Default Extension="xml" ContentType="application/xml"/>\
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>\
+<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>\
+{overrides}</Types>''')
+        zf.writestr('_rels/.rels', f'<Relationships xmlns="{PKG_REL}">'
+                                   f'<Relationship Id="rId1" Type="{REL}/officeDocument" Target="xl/workbook.xml"/>'
+                                   f'</Relationships>')
+        zf.writestr('xl/workbook.xml', f'<workbook xmlns="{MAIN}" xmlns:r="{REL}"><sheets>{sheet_entries}</sheets></workbook>')
+        zf.writestr('xl/_rels/workbook.xml.rels', f'<Relationships xmlns="{PKG_REL}">{sheet_rels}'
+                                                  f'<Relationship Id="rIdS" Type="{REL}/sharedStrings" Target="sharedStrings.xml"/>'
+                                                  f'</Relationships>')
+        for i, part in enumerate(sheet_parts):
+            zf.writestr(f'xl/worksheets/sheet{i + 1}.xml', part)
+        zf.writestr('xl/sharedStrings.xml', f'<sst xmlns="{MAIN}" count="{len(shared)}" uniqueCount="{len(shared)}">'
+                                            f'{strings}</sst>')
+
+
+PARAMETERS = [
+    ['Comm advance mode', n(2)],
+    ['Operator', 'alon'], # shared string
+    [inline('Pump Head [m]'), n(10)],
+    ['Note', inline('inline text')],
+    ['Calibrated', boolean(True)],
+    ['Ratio', error('#DIV/0!')],
+    ['Label', formula_text('formula text')],
+    [],
+    ['Empty', None],
+]
+
+TITLES = ['Average Velocity [m/s]', inline('Flow Rate [LPM]'), 'Valid', 'Efficiency [%]', 'Lookup']
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    filename = str(tmp_path / 'run.xlsx')
+    half_cycles = [
+        [HALF_CYCLE_SUMMARY_TEXT],
+        [None, DIRECTION_TEXT] + TITLES,
+        [None, DOWN_AVERAGES_TEXT, n(1.5), n(2), boolean(True), error('#DIV/0!'), error('#N/A')],
+        [None, UP_AVERAGES_TEXT, n(-1e-3), n(0), boolean(False), n(50), error(None)],
+        [None, ALL_AVERAGES_TEXT, n(0.7485), n(1), None, error('#VALUE!'), formula_text('')],
+        [],
+        [inline('Half-Cycle'), DIRECTION_TEXT] + TITLES,
+        [n(0), 'DOWN', n(1.5), n(2), boolean(True), error('#DIV/0!'), error('#REF!')],
+        [n(1), inline('UP'), n(-1e-3), n(0), boolean(False), n(50), None],
+    ]
+    write_xlsx(filename, [(PARAMETERS_SHEET_NAME, PARAMETERS), (HALF_CYCLES_SHEET_NAME, half_cycles)])
+    return filename
+
+
+def test_summary_parity(workbook):
+    assert extract_stream(workbook) == extract_xlrd(workbook, {})
+
+
+def test_detail_parity(workbook):
+    stream, stats = extract_detail((workbook, None, None), reader='stream')
+    xlrd, stats = extract_detail((workbook, None, None), reader='xlrd')
+    assert 'error' not in stats
+    assert stream == xlrd
+
+
+def test_cell_values(workbook):
+    payload = extract_xlrd(workbook, {})
+    parameters = payload['parameters']
+    assert parameters['Comm advance mode'] == 2.0
+    assert parameters['Operator'] == 'alon'
+    assert parameters['Pump Head [m]'] == 10.0
+    assert parameters['Note'] == 'inline text'
+    assert parameters['Calibrated'] == 1
+    assert parameters['Ratio'] == '#DIV/0!' # excel's text, not xlrd's error code
+    assert parameters['Label'] == 'formula text'
+    summary = payload['summary']
+    assert summary['titles'][:2] == ['Average Velocity [m/s]', 'Flow Rate [LPM]']
+    assert summary['down'] == [1.5, 2.0, 1, '#DIV/0!', '#N/A']
+    assert summary['up'][3:] == [50.0, '#N/A'] # an error without its value is #N/A
+    assert summary['all'][2:4] == ['', '#VALUE!']
+
+
+@pytest.fixture
+def xlrd_opened(monkeypatch):
+    """
+    The files xlrd is asked to open, none of which it can
+    """
+    import xlrd
+    opened = []
+
+    def open_workbook(filename=None, file_contents=None, **kwargs):
+        opened.append(filename)
+        raise xlrd.XLRDError('not an xls either')
+    monkeypatch.setattr(xlrd, 'open_workbook', open_workbook)
+    return opened
+
+
+def read_everywhere(filename):
+    """
+    :return: the errors of reading <filename> for the summary, the catalog and the detail
+    """
+    try:
+        extract(filename)
+        summary = None
+    except Exception as e:
+        summary = e
+    assert read_parameters(filename) is None
+    payload, stats = extract_detail((filename, None, None))
+    return type(summary).__name__, stats['error'].split(':')[0]
+
+
+def test_not_a_zip_falls_back_to_xlrd(tmp_path, xlrd_opened):
+    filename = str(tmp_path / 'saved_as.xlsx')
+    with open(filename, 'wb') as f:
+        f.write(b'\xd0\xcf\x11\xe0 an xls')
+    assert read_everywhere(filename) == ('XLRDError', 'XLRDError')
+    assert xlrd_opened == [filename] * 3
+
+
+def test_other_errors_do_not_fall_back(workbook, monkeypatch, xlrd_opened):
+    def fail(book):
+        raise ValueError('a bug')
+    monkeypatch.setattr(core, 'stream_parameters', fail)
+    assert read_everywhere(workbook) == ('ValueError', 'ValueError')
+    assert xlrd_opened == []
@@ -0,0 +1,65 @@
+"""
+Tests of the columnar store: every cell value comes back as it was read,
+numbers or not
+"""
+
+import math
+
+import numpy as np
+
+from summarize.store import RunStore, TypedColumn
+
+MIXED = [1.5, 'alon', '', None, 2, True, '#DIV/0!', -0.0, 3.25]
+
+
+def test_typed_column_round_trip():
+    column = TypedColumn()
+    for value in MIXED:
+        column.append(value)
+    assert len(column) == len(MIXED)
+    values = [column.value(i) for i in range(len(MIXED))]
+    assert values == MIXED
+    assert [type(value) for value in values] == [type(value) for value in MIXED] # 2 stays an int, True a bool
+
+
+def test_typed_column_arrays():
+    column = TypedColumn()
+    for value in MIXED:
+        column.append(value)
+    expected = [1.5, math.nan, math.nan, math.nan, 2.0, 1.0, math.nan, -0.0, 3.25]
+    np.testing.assert_array_equal(column.array(), expected)
+    # as excel arithmetic sees them: empty and missing cells are 0
+    np.testing.assert_array_equal(column.arithmetic(), [1.5, math.nan, 0.0, 0.0, 2.0, 1.0, math.nan, -0.0, 3.25])
+
+
+def test_empty_column():
+    column = TypedColumn()
+    assert len(column) == 0
+    assert column.array().shape == (0,)
+
+
+def test_run_store_round_trip():
+    titles = ['Average Velocity [m/s]', 'Flow Rate [LPM]', 'Remark']
+    store = RunStore(['Pump Head [m]', 'Operator'], titles, ['Down', 'Up'])
+    payloads = [
+        dict(parameters={'Pump Head [m]': 10.0, 'Operator': 'alon'},
+             summary=dict(titles=titles, down=[1.5, 2.0, 'ok'], up=[-1e-3, '#N/A', ''])),
+        dict(parameters={'Operator': 7}, # no pump head, a number for the operator
+             summary=dict(titles=['Flow Rate [LPM]', 'Unknown'], down=[3.0, 4.0], up=[True, 5.0])),
+    ]
+    for i, payload in enumerate(payloads):
+        store.add(f'run{i}.xlsx', payload)
+    assert len(store) == 2
+    assert store.filenames == ['run0.xlsx', 'run1.xlsx']
+    assert store.parameter_values(0) == [10.0, 'alon']
+    assert store.parameter_values(1) == [None, 7]
+    assert store.field_values(0, 0) == [1.5, 2.0, 'ok']
+    assert store.field_values(1, 0) == [-1e-3, '#N/A', '']
+    # titles the store does not keep are dropped, those the run lacks are None
+    assert store.field_values(0, 1) == [None, 3.0, None]
+    assert store.field_values(1, 1) == [None, True, None]
+    assert store.has_field(0, 'Remark')
+    np.testing.assert_array_equal(store.field_matrix(), [
+        [1.5, 2.0, math.nan, -1e-3, math.nan, math.nan],
+        [math.nan, 3.0, math.nan, math.nan, 1.0, math.nan],
+    ])
@@ -0,0 +1,96 @@
+"""
+Tests of the row template: a rendered row is the row the per row rendering
+it replaced wrote, formula text included
+"""
+
+import os
+
+import pytest
+
+from summarize.store import RunStore
+from summarize.template import RowTemplate
+
+USER_FIELDS = ['General Notes']
+DIRECTIONS = ['Down', 'Up', 'All']
+
+
+def old_row(rowx, filename, parameters, summary, parameter_names, summary_titles):
+    """
+    The row as summarize_files built it per row before the template: the
+    formula cells rendered for each row with xl_rowcol_to_cell
+    """
+    from xlsxwriter.utility import xl_rowcol_to_cell
+    from emolog.emotool.ppxl_util import (
+        HALF_CYCLE_CELL_TO_FORMULA,
+        HALF_CYCLE_PREDEFINED_CELL_NAMES,
+        HALF_CYCLE_TITLE_TO_CELL_NAME,
+    )
+    n_user = len(USER_FIELDS)
+    params_values = [parameters.get(name) for name in parameter_names]
+    sum_per_dir = [
+        {k: HALF_CYCLE_CELL_TO_FORMULA.get(HALF_CYCLE_TITLE_TO_CELL_NAME.get(k, None), v)
+         for k, v in zip(summary['titles'], summary[key.lower()]) if k in summary_titles}
+        for key in DIRECTIONS]
+    cell_locations = {k: xl_rowcol_to_cell(row=rowx, col=1 + n_user + i) for i, k in enumerate(HALF_CYCLE_PREDEFINED_CELL_NAMES)}
+    summary_values = []
+    col = 1 + n_user + len(parameter_names)
+    for sum_row in sum_per_dir:
+        cells = dict(cell_locations)
+        cells.update({HALF_CYCLE_TITLE_TO_CELL_NAME[k]: xl_rowcol_to_cell(row=rowx, col=col + i)
+                      for i, k in enumerate(summary_titles) if k in HALF_CYCLE_TITLE_TO_CELL_NAME})
+        summary_values.extend(x(**cells) if callable(x) else x for x in [sum_row.get(title) for title in summary_titles])
+        col += len(sum_row)
+    return [os.path.split(filename)[-1]] + [''] * n_user + params_values + summary_values
+
+
+@pytest.fixture
+def titles():
+    """
+    The predefined parameters and every half cycle title that is a formula
+    or a formula's input
+    """
+    from emolog.emotool.ppxl_util import HALF_CYCLE_PREDEFINED_TITLES, HALF_CYCLE_TITLE_TO_CELL_NAME
+    parameter_names = HALF_CYCLE_PREDEFINED_TITLES + ['Operator']
+    summary_titles = [title for title in HALF_CYCLE_TITLE_TO_CELL_NAME if title not in HALF_CYCLE_PREDEFINED_TITLES]
+    return parameter_names, summary_titles
+
+
+def test_rows_match_per_row_rendering(titles):
+    parameter_names, summary_titles = titles
+    runs = [
+        ('a.xlsx', {name: 10.0 for name in parameter_names[:-1]}, summary_titles),
+        ('b.xlsx', dict(Operator='alon'), summary_titles[::-1]), # titles in another order
+    ]
+    store = RunStore(parameter_names, summary_titles, DIRECTIONS)
+    payloads = []
+    for i, (filename, parameters, run_titles) in enumerate(runs):
+        summary = dict(titles=run_titles, **{direction.lower(): [float(i * 100 + k) for k in range(len(run_titles))]
+                                            for direction in DIRECTIONS})
+        payloads.append((filename, parameters, summary))
+        store.add(os.path.join('runs', filename), dict(parameters=parameters, summary=summary))
+    template = RowTemplate(USER_FIELDS, parameter_names, summary_titles, DIRECTIONS)
+    for i, (filename, parameters, summary) in enumerate(payloads):
+        for rowx in (2 + i, 999 + i): # the row numbers in the text grow past a digit
+            data, formula_cells = template.fill(store, i, rowx, {})
+            assert data == old_row(rowx, filename, parameters, summary, parameter_names, summary_titles)
+            assert [data[index] for index, direction, title in formula_cells] == \
+                [value for value in data if isinstance(value, str) and value.startswith('=')]
+
+
+def test_missing_field_is_left_empty(titles):
+    # the per row rendering shifted the references of the next directions
+    # of such a run, so there is nothing to compare to
+    parameter_names, summary_titles = titles
+    store = RunStore(parameter_names, summary_titles, DIRECTIONS)
+    full = dict(titles=summary_titles, **{direction.lower(): [1.0] * len(summary_titles) for direction in DIRECTIONS})
+    partial = dict(titles=summary_titles[1:], **{direction.lower(): [1.0] * (len(summary_titles) - 1) for direction in DIRECTIONS})
+    store.add('a.xlsx', dict(parameters={}, summary=full))
+    store.add('b.xlsx', dict(parameters={}, summary=partial))
+    template = RowTemplate(USER_FIELDS, parameter_names, summary_titles, DIRECTIONS)
+    a, formulas = template.fill(store, 0, 2, {})
+    b, formulas = template.fill(store, 1, 2, {})
+    missing = [template.field_index(direction, 0) for direction in range(len(DIRECTIONS))]
+    assert [b[index] for index in missing] == [None] * len(DIRECTIONS)
+    # the other cells, formulas included, are those of a run that has the field
+    assert [x for index, x in enumerate(b) if index not in missing][1:] == \
+        [x for index, x in enumerate(a) if index not in missing][1:]
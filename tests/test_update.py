@@ -0,0 +1,132 @@
+"""
+Tests of update mode: the latest summary rewritten in place, keeping what
+was entered in it by hand
+"""
+
+import os
+
+import pytest
+
+from summarize.core import Config, summarize_dir, read_summary_rows
+from summarize.xlsx_stream import XlsxStream
+from summarize.writers import SUMMARY_SHEET_NAME
+
+NOTES = 'General Notes'
+VELOCITY = 'Average Velocity [m/s]'
+
+
+@pytest.fixture
+def runs(tmp_path, make_run):
+    d = str(tmp_path / 'runs')
+    os.makedirs(d)
+    with open(os.path.join(d, 'summary.ini'), 'w') as f:
+        f.write('[global]\nparameters=Operator\nupdate=yes\n')
+    make_run('a', 1.0, d)
+    make_run('b', 2.0, d, Operator='bob')
+    return d
+
+
+def summarize(d, **overrides):
+    config = Config(d)
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return summarize_dir(d, config)
+
+
+def rows(summary):
+    """
+    :return: dict(file -> dict(title -> value)) of the summary's rows, the
+     first column of each title
+    """
+    return read_summary_rows(summary, titles={NOTES, VELOCITY, 'Operator'})
+
+
+def enter_note(summary, basename, note):
+    """
+    Write <note> in the General Notes column of the row of <basename>, as an
+    operator does in excel
+    """
+    import xlsxwriter
+    with XlsxStream(summary) as book:
+        sheet_rows = list(book.iter_rows(SUMMARY_SHEET_NAME))
+    col = sheet_rows[1].index(NOTES)
+    workbook = xlsxwriter.Workbook(summary)
+    sheet = workbook.add_worksheet(SUMMARY_SHEET_NAME)
+    for rowx, row in enumerate(sheet_rows):
+        if row and row[0] == basename:
+            row = row + [''] * (col + 1 - len(row))
+            row[col] = note
+        sheet.write_row(rowx, 0, row)
+    workbook.close()
+
+
+def make_newer(filename, than):
+    st = os.stat(than)
+    os.utime(filename, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+
+def test_first_summary(runs):
+    summary = summarize(runs)
+    assert os.path.basename(summary) == 'summary.xlsx'
+    assert {name: row[VELOCITY] for name, row in rows(summary).items()} == {'a.xlsx': 1.0, 'b.xlsx': 2.0}
+
+
+def test_keeps_notes_and_replaces_changed_rows(runs, make_run):
+    summary = summarize(runs)
+    enter_note(summary, 'a.xlsx', 'pump noisy')
+    make_newer(make_run('b', 3.0, runs, Operator='bob'), summary)
+    assert summarize(runs) == summary # rewritten in place, not a summary_1.xlsx
+    assert not os.path.exists(os.path.join(runs, 'summary_1.xlsx'))
+    after = rows(summary)
+    assert after['a.xlsx'][NOTES] == 'pump noisy'
+    assert after['a.xlsx'][VELOCITY] == 1.0
+    assert after['b.xlsx'][VELOCITY] == 3.0
+
+
+def test_up_to_date(runs, capsys):
+    summary = summarize(runs)
+    mtime_ns = os.stat(summary).st_mtime_ns
+    assert summarize(runs) == summary
+    assert 'summary is up to date' in capsys.readouterr().out
+    assert os.stat(summary).st_mtime_ns == mtime_ns
+
+
+def test_new_file_is_added(runs, make_run):
+    summary = summarize(runs)
+    enter_note(summary, 'b.xlsx', 'solar')
+    make_newer(make_run('c', 5.0, runs), summary)
+    assert summarize(runs) == summary
+    after = rows(summary)
+    assert sorted(after) == ['a.xlsx', 'b.xlsx', 'c.xlsx']
+    assert after['b.xlsx'][NOTES] == 'solar'
+
+
+def test_deleted_file_row_is_dropped(runs):
+    summary = summarize(runs)
+    os.unlink(os.path.join(runs, 'b.xlsx'))
+    assert summarize(runs) == summary
+    assert sorted(rows(summary)) == ['a.xlsx']
+
+
+def test_filtered_out_file_keeps_its_row(runs, make_run):
+    summary = summarize(runs)
+    enter_note(summary, 'a.xlsx', 'pump noisy')
+    make_newer(make_run('b', 3.0, runs, Operator='bob'), summary)
+    assert summarize(runs, filter="Operator = 'bob'") == summary
+    after = rows(summary)
+    assert after['a.xlsx'] == {NOTES: 'pump noisy', VELOCITY: 1.0, 'Operator': 'alon'}
+    assert after['b.xlsx'][VELOCITY] == 3.0
+
+
+def test_failed_file_keeps_its_row(runs):
+    summary = summarize(runs)
+    enter_note(summary, 'a.xlsx', 'pump noisy')
+    a = os.path.join(runs, 'a.xlsx')
+    with open(a, 'wb') as f:
+        f.write(b'not a workbook')
+    make_newer(a, summary)
+    assert summarize(runs) == summary
+    after = rows(summary)
+    assert after['a.xlsx'] == {NOTES: 'pump noisy', VELOCITY: 1.0, 'Operator': 'alon'}
+    with XlsxStream(summary) as book:
+        assert [row[0] for row in book.iter_rows('Errors')][2:] == ['a.xlsx']
@@ -0,0 +1,72 @@
+"""
+Tests of the output writers: nothing is left half written when a format
+cannot be written
+"""
+
+import os
+
+import pytest
+
+from summarize.core import Config, summarize_dir
+from summarize.writers import FORMATS, CsvWriter, ParquetWriter, XlsxWriter, check_formats
+
+
+@pytest.fixture
+def runs(tmp_path, make_run):
+    d = str(tmp_path / 'runs')
+    make_run('a', 1.0, d)
+    make_run('b', 2.0, d)
+    return d
+
+
+def outputs(d):
+    return sorted(name for name in os.listdir(d) if name.startswith('summary'))
+
+
+def test_check_formats():
+    check_formats(list(FORMATS))
+
+
+def test_check_formats_unknown(capsys):
+    with pytest.raises(SystemExit):
+        check_formats(['xlsx', 'ods'])
+    assert 'unknown format ods' in capsys.readouterr().out
+
+
+def test_missing_dependency_is_found_before_writing(runs, monkeypatch, capsys):
+    monkeypatch.setattr(ParquetWriter, 'requires', 'no_such_module')
+    config = Config(runs)
+    config.formats = ['xlsx', 'parquet']
+    with pytest.raises(SystemExit):
+        summarize_dir(runs, config)
+    assert 'parquet output needs no_such_module' in capsys.readouterr().out
+    assert outputs(runs) == []
+
+
+def test_failure_while_writing_leaves_nothing(runs, monkeypatch):
+    def fail(self, values):
+        raise OSError('disk full')
+    monkeypatch.setattr(CsvWriter, 'write_row', fail)
+    config = Config(runs)
+    config.formats = ['xlsx', 'csv']
+    with pytest.raises(OSError):
+        summarize_dir(runs, config)
+    assert outputs(runs) == []
+
+
+def test_failed_update_keeps_the_previous_summary(runs, monkeypatch):
+    config = Config(runs)
+    config.update = True
+    summary = summarize_dir(runs, config)
+    with open(summary, 'rb') as f:
+        before = f.read()
+    os.unlink(os.path.join(runs, 'b.xlsx')) # so the update rewrites it
+
+    def fail(self, values):
+        raise OSError('disk full')
+    monkeypatch.setattr(XlsxWriter, 'write_row', fail)
+    with pytest.raises(OSError):
+        summarize_dir(runs, config)
+    assert outputs(runs) == ['summary.xlsx']
+    with open(summary, 'rb') as f:
+        assert f.read() == before